@@ -1,9 +1,29 @@
 from django.contrib import admin
 
-from .models import User, UserAddress, Card, Payment, SavingsGoal
+from .models import User, UserAddress, Card, Payment, PaymentArchive, SavingsGoal, LedgerEntry, BalanceCheckpoint
+
+
+class CardChoicesAdmin(admin.ModelAdmin):
+    """Card choices are labelled by ``Card.__str__``, which reads the owner."""
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.related_model is Card:
+            kwargs['queryset'] = Card.objects.select_related('user')
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+@admin.register(Card)
+class CardAdmin(admin.ModelAdmin):
+    list_select_related = ('user',)
+
+
+@admin.register(SavingsGoal)
+class SavingsGoalAdmin(admin.ModelAdmin):
+    list_select_related = ('user',)
+
 
 admin.site.register(User)
 admin.site.register(UserAddress)
-admin.site.register(Card)
-admin.site.register(Payment)
-admin.site.register(SavingsGoal)
+admin.site.register(Payment, CardChoicesAdmin)
+admin.site.register(PaymentArchive, CardChoicesAdmin)
+admin.site.register(LedgerEntry, CardChoicesAdmin)
+admin.site.register(BalanceCheckpoint, CardChoicesAdmin)
@@ -0,0 +1,255 @@
+"""
+Cold archive of old payments.
+
+Months older than BANK_PAYMENT_ARCHIVE_MONTHS are moved out of the payment
+table into one gzip CSV file per card and month in default_storage, indexed
+by ``PaymentArchive``. The index keeps the totals of each month, so a
+statement spanning whole archived months only decompresses the files of the
+page it shows.
+
+``accounts.statements`` looks into the archive only when a range starts
+before the horizon, so recent statements cost nothing extra. On PostgreSQL
+the partition of an archived month (see ``accounts.partitions``) is dropped
+instead of deleting its rows.
+"""
+import csv
+import gzip
+import io
+import itertools
+import logging
+from collections import namedtuple
+from datetime import datetime
+from decimal import Decimal
+from functools import lru_cache
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from . import partitions
+from .models import Payment, PaymentArchive
+from .money import Money
+
+logger = logging.getLogger(__name__)
+
+# Ids per DELETE of archived rows, under SQLite's limit of query parameters
+DELETE_BATCH_SIZE = 500
+
+FIELDS = ('id', 'timestamp', 'amount', 'currency', 'card_type', 'deposit_pending')
+
+# Quacks like a Payment for the statement templates and cursors
+ArchivedPayment = namedtuple('ArchivedPayment', FIELDS)
+
+
+def horizon():
+    """First month that stays in the database."""
+    current = timezone.localdate(timezone=timezone.get_default_timezone()).replace(day=1)
+    return partitions.add_months(current, -settings.BANK_PAYMENT_ARCHIVE_MONTHS)
+
+
+def as_datetime(value):
+    # Statement bounds come as dates, which mean midnight in TIME_ZONE
+    if isinstance(value, datetime):
+        return value
+    return timezone.make_aware(datetime(value.year, value.month, value.day), timezone.get_default_timezone())
+
+
+def month_of(value):
+    return timezone.localtime(as_datetime(value), timezone.get_default_timezone()).date().replace(day=1)
+
+
+def reaches_archive(start):
+    return month_of(start) < horizon()
+
+
+def archives(card, start, end):
+    """Index rows of the card's archived months overlapping [start, end), oldest first."""
+    if not reaches_archive(start):
+        return []
+    return list(PaymentArchive.objects.filter(
+        card=card, month__gte=month_of(start), month__lte=month_of(end),
+    ).order_by('month'))
+
+
+def encode(payments):
+    buffer = io.BytesIO()
+    # mtime=0 keeps the file identical for identical rows
+    with gzip.GzipFile(fileobj=buffer, mode='wb', mtime=0) as compressed, \
+            io.TextIOWrapper(compressed, encoding='utf-8', newline='') as text:
+        writer = csv.writer(text)
+        writer.writerow(FIELDS)
+        for payment in payments:
+            writer.writerow([
+                payment.id, payment.timestamp.isoformat(), payment.amount,
+                payment.currency, payment.card_type, int(payment.deposit_pending),
+            ])
+    return buffer.getvalue()
+
+
+@lru_cache(maxsize=128)
+def read_file(name):
+    # Archive files are never rewritten (a merge writes a new name), caching them per worker is safe
+    with default_storage.open(name, 'rb') as f:
+        reader = csv.reader(io.StringIO(gzip.decompress(f.read()).decode('utf-8')))
+    next(reader)
+    return tuple(
+        ArchivedPayment(int(payment_id), datetime.fromisoformat(timestamp), Decimal(amount),
+                        currency, card_type, deposit_pending == '1')
+        for payment_id, timestamp, amount, currency, card_type, deposit_pending in reader
+    )
+
+
+def read(archive):
+    """The archived payments of one card and month, oldest first."""
+    return read_file(archive.name)
+
+
+def before(payment, bound):
+    # ``statements.source_bound``: an id of None lets the whole timestamp through
+    timestamp, payment_id = bound
+    if payment.timestamp != timestamp:
+        return payment.timestamp < timestamp
+    return payment_id is None or payment.id < payment_id
+
+
+def page_rows(card, start, end, bound, limit):
+    """Up to ``limit`` archived payments of [start, end) before the ``(timestamp, id)`` bound, newest first."""
+    start, end = as_datetime(start), as_datetime(end)
+    rows = []
+    for archive in reversed(archives(card, start, end)):
+        for payment in reversed(read(archive)):
+            if not start <= payment.timestamp < end:
+                continue
+            if bound is not None and not before(payment, bound):
+                continue
+            rows.append(payment)
+            if len(rows) == limit:
+                return rows
+    return rows
+
+
+def totals(card, start, end):
+    start, end = as_datetime(start), as_datetime(end)
+    spent = deposited = Money.zero(card.currency)
+    for archive in archives(card, start, end):
+        month_start = partitions.month_bound(archive.month)
+        month_end = partitions.month_bound(partitions.add_months(archive.month, 1))
+        if start <= month_start and month_end <= end:
+            spent += archive.total_spent
+            deposited += archive.total_deposited
+            continue
+        for payment in read(archive):
+            if start <= payment.timestamp < end:
+                if payment.deposit_pending:
+                    deposited += Money.of(payment.amount, card.currency)
+                else:
+                    spent += Money.of(payment.amount, card.currency)
+    return {'total_spent': spent.amount, 'total_deposited': deposited.amount}
+
+
+def export_rows(card, start, end):
+    """Archived statement rows of [start, end) oldest first, shaped like ``statements.export_rows``."""
+    start, end = as_datetime(start), as_datetime(end)
+    for archive in archives(card, start, end):
+        for payment in read(archive):
+            if start <= payment.timestamp < end:
+                yield payment[1:]
+
+
+def store(card_id, month, payments):
+    # The newest id makes the name unique, a merged month never overwrites the file it replaces
+    name = f"payments/{month:%Y/%m}/{card_id}-{max(payment.id for payment in payments)}.csv.gz"
+    if default_storage.exists(name):
+        # Left by a run that rolled back and could not clean up
+        default_storage.delete(name)
+    return default_storage.save(name, ContentFile(encode(payments)))
+
+
+def archive_month(month):
+    """Move the payments of ``month`` to the archive. Returns how many were moved."""
+    start, end = partitions.month_bound(month), partitions.month_bound(partitions.add_months(month, 1))
+    payments = Payment.objects.filter(timestamp__gte=start, timestamp__lt=end)
+    connection = partitions.payment_connection()
+    partition = partitions.partition_name(month)
+    if not partitions.is_partitioned(connection) or partition not in partitions.partitions(connection):
+        partition = None
+
+    written = []
+    try:
+        with transaction.atomic(using=connection.alias):
+            if partition:
+                # Nothing may land in the month between reading and dropping it
+                with connection.cursor() as cursor:
+                    cursor.execute(f"LOCK TABLE {connection.ops.quote_name(partition)} IN EXCLUSIVE MODE")
+
+            merged = {archive.card_id: archive for archive in PaymentArchive.objects.filter(month=month)}
+            index, archived_ids = [], []
+            rows = payments.order_by('card_id', 'timestamp', 'id').values_list('card_id', 'card__currency', *FIELDS)
+            for (card_id, currency), group in itertools.groupby(rows.iterator(), key=itemgetter(0, 1)):
+                card_payments = [ArchivedPayment(*row[2:]) for row in group]
+                archived_ids += [payment.id for payment in card_payments]
+                if card_id in merged:
+                    # Payments recorded with a timestamp in an already archived month
+                    card_payments = sorted(read(merged[card_id]) + tuple(card_payments), key=itemgetter(1, 0))
+                written.append(store(card_id, month, card_payments))
+                index.append(PaymentArchive(
+                    card_id=card_id, month=month, name=written[-1], rows=len(card_payments),
+                    currency=currency,
+                    total_spent=sum((Money.of(p.amount, currency) for p in card_payments if not p.deposit_pending),
+                                    Money.zero(currency)),
+                    total_deposited=sum((Money.of(p.amount, currency) for p in card_payments if p.deposit_pending),
+                                        Money.zero(currency)),
+                ))
+            moved = len(archived_ids)
+            if not moved:
+                return 0
+
+            PaymentArchive.objects.bulk_create(
+                index, update_conflicts=True, unique_fields=['card', 'month'],
+                update_fields=['name', 'rows', 'currency', 'total_spent', 'total_deposited'],
+            )
+            replaced = [merged[archive.card_id].name for archive in index if archive.card_id in merged]
+            transaction.on_commit(lambda: [default_storage.delete(name) for name in replaced], using=connection.alias)
+
+            if partition:
+                partitions.detach_partition(month, drop=True, connection=connection)
+            else:
+                # Exactly the rows read above: ids are allocated before commit, a row
+                # committed after the read may have a lower id. It waits for the next run.
+                # No per-row signals, the account summaries do not show payments.
+                qn = connection.ops.quote_name
+                with connection.cursor() as cursor:
+                    for offset in range(0, moved, DELETE_BATCH_SIZE):
+                        batch = archived_ids[offset:offset + DELETE_BATCH_SIZE]
+                        cursor.execute(
+                            f"DELETE FROM {qn(Payment._meta.db_table)} "
+                            f"WHERE {qn('id')} IN ({', '.join(['%s'] * len(batch))})",
+                            batch,
+                        )
+    except BaseException:
+        # The index rows are gone with the transaction, so are their files
+        for name in written:
+            default_storage.delete(name)
+        raise
+
+    logger.info(f"Archived {moved} payments of {month:%Y-%m} for {len(index)} cards")
+    return moved
+
+
+def archive_payments():
+    """Archive every month before the horizon that still has payments. Returns how many were moved."""
+    first = Payment.objects.filter(
+        timestamp__lt=partitions.month_bound(horizon()),
+    ).aggregate(first=Min('timestamp'))['first']
+    if first is None:
+        return 0
+
+    moved, month = 0, month_of(first)
+    while month < horizon():
+        moved += archive_month(month)
+        month = partitions.add_months(month, 1)
+    return moved
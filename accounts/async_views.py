@@ -0,0 +1,89 @@
+"""
+``async def`` versions of the busiest account views, served by the ASGI
+application (see ``banking_system.urls_async``).
+
+Plain reads use the async ORM. Form validation, templates and the locking
+write paths stay synchronous and cross a ``sync_to_async`` boundary.
+"""
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.shortcuts import redirect
+
+from core.asyncviews import aget_object_or_404, alogin_required, arender
+from core.idempotency import idempotent
+from core.querybudget import query_budget
+from core.routers import replica_reads
+from .forms import PaymentForm, StatementFilterForm
+from .models import Card
+from .statements import astatement_page, astatement_totals
+from .utils import convert_currency
+from .views import SignUpView, get_usd_exchange_rate, statement_context
+
+
+@query_budget(12)
+@alogin_required
+@idempotent
+async def make_payment(request, card_id=None):
+    card = await aget_object_or_404(Card.objects, id=card_id) if card_id else 1
+
+    if request.method == 'POST':
+        form = PaymentForm(request.user, request.POST)
+        if await sync_to_async(form.is_valid)():
+            amount = form.cleaned_data['amount']
+            selected_card = form.cleaned_data['card']
+
+            card_type = selected_card.card_type
+            if selected_card.currency == 'U':
+                usd_in_rate = await sync_to_async(get_usd_exchange_rate)()
+                converted_amount = convert_currency(amount, 'USD', 'BYN', usd_in_rate)
+            else:
+                converted_amount = amount
+
+            success, message = await sync_to_async(selected_card.make_payment)(converted_amount, card_type)
+
+            if success:
+                messages.success(request, f"{message}")
+            else:
+                messages.error(request, f"{message}")
+            return redirect('accounts:make_payment')
+
+    else:
+        form = PaymentForm(request.user)
+
+    return await arender(request, 'accounts/payment_form.html', {'form': form, 'card': card})
+
+
+@query_budget(8)
+@replica_reads
+@alogin_required
+async def statement(request, card_id):
+    form = StatementFilterForm(request.GET or None)
+    card = await aget_object_or_404(Card.objects, id=card_id)
+    page = totals = None
+
+    if form.is_valid():
+        start_date = form.cleaned_data['start_date']
+        end_date = form.cleaned_data['end_date'] + timedelta(days=1)
+
+        page = await astatement_page(card, start_date, end_date, request.GET.get('cursor'))
+        totals = await astatement_totals(card, start_date, end_date)
+
+    return await arender(request, 'accounts/statement.html', statement_context(request, form, card, page, totals))
+
+
+class AsyncSignUpView(SignUpView):
+    async def get(self, request, *args, **kwargs):
+        form = self.form_class()
+        return await arender(request, self.template_name, {'form': form})
+
+    async def post(self, request, *args, **kwargs):
+        form = self.form_class(request.POST)
+        if await sync_to_async(form.is_valid)():
+            await sync_to_async(self.register)(form)
+            messages.success(request, 'Please Confirm your email to complete registration.')
+
+            return redirect('login')
+
+        return await arender(request, self.template_name, {'form': form})
@@ -0,0 +1,39 @@
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import transaction
+
+from core.routers import use_primary
+
+
+def user_key(user_id):
+    return settings.BANK_USER_CACHE_KEY.format(user_id=user_id)
+
+
+def invalidate(user_id):
+    key = user_key(user_id)
+    cache.delete(key)
+    # Dropped again on commit, a request in between may have cached the old row
+    transaction.on_commit(partial(cache.delete, key))
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend that loads the user of every request from the cache. The
+    cached user is dropped by accounts.signals whenever the row is saved,
+    password changes included.
+    """
+
+    def get_user(self, user_id):
+        key = user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            # A lagging replica could cache the password hash from before a change
+            with use_primary():
+                user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, user, settings.BANK_USER_CACHE_TTL)
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,102 @@
+import secrets
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import F
+
+from . import summary
+from .models import Card, CardNumberSequence, LedgerEntry
+
+SEQUENCE = 'accounts_card_number_seq'
+
+# Serials are spread over the account part of the number by an affine
+# permutation, so consecutive cards do not get consecutive numbers.
+# The multiplier is coprime with 10 ** 9, which keeps the mapping one-to-one.
+ACCOUNT_DIGITS = 9
+ACCOUNT_SPACE = 10 ** ACCOUNT_DIGITS
+MULTIPLIER = 376_041_293
+OFFSET = 518_272_931
+
+
+class CardNumbersExhausted(Exception):
+    pass
+
+
+def luhn_check_digit(payload):
+    total = 0
+    # Doubling starts from the rightmost payload digit, the check digit goes after it
+    for position, digit in enumerate(reversed(payload)):
+        digit = int(digit)
+        if position % 2 == 0:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return str(-total % 10)
+
+
+def is_luhn_valid(number):
+    return number.isdigit() and luhn_check_digit(number[:-1]) == number[-1]
+
+
+def card_number(serial):
+    if not 0 < serial < ACCOUNT_SPACE:
+        raise CardNumbersExhausted(f"Card serial {serial} is out of range")
+    account = (serial * MULTIPLIER + OFFSET) % ACCOUNT_SPACE
+    payload = f"{settings.BANK_CARD_BIN}{account:0{ACCOUNT_DIGITS}d}"
+    return payload + luhn_check_digit(payload)
+
+
+def reserve_serials(count):
+    """
+    Reserve ``count`` unused serials with one round trip.
+
+    PostgreSQL hands them out from a sequence, which never blocks concurrent
+    callers. Other databases take a block from a counter row instead.
+    """
+    using = router.db_for_write(Card)
+    connection = connections[using]
+
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT nextval(%s) FROM generate_series(1, %s)", [SEQUENCE, count])
+            return [row[0] for row in cursor.fetchall()]
+
+    with transaction.atomic(using=using):
+        counter, _ = CardNumberSequence.objects.using(using).select_for_update().get_or_create(name=SEQUENCE)
+        CardNumberSequence.objects.using(using).filter(pk=counter.pk).update(last_value=F('last_value') + count)
+    return list(range(counter.last_value + 1, counter.last_value + count + 1))
+
+
+def generate_cvv():
+    return f"{secrets.randbelow(1000):03d}"
+
+
+def allocate():
+    return card_number(reserve_serials(1)[0])
+
+
+def assign(cards):
+    """Fill in ``account_no`` and ``cvv_code`` of the cards that have none."""
+    missing = [card for card in cards if not card.account_no]
+    for card, serial in zip(missing, reserve_serials(len(missing)) if missing else []):
+        card.account_no = card_number(serial)
+    for card in cards:
+        if not card.cvv_code:
+            card.cvv_code = generate_cvv()
+    return cards
+
+
+def issue_cards(cards, batch_size=None):
+    """
+    Create unsaved ``cards`` with a single ``bulk_create``.
+
+    Numbers are reserved up front, so there are no unique constraint
+    collisions to retry. Opening balances are journaled like ``Card.save`` does.
+    """
+    assign(cards)
+    with transaction.atomic():
+        cards = Card.objects.bulk_create(cards, batch_size=batch_size or settings.BANK_CARD_ISSUE_BATCH_SIZE)
+        LedgerEntry.objects.record_opening_balances([card for card in cards if card.balance])
+        summary.invalidate(*{card.user_id for card in cards})
+    return cards
@@ -33,3 +33,20 @@ PERIOD_DEPOSIT = (
     (WEEK, "WEEK"),
     (DAY, "DAY"),
 )
+
+# Ledger accounts, every journal transaction sums to zero per currency
+CARD_ACCOUNT = 'C'
+DEPOSITS_ACCOUNT = 'D'
+PAYMENTS_ACCOUNT = 'P'
+CREDITS_ACCOUNT = 'L'
+FX_ACCOUNT = 'X'
+OPENING_ACCOUNT = 'O'
+
+LEDGER_ACCOUNT = (
+    (CARD_ACCOUNT, "Card"),
+    (DEPOSITS_ACCOUNT, "Deposits clearing"),
+    (PAYMENTS_ACCOUNT, "Payments clearing"),
+    (CREDITS_ACCOUNT, "Credits"),
+    (FX_ACCOUNT, "Currency exchange"),
+    (OPENING_ACCOUNT, "Opening balances"),
+)
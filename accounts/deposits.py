@@ -0,0 +1,78 @@
+import logging
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+
+from django.contrib.admin.models import LogEntry, CHANGE
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import F, Q
+
+from . import ledger, summary
+from .models import Card
+
+logger = logging.getLogger(__name__)
+
+DepositResult = namedtuple('DepositResult', 'card_id account_no amount currency approved')
+
+
+def pending_deposits():
+    return Card.objects.filter(Q(deposit_pending=True) | Q(pending_deposit_amount__gt=0))
+
+
+def settle_deposits(card_ids, user_id, approve=True, change_message=None):
+    """
+    Approve (or reject) the pending deposits of ``card_ids`` in one transaction.
+
+    The balances move with a single UPDATE, the journal gets one transaction
+    per card in a single INSERT and the admin log rows are bulk created.
+    Cards that are no longer pending are skipped. Returns a ``DepositResult``
+    for every settled card.
+    """
+    with transaction.atomic():
+        cards = list(
+            pending_deposits().select_for_update(of=('self',)).select_related('user')
+            .filter(id__in=card_ids).order_by('id')
+        )
+        if not cards:
+            return []
+
+        results = [
+            DepositResult(card.id, card.account_no, Decimal(card.pending_deposit_amount), card.currency, approve)
+            for card in cards
+        ]
+        ids = [card.id for card in cards]
+
+        if approve:
+            # Balances are moved by the UPDATE below, the journal only records it
+            ledger.post_many(
+                [ledger.deposit_legs(card, result.amount) for card, result in zip(cards, results)],
+                materialize=False,
+            )
+            Card.objects.filter(id__in=ids).update(
+                balance=F('balance') + F('pending_deposit_amount'),
+                pending_deposit_amount=0,
+                deposit_pending=False,
+            )
+        else:
+            Card.objects.filter(id__in=ids).update(pending_deposit_amount=0, deposit_pending=False)
+            summary.invalidate(*{card.user_id for card in cards})
+
+        content_type = ContentType.objects.get_for_model(Card)
+        message = change_message or ('Deposit approved.' if approve else 'Deposit rejected.')
+        LogEntry.objects.bulk_create([
+            LogEntry(
+                user_id=user_id,
+                content_type_id=content_type.id,
+                object_id=str(card.id),
+                object_repr=str(card)[:200],
+                action_flag=CHANGE,
+                change_message=message,
+            )
+            for card in cards
+        ])
+
+    totals = defaultdict(Decimal)
+    for result in results:
+        totals[result.currency] += result.amount
+    logger.info(f"{'Approved' if approve else 'Rejected'} {len(results)} deposits: {dict(totals)}")
+    return results
@@ -124,7 +124,7 @@ class PaymentForm(forms.Form):
     def __init__(self, user, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        user_cards = Card.objects.filter(user=user)
+        user_cards = Card.objects.filter(user=user).select_related('user')
         self.fields['card'].queryset = user_cards
 
     def clean_amount(self):
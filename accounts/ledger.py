@@ -0,0 +1,177 @@
+import uuid
+from collections import namedtuple
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Max, OuterRef, Subquery, Sum, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import summary
+from .constants import CARD_ACCOUNT, DEPOSITS_ACCOUNT
+from .models import BalanceCheckpoint, Card, LedgerEntry
+from .money import Money
+
+Leg = namedtuple('Leg', ['account', 'card', 'amount', 'currency'])
+
+
+def card_leg(card, amount):
+    return Leg(CARD_ACCOUNT, card, amount, card.currency)
+
+
+def system_leg(account, amount, currency):
+    return Leg(account, None, amount, currency)
+
+
+def post(legs, materialize=True):
+    """
+    Append one balanced journal transaction and, unless ``materialize`` is
+    off, apply the card legs to ``Card.balance`` with a single UPDATE.
+
+    Callers moving money are expected to hold the card row locks already.
+    """
+    return post_many([legs], materialize=materialize)
+
+
+def post_many(transactions, materialize=True):
+    """Like ``post`` for several journal transactions, written with one INSERT."""
+    timestamp = timezone.now()
+    entries = []
+    deltas = {}
+
+    for legs in transactions:
+        # Sums and the balance check run on integer minor units
+        legs = [leg._replace(amount=Money.of(leg.amount, leg.currency)) for leg in legs]
+
+        totals = {}
+        for leg in legs:
+            totals[leg.currency] = totals.get(leg.currency, Money.zero(leg.currency)) + leg.amount
+        if any(totals.values()):
+            raise ValueError(f"Unbalanced ledger transaction: {totals}")
+
+        transaction_id = uuid.uuid4()
+        for leg in legs:
+            entries.append(LedgerEntry(
+                transaction_id=transaction_id,
+                account=leg.account,
+                card=leg.card,
+                amount=leg.amount.amount,
+                currency=leg.currency,
+                timestamp=timestamp,
+            ))
+            if leg.card is not None:
+                deltas[leg.card.pk] = deltas.get(leg.card.pk, Money.zero(leg.currency)) + leg.amount
+
+    with transaction.atomic(savepoint=False):
+        LedgerEntry.objects.bulk_create(entries)
+        if materialize:
+            apply_balance_deltas(deltas)
+        # Bulk writes skip the model signals
+        summary.invalidate(*{entry.card.user_id for entry in entries if entry.card is not None})
+
+    return entries
+
+
+def apply_balance_deltas(deltas):
+    deltas = {card_id: delta for card_id, delta in deltas.items() if delta}
+    if not deltas:
+        return 0
+
+    return Card.objects.filter(id__in=deltas).update(
+        balance=Case(
+            *[When(id=card_id, then=F('balance') + delta.amount) for card_id, delta in deltas.items()],
+            default=F('balance'),
+        )
+    )
+
+
+def deposit_legs(card, amount):
+    return [
+        card_leg(card, amount),
+        system_leg(DEPOSITS_ACCOUNT, -amount, card.currency),
+    ]
+
+
+def post_deposit(card, amount, materialize=True):
+    return post(deposit_legs(card, amount), materialize=materialize)
+
+
+def balance_at(card, at):
+    """Balance of ``card`` at ``at`` from the nearest checkpoint plus the journal tail."""
+    checkpoint = BalanceCheckpoint.objects.filter(
+        card=card, timestamp__lte=at
+    ).order_by('-last_entry_id').first()
+
+    entries = LedgerEntry.objects.filter(card=card, timestamp__lte=at)
+    if checkpoint is None:
+        balance = Decimal('0')
+    else:
+        balance = checkpoint.balance
+        entries = entries.filter(id__gt=checkpoint.last_entry_id)
+
+    return balance + (entries.aggregate(total=Sum('amount'))['total'] or 0)
+
+
+def checkpoint_balances(batch_size=None):
+    """
+    Write a checkpoint for every card with journal entries since the last run.
+
+    Money only moves under the card row lock, so while a batch of cards is
+    locked none of their entries is in flight: each card's sum past its
+    previous checkpoint is final, and its later entries get higher ids. An
+    entry that commits after a run started is still past the checkpoint of its
+    own card, ``balance_at`` adds it from the tail.
+    """
+    batch_size = batch_size or settings.BANK_LEDGER_CHECKPOINT_BATCH_SIZE
+    # Only finds the cards worth a checkpoint, the sums do not depend on it
+    watermark = BalanceCheckpoint.objects.aggregate(last=Max('last_entry_id'))['last'] or 0
+    card_ids = list(
+        LedgerEntry.objects.filter(id__gt=watermark, card__isnull=False)
+        .values_list('card', flat=True).distinct().order_by('card')
+    )
+
+    written = 0
+    for offset in range(0, len(card_ids), batch_size):
+        written += checkpoint_cards(card_ids[offset:offset + batch_size])
+    return written
+
+
+def checkpoint_cards(card_ids):
+    with transaction.atomic():
+        card_ids = list(
+            Card.objects.select_for_update().filter(id__in=card_ids).order_by('id').values_list('id', flat=True)
+        )
+
+        latest_ids = BalanceCheckpoint.objects.filter(card__in=card_ids).values('card').annotate(
+            last=Max('id')
+        ).values('last')
+        previous = {
+            checkpoint.card_id: checkpoint
+            for checkpoint in BalanceCheckpoint.objects.filter(id__in=latest_ids)
+        }
+
+        checkpointed = BalanceCheckpoint.objects.filter(card=OuterRef('card')).order_by('-id').values('last_entry_id')[:1]
+        movements = (
+            LedgerEntry.objects.filter(card__in=card_ids)
+            .alias(checkpointed=Coalesce(Subquery(checkpointed), 0))
+            .filter(id__gt=F('checkpointed'))
+            .values('card')
+            .annotate(delta=Sum('amount'), last_entry_id=Max('id'), last_timestamp=Max('timestamp'))
+        )
+
+        checkpoints = []
+        for movement in movements:
+            balance, timestamp = Decimal('0'), movement['last_timestamp']
+            if movement['card'] in previous:
+                balance = previous[movement['card']].balance
+                timestamp = max(timestamp, previous[movement['card']].timestamp)
+            checkpoints.append(BalanceCheckpoint(
+                card_id=movement['card'],
+                balance=balance + movement['delta'],
+                last_entry_id=movement['last_entry_id'],
+                timestamp=timestamp,
+            ))
+
+        BalanceCheckpoint.objects.bulk_create(checkpoints, batch_size=1000)
+    return len(checkpoints)
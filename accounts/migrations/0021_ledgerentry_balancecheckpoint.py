@@ -0,0 +1,63 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:51
+
+import uuid
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def record_opening_balances(apps, schema_editor):
+    # Existing balances predate the journal, give each one an opening transaction
+    Card = apps.get_model('accounts', 'Card')
+    LedgerEntry = apps.get_model('accounts', 'LedgerEntry')
+
+    entries = []
+    for card in Card.objects.exclude(balance=0).only('id', 'balance', 'currency').iterator():
+        transaction_id = uuid.uuid4()
+        entries += [
+            LedgerEntry(transaction_id=transaction_id, account='C', card_id=card.id,
+                        amount=card.balance, currency=card.currency),
+            LedgerEntry(transaction_id=transaction_id, account='O',
+                        amount=-card.balance, currency=card.currency),
+        ]
+    LedgerEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0020_alter_card_card_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_id', models.UUIDField(db_index=True)),
+                ('account', models.CharField(choices=[('C', 'Card'), ('D', 'Deposits clearing'), ('P', 'Payments clearing'), ('L', 'Credits'), ('X', 'Currency exchange'), ('O', 'Opening balances')], max_length=1)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('currency', models.CharField(choices=[('U', 'USD'), ('B', 'BYN')], max_length=1)),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('card', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='accounts.card')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['card', 'id'], name='ledger_card_id_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BalanceCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('last_entry_id', models.BigIntegerField()),
+                ('timestamp', models.DateTimeField()),
+                ('card', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_checkpoints', to='accounts.card')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['card', 'timestamp'], name='checkpoint_card_ts_idx')],
+            },
+        ),
+        migrations.RunPython(record_opening_balances, migrations.RunPython.noop),
+    ]
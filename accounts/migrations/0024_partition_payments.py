@@ -0,0 +1,128 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:10
+
+from datetime import date, datetime
+
+from django.db import migrations
+from django.utils import timezone
+
+COLUMNS = 'id, amount, currency, card_type, card_id, "timestamp", deposit_pending'
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_of(value):
+    return timezone.localtime(value, timezone.get_default_timezone()).date().replace(day=1)
+
+
+def month_bound(month):
+    return timezone.make_aware(datetime(month.year, month.month, 1), timezone.get_default_timezone())
+
+
+def partition_payments(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute("ALTER TABLE accounts_payment RENAME TO accounts_payment_unpartitioned")
+    schema_editor.execute("ALTER INDEX payment_card_ts_id_idx RENAME TO payment_card_ts_id_idx_unpartitioned")
+    schema_editor.execute(
+        "ALTER TABLE accounts_payment_unpartitioned RENAME CONSTRAINT accounts_payment_pkey "
+        "TO accounts_payment_unpartitioned_pkey"
+    )
+    # The partition key has to be part of the primary key, ids stay unique through the identity
+    schema_editor.execute("""
+        CREATE TABLE accounts_payment (
+            id bigint GENERATED BY DEFAULT AS IDENTITY,
+            amount numeric(12, 2) NOT NULL,
+            currency varchar(1) NOT NULL,
+            card_type varchar(1) NOT NULL,
+            card_id bigint NOT NULL,
+            "timestamp" timestamp with time zone NOT NULL,
+            deposit_pending boolean NOT NULL,
+            PRIMARY KEY (id, "timestamp")
+        ) PARTITION BY RANGE ("timestamp")
+    """)
+    schema_editor.execute(
+        "ALTER TABLE accounts_payment ADD CONSTRAINT accounts_payment_card_id_fk_accounts_card_id "
+        "FOREIGN KEY (card_id) REFERENCES accounts_card (id) DEFERRABLE INITIALLY DEFERRED"
+    )
+    # Leads with card_id, so it serves the foreign key too
+    schema_editor.execute('CREATE INDEX payment_card_ts_id_idx ON accounts_payment (card_id, "timestamp", id)')
+    schema_editor.execute("CREATE TABLE accounts_payment_default PARTITION OF accounts_payment DEFAULT")
+
+    # Months holding rows up to the current one, the months ahead are created by
+    # the create_payment_partitions task (accounts.partitions)
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('SELECT MIN("timestamp"), MAX("timestamp") FROM accounts_payment_unpartitioned')
+        first, last = cursor.fetchone()
+    current = timezone.localdate(timezone=timezone.get_default_timezone()).replace(day=1)
+    month = month_of(first) if first else current
+    last = max(month_of(last), current) if last else current
+    while month <= last:
+        schema_editor.execute(
+            f"CREATE TABLE accounts_payment_p{month:%Y_%m} PARTITION OF accounts_payment "
+            "FOR VALUES FROM (%s) TO (%s)",
+            [month_bound(month), month_bound(add_months(month, 1))],
+        )
+        month = add_months(month, 1)
+
+    schema_editor.execute(
+        f"INSERT INTO accounts_payment ({COLUMNS}) SELECT {COLUMNS} FROM accounts_payment_unpartitioned"
+    )
+    schema_editor.execute(
+        "SELECT setval(pg_get_serial_sequence('accounts_payment', 'id'), COALESCE(MAX(id), 0) + 1, false) "
+        "FROM accounts_payment"
+    )
+    schema_editor.execute("DROP TABLE accounts_payment_unpartitioned")
+
+
+def unpartition_payments(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute("ALTER TABLE accounts_payment RENAME TO accounts_payment_partitioned")
+    schema_editor.execute("ALTER INDEX payment_card_ts_id_idx RENAME TO payment_card_ts_id_idx_partitioned")
+    schema_editor.execute(
+        "ALTER TABLE accounts_payment_partitioned RENAME CONSTRAINT accounts_payment_pkey "
+        "TO accounts_payment_partitioned_pkey"
+    )
+    schema_editor.execute("""
+        CREATE TABLE accounts_payment (
+            id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+            amount numeric(12, 2) NOT NULL,
+            currency varchar(1) NOT NULL,
+            card_type varchar(1) NOT NULL,
+            card_id bigint NOT NULL,
+            "timestamp" timestamp with time zone NOT NULL,
+            deposit_pending boolean NOT NULL
+        )
+    """)
+    schema_editor.execute(
+        f"INSERT INTO accounts_payment ({COLUMNS}) SELECT {COLUMNS} FROM accounts_payment_partitioned"
+    )
+    schema_editor.execute(
+        "SELECT setval(pg_get_serial_sequence('accounts_payment', 'id'), COALESCE(MAX(id), 0) + 1, false) "
+        "FROM accounts_payment"
+    )
+    # Dropping the parent drops every attached partition
+    schema_editor.execute("DROP TABLE accounts_payment_partitioned")
+    # The names Django gave the foreign key and its index in 0001
+    schema_editor.execute(
+        "ALTER TABLE accounts_payment ADD CONSTRAINT accounts_payment_card_id_8cdcb5d9_fk_accounts_card_id "
+        "FOREIGN KEY (card_id) REFERENCES accounts_card (id) DEFERRABLE INITIALLY DEFERRED"
+    )
+    schema_editor.execute("CREATE INDEX accounts_payment_card_id_8cdcb5d9 ON accounts_payment (card_id)")
+    schema_editor.execute('CREATE INDEX payment_card_ts_id_idx ON accounts_payment (card_id, "timestamp", id)')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0023_cardnumbersequence'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_payments, unpartition_payments),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0024_partition_payments'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('name', models.CharField(max_length=255)),
+                ('rows', models.PositiveIntegerField()),
+                ('total_spent', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('total_deposited', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('card', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payment_archives', to='accounts.card')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='paymentarchive',
+            constraint=models.UniqueConstraint(fields=('card', 'month'), name='paymentarchive_card_month_uniq'),
+        ),
+    ]
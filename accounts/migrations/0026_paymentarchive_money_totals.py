@@ -0,0 +1,78 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:20
+
+from decimal import Decimal
+
+import accounts.money
+from django.db import migrations, models
+
+
+def to_minor_units(apps, schema_editor):
+    PaymentArchive = apps.get_model('accounts', 'PaymentArchive')
+    for archive in PaymentArchive.objects.select_related('card'):
+        archive.currency = archive.card.currency or 'B'
+        archive.total_spent_minor = int(archive.total_spent * 100)
+        archive.total_deposited_minor = int(archive.total_deposited * 100)
+        archive.save(update_fields=['currency', 'total_spent_minor', 'total_deposited_minor'])
+
+
+def to_major_units(apps, schema_editor):
+    PaymentArchive = apps.get_model('accounts', 'PaymentArchive')
+    for archive in PaymentArchive.objects.all():
+        archive.total_spent = Decimal(archive.total_spent_minor).scaleb(-2)
+        archive.total_deposited = Decimal(archive.total_deposited_minor).scaleb(-2)
+        archive.save(update_fields=['total_spent', 'total_deposited'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0025_paymentarchive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paymentarchive',
+            name='currency',
+            field=models.CharField(choices=[('U', 'USD'), ('B', 'BYN')], default='B', max_length=1),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='paymentarchive',
+            name='total_spent_minor',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='paymentarchive',
+            name='total_deposited_minor',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(to_minor_units, to_major_units),
+        migrations.RemoveField(
+            model_name='paymentarchive',
+            name='total_spent',
+        ),
+        migrations.RemoveField(
+            model_name='paymentarchive',
+            name='total_deposited',
+        ),
+        migrations.RenameField(
+            model_name='paymentarchive',
+            old_name='total_spent_minor',
+            new_name='total_spent',
+        ),
+        migrations.RenameField(
+            model_name='paymentarchive',
+            old_name='total_deposited_minor',
+            new_name='total_deposited',
+        ),
+        migrations.AlterField(
+            model_name='paymentarchive',
+            name='total_spent',
+            field=accounts.money.MoneyField(currency_field='currency'),
+        ),
+        migrations.AlterField(
+            model_name='paymentarchive',
+            name='total_deposited',
+            field=accounts.money.MoneyField(currency_field='currency'),
+        ),
+    ]
@@ -1,5 +1,5 @@
 
-import random
+import uuid
 
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
@@ -8,8 +8,9 @@ from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 from django.db import models, transaction
 
-from .constants import CURRENCY, CARD_TYPE
+from .constants import CURRENCY, CARD_TYPE, LEDGER_ACCOUNT, CARD_ACCOUNT, OPENING_ACCOUNT, PAYMENTS_ACCOUNT
 from .managers import UserManager
+from .money import Money, MoneyField, round_amount
 
 
 class User(AbstractUser):
@@ -70,47 +71,70 @@ class Card(models.Model):
     currency = models.CharField(max_length=1, choices=CURRENCY)
 
     def save(self, *args, **kwargs):
+        from .cardnumbers import assign
+
         # Generate values for some fields
-        if not self.account_no:
-            self.account_no = ''.join(str(random.randint(0, 9)) for _ in range(16))
-        if not self.cvv_code:
-            self.cvv_code = random.randint(100, 999)
+        assign([self])
 
-        super().save(*args, **kwargs)
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            # A card created with money on it gets a matching opening entry in the journal
+            if adding and self.balance:
+                LedgerEntry.objects.record_opening_balances([self])
 
     def make_payment(self, amount, card_type):
+        from .ledger import card_leg, post, system_leg
 
-        if card_type == 'C':
-            if not self.is_deposit_allowed:
-                return False, "Deposit not allowed for credits card"
-            elif self.balance < amount:
-                return False, "Insufficient funds for credits card payment"
-        elif card_type == 'D':
-            if self.balance < amount:
-                return False, "Insufficient funds for debit card"
-        else:
+        amount = Money.of(amount, self.currency)
+
+        if card_type not in ('C', 'D'):
             return False, "Invalid card type"
+        if card_type == 'C' and not self.is_deposit_allowed:
+            return False, "Deposit not allowed for credits card"
 
         # Perform the payment transaction
         with transaction.atomic():
+            balance = Money.of(
+                Card.objects.select_for_update().values_list('balance', flat=True).get(pk=self.pk), self.currency,
+            )
+
+            if balance < amount:
+                if card_type == 'C':
+                    return False, "Insufficient funds for credits card payment"
+                return False, "Insufficient funds for debit card"
+
             # Create a Payment record
-            payment = Payment.objects.create(
+            Payment.objects.create(
                 card=self,
-                amount=amount,
+                amount=amount.amount,
                 currency='B',
                 card_type=card_type,
             )
 
-            # Update the card balance
-            self.balance -= amount
-            self.save()
+            # The card balance is updated by the journal posting
+            post([
+                card_leg(self, -amount),
+                system_leg(PAYMENTS_ACCOUNT, amount, self.currency),
+            ])
 
+        self.balance = (balance - amount).amount
         return True, "Payment successful"
 
     def __str__(self):
         return f"{self.user.first_name} {self.user.last_name}- {self.card_name} {self.balance} {self.currency}"
 
 
+class CardNumberSequence(models.Model):
+    """Card number serial counter for databases without sequences."""
+    name = models.CharField(max_length=50, unique=True)
+    last_value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_value}"
+
+
 class Payment(models.Model):
     card = models.ForeignKey(
         Card,
@@ -126,8 +150,128 @@ class Payment(models.Model):
     timestamp = models.DateTimeField(default=timezone.now)
     deposit_pending = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Statements filter one card by time and page by (timestamp, id)
+            models.Index(fields=['card', 'timestamp', 'id'], name='payment_card_ts_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.card_id} - {self.amount} {self.currency} ({self.timestamp})"
+
+
+class PaymentArchive(models.Model):
+    """The payments of one card and month, moved out of the database into a gzip CSV file."""
+    card = models.ForeignKey(
+        Card,
+        related_name='payment_archives',
+        on_delete=models.CASCADE,
+    )
+    # First day of the month in TIME_ZONE
+    month = models.DateField()
+    name = models.CharField(max_length=255)  # default_storage name of the file
+    rows = models.PositiveIntegerField()
+    # Currency of the card, the statement shows every amount in it
+    currency = models.CharField(max_length=1, choices=CURRENCY)
+    # Statement totals of the whole month, a statement covering it does not open the file
+    total_spent = MoneyField(currency_field='currency')
+    total_deposited = MoneyField(currency_field='currency')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['card', 'month'], name='paymentarchive_card_month_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.card_id} - {self.month:%Y-%m} ({self.rows})"
+
+
+class LedgerEntryQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        raise TypeError("Ledger entries are append-only")
+
+    def delete(self):
+        raise TypeError("Ledger entries are append-only")
+
+    def record_opening_balances(self, cards):
+        entries = []
+        for card in cards:
+            transaction_id = uuid.uuid4()
+            amount = round_amount(card.balance, card.currency)
+            entries += [
+                LedgerEntry(transaction_id=transaction_id, account=CARD_ACCOUNT, card=card,
+                            amount=amount, currency=card.currency),
+                LedgerEntry(transaction_id=transaction_id, account=OPENING_ACCOUNT,
+                            amount=-amount, currency=card.currency),
+            ]
+        return self.bulk_create(entries)
+
+
+class LedgerEntry(models.Model):
+    """
+    One signed line of the double-entry journal. Entries are only ever inserted,
+    the entries of a single ``transaction_id`` sum to zero per currency and
+    ``Card.balance`` is the running projection of the card account lines.
+    """
+    transaction_id = models.UUIDField(db_index=True)
+    account = models.CharField(max_length=1, choices=LEDGER_ACCOUNT)
+    card = models.ForeignKey(
+        Card,
+        related_name='ledger_entries',
+        # Deleting a card keeps its lines, the journal must still balance
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    amount = models.DecimalField(
+        max_digits=12,
+        decimal_places=2
+    )
+    currency = models.CharField(max_length=1, choices=CURRENCY)
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    objects = LedgerEntryQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['card', 'id'], name='ledger_card_id_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise TypeError("Ledger entries are append-only")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise TypeError("Ledger entries are append-only")
+
+    def __str__(self):
+        return f"{self.get_account_display()} {self.card_id or ''} {self.amount} {self.currency}"
+
+
+class BalanceCheckpoint(models.Model):
+    """Card balance covering every journal entry up to ``last_entry_id``."""
+    card = models.ForeignKey(
+        Card,
+        related_name='balance_checkpoints',
+        on_delete=models.CASCADE,
+    )
+    balance = models.DecimalField(
+        max_digits=12,
+        decimal_places=2
+    )
+    last_entry_id = models.BigIntegerField()
+    # Latest timestamp among the covered entries
+    timestamp = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['card', 'timestamp'], name='checkpoint_card_ts_idx'),
+        ]
+
     def __str__(self):
-        return f"{self.card.id} - {self.amount} {self.currency} ({self.timestamp})"
+        return f"{self.card_id} - {self.balance} ({self.timestamp})"
 
 
 #  Class for create of Money Box
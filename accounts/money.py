@@ -0,0 +1,242 @@
+"""
+Money as integer minor units (kopecks, cents) of one currency.
+
+``Money`` adds, subtracts and compares plain integers, so totals are exact
+and cheap. Decimal only appears at the edges: when an amount comes in
+(``Money.of``), when it is multiplied or converted at a rate, and when it is
+shown. Those operations run in ``CONTEXT``, a local decimal context, never
+in the thread's global one.
+
+``MoneyField`` stores the minor units in a BIGINT column.
+"""
+from decimal import ROUND_HALF_EVEN, Context, Decimal, localcontext
+
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+from .constants import BYN, USD
+
+# Digits after the point of each currency
+MINOR_UNITS = {BYN: 2, USD: 2}
+
+# Half to even, the rounding the journal has always used for cents
+CONTEXT = Context(prec=28, rounding=ROUND_HALF_EVEN)
+
+
+def to_decimal(value):
+    """An amount as Decimal. Floats go through their shortest repr, so 0.1 stays 0.1."""
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, Money):
+        return value.amount
+    if isinstance(value, float):
+        return Decimal(repr(value))
+    if isinstance(value, (int, str)) and not isinstance(value, bool):
+        return Decimal(value)
+    raise TypeError(f"Cannot use {type(value).__name__} as an amount")
+
+
+def minor_units(currency):
+    # Cards saved without a currency still get cents
+    return MINOR_UNITS.get(currency, 2)
+
+
+def round_amount(value, currency=BYN, rounding=None):
+    """``value`` rounded to the minor unit of ``currency``, as Decimal."""
+    exponent = Decimal(1).scaleb(-minor_units(currency))
+    return to_decimal(value).quantize(exponent, rounding=rounding, context=CONTEXT)
+
+
+class Money:
+    __slots__ = ('minor', 'currency')
+
+    def __init__(self, minor, currency):
+        if not isinstance(minor, int) or isinstance(minor, bool):
+            raise TypeError(f"Money takes integer minor units, got {type(minor).__name__}")
+        object.__setattr__(self, 'minor', minor)
+        object.__setattr__(self, 'currency', currency)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Money is immutable")
+
+    @classmethod
+    def of(cls, amount, currency, rounding=None):
+        """Money from an amount in major units (Decimal, int, str or float)."""
+        if isinstance(amount, Money):
+            amount.check(currency)
+            return amount
+        value = round_amount(amount, currency, rounding)
+        return cls(int(value.scaleb(minor_units(currency), context=CONTEXT)), currency)
+
+    @classmethod
+    def zero(cls, currency):
+        return cls(0, currency)
+
+    @property
+    def amount(self):
+        """The amount in major units, as exact Decimal."""
+        return Decimal(self.minor).scaleb(-minor_units(self.currency), context=CONTEXT)
+
+    def check(self, currency):
+        if self.currency != currency:
+            raise ValueError(f"Cannot mix {self.currency} and {currency} money")
+
+    def __add__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        other.check(self.currency)
+        return Money(self.minor + other.minor, self.currency)
+
+    def __radd__(self, other):
+        # sum() starts from 0
+        if other == 0:
+            return self
+        return NotImplemented
+
+    def __sub__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        other.check(self.currency)
+        return Money(self.minor - other.minor, self.currency)
+
+    def __neg__(self):
+        return Money(-self.minor, self.currency)
+
+    def __abs__(self):
+        return Money(abs(self.minor), self.currency)
+
+    def __mul__(self, factor):
+        if isinstance(factor, int) and not isinstance(factor, bool):
+            return Money(self.minor * factor, self.currency)
+        if isinstance(factor, Decimal):
+            return self.multiply(factor)
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def multiply(self, factor, rounding=None):
+        with localcontext(CONTEXT):
+            return Money.of(self.amount * to_decimal(factor), self.currency, rounding)
+
+    def __bool__(self):
+        return self.minor != 0
+
+    def __eq__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        return self.minor == other.minor and self.currency == other.currency
+
+    def __hash__(self):
+        return hash((self.minor, self.currency))
+
+    def compare(self, other):
+        if not isinstance(other, Money):
+            raise TypeError(f"Cannot compare Money with {type(other).__name__}")
+        other.check(self.currency)
+        return self.minor - other.minor
+
+    def __lt__(self, other):
+        return self.compare(other) < 0
+
+    def __le__(self, other):
+        return self.compare(other) <= 0
+
+    def __gt__(self, other):
+        return self.compare(other) > 0
+
+    def __ge__(self, other):
+        return self.compare(other) >= 0
+
+    def __str__(self):
+        return str(self.amount)
+
+    def __format__(self, spec):
+        return format(self.amount, spec)
+
+    def __repr__(self):
+        return f"Money('{self.amount}', {self.currency!r})"
+
+    def __reduce__(self):
+        return Money, (self.minor, self.currency)
+
+
+def convert(money, currency, rate, rounding=None):
+    """
+    ``money`` in ``currency`` at ``rate``, the BYN price of one USD like the
+    rates in ``accounts.rates``.
+    """
+    if money.currency == currency:
+        return money
+    rate = to_decimal(rate)
+    with localcontext(CONTEXT):
+        if money.currency == USD:
+            amount = money.amount * rate
+        else:
+            amount = money.amount / rate
+    return Money.of(amount, currency, rounding)
+
+
+class MoneyAttribute(DeferredAttribute):
+    """Keeps the minor units on the instance and hands out ``Money``."""
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        minor = super().__get__(instance, cls)
+        if minor is None:
+            return None
+        return Money(minor, self.field.currency_of(instance))
+
+    def __set__(self, instance, value):
+        if isinstance(value, Money):
+            # The currency column may not be set yet while the model is initialised
+            currency = self.field.currency_of(instance)
+            if currency:
+                value.check(currency)
+            value = value.minor
+        instance.__dict__[self.field.attname] = value
+
+
+class MoneyField(models.BigIntegerField):
+    """
+    Money in a BIGINT column of minor units. The currency is fixed by
+    ``currency`` or read from the ``currency_field`` of the same row.
+
+    Queries take ``Money`` or integer minor units, aggregates return minor units.
+    """
+    descriptor_class = MoneyAttribute
+
+    def __init__(self, *args, currency=None, currency_field=None, **kwargs):
+        if (currency is None) == (currency_field is None):
+            raise ValueError("MoneyField needs either currency or currency_field")
+        self.currency = currency
+        self.currency_field = currency_field
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.currency is not None:
+            kwargs['currency'] = self.currency
+        else:
+            kwargs['currency_field'] = self.currency_field
+        return name, path, args, kwargs
+
+    def currency_of(self, instance):
+        return self.currency or instance.__dict__.get(self.currency_field)
+
+    def get_prep_value(self, value):
+        if isinstance(value, Money):
+            value = value.minor
+        elif isinstance(value, (Decimal, float)):
+            # Ambiguous between major and minor units
+            raise TypeError(f"{self.name} takes Money or integer minor units, got {value!r}")
+        return super().get_prep_value(value)
+
+    def to_python(self, value):
+        if isinstance(value, Money):
+            return value.minor
+        return super().to_python(value)
+
+    def value_from_object(self, obj):
+        # Forms and serializers see the minor units
+        return obj.__dict__.get(self.attname)
@@ -0,0 +1,118 @@
+"""
+Monthly range partitions of the payment table (PostgreSQL only).
+
+Since migration 0024 ``accounts_payment`` is partitioned by ``timestamp``,
+one partition per month of TIME_ZONE plus a default partition that catches
+anything outside them. Statement queries always bound the timestamp, so
+PostgreSQL only scans the months they cover, and an old month is dropped
+by detaching its partition instead of a huge DELETE.
+
+``ensure_partitions`` creates the coming months ahead of time (celery beat
+runs it daily). Rows that already landed in the default partition for such
+a month are moved into the new partition.
+"""
+import logging
+from datetime import date, datetime
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from .models import Payment
+
+logger = logging.getLogger(__name__)
+
+TABLE = Payment._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"{TABLE}_p{month:%Y_%m}"
+
+
+def month_bound(month):
+    # Months of the bank's time zone, a statement for a calendar month reads one partition
+    return timezone.make_aware(datetime(month.year, month.month, 1), timezone.get_default_timezone())
+
+
+def payment_connection():
+    return connections[router.db_for_write(Payment)]
+
+
+def is_partitioned(connection=None):
+    connection = connection or payment_connection()
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [TABLE])
+        return cursor.fetchone() is not None
+
+
+def partitions(connection=None):
+    """Names of the attached partitions, the default one included."""
+    connection = connection or payment_connection()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass ORDER BY c.relname",
+            [TABLE],
+        )
+        return [name for name, in cursor.fetchall()]
+
+
+def create_partition(connection, month):
+    name = partition_name(month)
+    start, end = month_bound(month), month_bound(add_months(month, 1))
+    qn = connection.ops.quote_name
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(f"CREATE TABLE {qn(name)} (LIKE {qn(TABLE)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {qn(DEFAULT_PARTITION)} "
+            f"WHERE {qn('timestamp')} >= %s AND {qn('timestamp')} < %s RETURNING *) "
+            f"INSERT INTO {qn(name)} SELECT * FROM moved",
+            [start, end],
+        )
+        if cursor.rowcount:
+            logger.info(f"Moved {cursor.rowcount} payments from {DEFAULT_PARTITION} to {name}")
+        cursor.execute(f"ALTER TABLE {qn(TABLE)} ATTACH PARTITION {qn(name)} FOR VALUES FROM (%s) TO (%s)",
+                       [start, end])
+    return name
+
+
+def ensure_partitions(months_ahead=None, start=None, connection=None):
+    """
+    Create the missing monthly partitions from ``start`` (the current month by
+    default) to ``months_ahead`` months after the current one. Returns their names.
+    """
+    connection = connection or payment_connection()
+    if not is_partitioned(connection):
+        return []
+    if months_ahead is None:
+        months_ahead = settings.BANK_PAYMENT_PARTITIONS_AHEAD
+
+    current = timezone.localdate(timezone=timezone.get_default_timezone()).replace(day=1)
+    month = (start or current).replace(day=1)
+    existing = set(partitions(connection))
+    created = []
+    while month <= add_months(current, months_ahead):
+        if partition_name(month) not in existing:
+            created.append(create_partition(connection, month))
+        month = add_months(month, 1)
+    return created
+
+
+def detach_partition(month, drop=False, connection=None):
+    """Take a month out of the payment table, it stays a plain table unless ``drop``."""
+    connection = connection or payment_connection()
+    name = partition_name(month)
+    qn = connection.ops.quote_name
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {qn(TABLE)} DETACH PARTITION {qn(name)}")
+        if drop:
+            cursor.execute(f"DROP TABLE {qn(name)}")
+    return name
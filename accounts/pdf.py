@@ -0,0 +1,68 @@
+class TextPDFWriter:
+    """
+    Minimal PDF writer for plain text pages.
+
+    Pages are written to ``fileobj`` as soon as they fill up, so only the
+    object offsets stay in memory, however many lines are written.
+    """
+    LINES_PER_PAGE = 64
+    FONT_SIZE = 9
+    LEADING = 12
+
+    def __init__(self, fileobj):
+        self.file = fileobj
+        self.offsets = {}
+        self.page_ids = []
+        self.lines = []
+        # 1 is the catalog and 2 the page tree, both written last
+        self.next_id = 3
+        self.file.write(b'%PDF-1.4\n')
+        self.font_id = self._write_object(b'<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>')
+
+    def _write_object(self, body, object_id=None):
+        if object_id is None:
+            object_id = self.next_id
+            self.next_id += 1
+        self.offsets[object_id] = self.file.tell()
+        self.file.write(f'{object_id} 0 obj\n'.encode() + body + b'\nendobj\n')
+        return object_id
+
+    @staticmethod
+    def _escape(line):
+        line = line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+        return line.encode('latin-1', 'replace')
+
+    def write_line(self, line):
+        self.lines.append(line)
+        if len(self.lines) == self.LINES_PER_PAGE:
+            self._flush_page()
+
+    def _flush_page(self):
+        text = b''.join(b'(' + self._escape(line) + b') Tj T*\n' for line in self.lines)
+        stream = (
+            f'BT /F1 {self.FONT_SIZE} Tf {self.LEADING} TL 40 800 Td\n'.encode() + text + b'ET'
+        )
+        content_id = self._write_object(
+            f'<< /Length {len(stream)} >>\nstream\n'.encode() + stream + b'\nendstream'
+        )
+        page_id = self._write_object(
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] '
+            f'/Resources << /Font << /F1 {self.font_id} 0 R >> >> /Contents {content_id} 0 R >>'.encode()
+        )
+        self.page_ids.append(page_id)
+        self.lines = []
+
+    def close(self):
+        if self.lines or not self.page_ids:
+            self._flush_page()
+
+        kids = ' '.join(f'{page_id} 0 R' for page_id in self.page_ids)
+        self._write_object(f'<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>'.encode(), 2)
+        self._write_object(b'<< /Type /Catalog /Pages 2 0 R >>', 1)
+
+        xref_offset = self.file.tell()
+        size = self.next_id
+        self.file.write(f'xref\n0 {size}\n0000000000 65535 f \n'.encode())
+        for object_id in range(1, size):
+            self.file.write(f'{self.offsets[object_id]:010d} 00000 n \n'.encode())
+        self.file.write(f'trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n'.encode())
@@ -0,0 +1,117 @@
+import logging
+import time
+from decimal import InvalidOperation
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+from .money import to_decimal
+
+logger = logging.getLogger(__name__)
+
+
+class RatesUnavailable(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Failure counter kept in the shared cache so every worker sees the same state.
+
+    The counter is only reset by a success, so once the breaker has tripped a
+    single failed probe after the cooldown opens it again straight away.
+    """
+
+    def __init__(self, name, threshold_setting, cooldown_setting):
+        self.failures_key = f'{name}_breaker_failures'
+        self.open_key = f'{name}_breaker_open'
+        self.threshold_setting = threshold_setting
+        self.cooldown_setting = cooldown_setting
+
+    # Read on every use, so override_settings and changed configuration apply
+    @property
+    def threshold(self):
+        return getattr(settings, self.threshold_setting)
+
+    @property
+    def cooldown(self):
+        return getattr(settings, self.cooldown_setting)
+
+    def is_open(self):
+        return cache.get(self.open_key) is not None
+
+    def record_success(self):
+        cache.delete_many([self.failures_key, self.open_key])
+
+    def record_failure(self):
+        cache.add(self.failures_key, 0, None)
+        failures = cache.incr(self.failures_key)
+        if failures >= self.threshold:
+            cache.set(self.open_key, time.time(), self.cooldown)
+        return failures
+
+
+breaker = CircuitBreaker(
+    'fx_rates',
+    threshold_setting='BANK_FX_BREAKER_THRESHOLD',
+    cooldown_setting='BANK_FX_BREAKER_COOLDOWN',
+)
+
+
+def fetch_rates():
+    response = requests.get(settings.BANK_FX_RATES_URL, timeout=settings.BANK_FX_RATES_TIMEOUT)
+    response.raise_for_status()
+    data = response.json()
+
+    # Belarusbank returns one entry per branch, the first one is the head office
+    if not isinstance(data, list) or not data:
+        raise RatesUnavailable("Unexpected exchange rate payload")
+
+    try:
+        return {
+            code: to_decimal(data[0][code])
+            for code in ('USD_in', 'USD_out')
+            if code in data[0]
+        }
+    except (InvalidOperation, TypeError) as e:
+        raise RatesUnavailable(f"Malformed exchange rate: {e}")
+
+
+def refresh_rates():
+    if breaker.is_open():
+        logger.warning("Exchange rate refresh skipped, circuit breaker is open")
+        return None
+
+    try:
+        rates = fetch_rates()
+        if 'USD_in' not in rates:
+            raise RatesUnavailable("USD_in rate missing from payload")
+    except (requests.RequestException, ValueError, RatesUnavailable) as e:
+        failures = breaker.record_failure()
+        logger.warning(f"Exchange rate refresh failed ({failures} in a row): {e}")
+        return None
+
+    breaker.record_success()
+    # Keep the entry well past its freshness window so readers can serve it stale
+    cache.set(
+        settings.BANK_FX_RATES_CACHE_KEY,
+        {'rates': rates, 'fetched_at': time.time()},
+        settings.BANK_FX_RATES_STALE_TTL,
+    )
+    return rates
+
+
+def get_rate(code='USD_in'):
+    entry = cache.get(settings.BANK_FX_RATES_CACHE_KEY)
+    if entry is None or code not in entry['rates']:
+        return to_decimal(settings.BANK_FX_DEFAULT_USD_RATE)
+
+    age = time.time() - entry['fetched_at']
+    if age > settings.BANK_FX_RATES_TTL:
+        logger.info(f"Serving stale exchange rate ({int(age)}s old)")
+    return entry['rates'][code]
+
+
+def get_usd_rate():
+    return get_rate('USD_in')
@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from credits.models import Credit
+from . import backends, summary
+from .models import Card, Payment, SavingsGoal, User
+
+
+@receiver([post_save, post_delete], sender=Card)
+@receiver([post_save, post_delete], sender=Credit)
+@receiver([post_save, post_delete], sender=SavingsGoal)
+def invalidate_owner_summary(sender, instance, **kwargs):
+    summary.invalidate(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Payment)
+def invalidate_card_owner_summary(sender, instance, **kwargs):
+    # The card is nearly always loaded already, otherwise only its owner id is fetched
+    card = Payment._meta.get_field('card').get_cached_value(instance, None)
+    if card is not None:
+        summary.invalidate(card.user_id)
+    elif instance.card_id is not None:
+        summary.invalidate(*Card.objects.filter(id=instance.card_id).values_list('user_id', flat=True))
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    backends.invalidate(instance.pk)
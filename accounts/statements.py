@@ -0,0 +1,249 @@
+import base64
+import binascii
+import csv
+import hashlib
+from collections import namedtuple
+from datetime import datetime
+from heapq import merge
+from operator import attrgetter, itemgetter
+
+from asgiref.sync import sync_to_async
+from django.db.models import Max, Q, Sum
+from django.utils import timezone
+
+from . import archive
+from .models import Payment
+from .money import round_amount
+from .pdf import TextPDFWriter
+
+PAGE_SIZE = 50
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_HEADER = ['timestamp', 'amount', 'currency', 'card_type', 'deposit_pending']
+
+# Payments and transfers are numbered by different sequences, rows of one
+# timestamp are ordered by their source first and only then by id
+PAYMENT, TRANSFER = 'p', 't'
+
+# A transfer shaped like a Payment for the statement templates and cursors
+TransferRow = namedtuple('TransferRow', archive.FIELDS)
+
+
+def source_of(row):
+    return TRANSFER if isinstance(row, TransferRow) else PAYMENT
+
+
+def sort_key(row):
+    return row.timestamp, source_of(row), row.id
+
+
+def encode_cursor(row, source=None):
+    raw = f"{row.timestamp.isoformat()}|{source or source_of(row)}|{row.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """The ``(timestamp, source, id)`` position of ``cursor``, ``None`` when there is none."""
+    if not cursor:
+        return None
+    try:
+        timestamp, source, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        if source not in (PAYMENT, TRANSFER):
+            return None
+        return datetime.fromisoformat(timestamp), source, int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def source_bound(position, source):
+    """
+    ``position`` as a ``(timestamp, id)`` bound on the rows of ``source``. An
+    id of ``None`` lets every row of the timestamp through, 0 none of them.
+    """
+    if position is None:
+        return None
+    timestamp, position_source, row_id = position
+    if source < position_source:
+        return timestamp, None
+    if source > position_source:
+        return timestamp, 0
+    return timestamp, row_id
+
+
+def keyset(queryset, position, source):
+    """The rows of ``queryset``, all from ``source``, that follow ``position`` newest first."""
+    bound = source_bound(position, source)
+    if bound is None:
+        return queryset
+    timestamp, row_id = bound
+    # The timestamp bound keeps this an index range scan
+    queryset = queryset.filter(timestamp__lte=timestamp)
+    if row_id is None:
+        return queryset
+    return queryset.filter(Q(timestamp__lt=timestamp) | Q(id__lt=row_id))
+
+
+def statement_queryset(card, start, end):
+    # Half-open range, matches the (card_id, timestamp, id) index
+    return Payment.objects.filter(card=card, timestamp__gte=start, timestamp__lt=end)
+
+
+TOTALS = {
+    'total_spent': Sum('amount', filter=Q(deposit_pending=False)),
+    'total_deposited': Sum('amount', filter=Q(deposit_pending=True)),
+}
+
+
+def add_archived_totals(card, start, end, totals):
+    for name, value in archive.totals(card, start, end).items():
+        totals[name] += value
+    return totals
+
+
+def add_transfer_totals(totals, transfers):
+    return {name: (value or 0) + (transfers[name] or 0) for name, value in totals.items()}
+
+
+def statement_totals(card, start, end):
+    """
+    Both statement totals from a conditional aggregation of the payments and
+    one of the transfers, plus the archived months.
+    """
+    # transactions.history builds on this module
+    from transactions import history
+
+    totals = statement_queryset(card, start, end).aggregate(**TOTALS)
+    transfers = history.totals_queryset(card, start, end).aggregate(**history.totals(card))
+    totals = add_transfer_totals(totals, transfers)
+    if archive.reaches_archive(start):
+        totals = add_archived_totals(card, start, end, totals)
+    return totals
+
+
+async def astatement_totals(card, start, end):
+    from transactions import history
+
+    totals = await statement_queryset(card, start, end).aaggregate(**TOTALS)
+    transfers = await history.totals_queryset(card, start, end).aaggregate(**history.totals(card))
+    totals = add_transfer_totals(totals, transfers)
+    if archive.reaches_archive(start):
+        totals = await sync_to_async(add_archived_totals)(card, start, end, totals)
+    return totals
+
+
+def page_queryset(card, start, end, cursor=None, page_size=PAGE_SIZE):
+    payments = keyset(statement_queryset(card, start, end), decode_cursor(cursor), PAYMENT)
+
+    # One extra row tells whether there is a following page
+    return payments.order_by('-timestamp', '-id')[:page_size + 1]
+
+
+def needs_archive(rows, start, page_size):
+    # Archived months are older than the database rows, only a page that runs out reads them
+    return len(rows) <= page_size and archive.reaches_archive(start)
+
+
+def add_archived_rows(card, start, end, cursor, rows, page_size):
+    limit = page_size + 1
+    archived = archive.page_rows(card, start, end, source_bound(decode_cursor(cursor), PAYMENT), limit)
+    return sorted(rows + archived, key=attrgetter('timestamp', 'id'), reverse=True)[:limit]
+
+
+def transfer_queryset(card, start, end, cursor=None, page_size=PAGE_SIZE):
+    from transactions import history
+
+    return history.history_queryset(card, cursor, page_size, start, end)
+
+
+def transfer_row(card, row):
+    transfer_id, timestamp, direction, card_amount, counterparty = row
+    # Sent transfers count as spent, received ones as money in, like the deposits
+    return TransferRow(transfer_id, timestamp, round_amount(abs(card_amount), card.currency), card.currency,
+                       card.card_type, direction == 'received')
+
+
+def add_transfer_rows(card, rows, transfers, page_size):
+    # Transfers are never archived, they may be older than the archived payments
+    rows = rows + [transfer_row(card, row) for row in transfers]
+    return sorted(rows, key=sort_key, reverse=True)[:page_size + 1]
+
+
+def split_page(rows, page_size=PAGE_SIZE):
+    next_cursor = encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+    return rows[:page_size], next_cursor
+
+
+def statement_page(card, start, end, cursor=None, page_size=PAGE_SIZE):
+    """
+    One page of payments and transfers, newest first, continuing after ``cursor``.
+
+    Returns the rows and the cursor of the following page (``None`` on the last page).
+    """
+    rows = list(page_queryset(card, start, end, cursor, page_size))
+    if needs_archive(rows, start, page_size):
+        rows = add_archived_rows(card, start, end, cursor, rows, page_size)
+    rows = add_transfer_rows(card, rows, transfer_queryset(card, start, end, cursor, page_size), page_size)
+    return split_page(rows, page_size)
+
+
+async def astatement_page(card, start, end, cursor=None, page_size=PAGE_SIZE):
+    rows = [payment async for payment in page_queryset(card, start, end, cursor, page_size)]
+    if needs_archive(rows, start, page_size):
+        rows = await sync_to_async(add_archived_rows)(card, start, end, cursor, rows, page_size)
+    transfers = [row async for row in transfer_queryset(card, start, end, cursor, page_size)]
+    rows = add_transfer_rows(card, rows, transfers, page_size)
+    return split_page(rows, page_size)
+
+
+def export_rows(card, start, end, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Statement rows oldest first: the archived months, the database payments
+    and the transfers, merged by time. The database is read through server-side cursors.
+    """
+    from transactions import history
+
+    rows = statement_queryset(card, start, end).order_by('timestamp', 'id').values_list(
+        'timestamp', 'amount', 'currency', 'card_type', 'deposit_pending'
+    ).iterator(chunk_size=chunk_size)
+    transfers = (
+        transfer_row(card, row)[1:]
+        for row in history.range_queryset(card, start, end).iterator(chunk_size=chunk_size)
+    )
+    return merge(archive.export_rows(card, start, end), rows, transfers, key=itemgetter(0))
+
+
+class Echo:
+    # csv.writer only needs write(), returning the line lets us yield it
+    def write(self, value):
+        return value
+
+
+def stream_csv(card, start, end):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_HEADER)
+    for timestamp, amount, currency, card_type, deposit_pending in export_rows(card, start, end):
+        yield writer.writerow([timestamp.isoformat(), amount, currency, card_type, deposit_pending])
+
+
+def export_name(card, start, end, extension):
+    """
+    Storage name of a rendered export. The newest payment and transfer ids in
+    the range are part of the key, so a range that gains rows gets a fresh file.
+    """
+    from transactions import history
+
+    last_id = statement_queryset(card, start, end).aggregate(last=Max('id'))['last']
+    last_transfer_id = history.totals_queryset(card, start, end).aggregate(last=Max('id'))['last']
+    key = f"{card.id}:{start.isoformat()}:{end.isoformat()}:{last_id}:{last_transfer_id}"
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return f"statements/{card.id}/{digest[:32]}.{extension}"
+
+
+def write_pdf(fileobj, card, start, end):
+    pdf = TextPDFWriter(fileobj)
+    pdf.write_line(f"Statement {card.card_name} ({card.account_no})")
+    pdf.write_line(f"{start:%Y-%m-%d} - {end:%Y-%m-%d}")
+    pdf.write_line('')
+    for timestamp, amount, currency, card_type, deposit_pending in export_rows(card, start, end):
+        sign = '+' if deposit_pending else '-'
+        pdf.write_line(f"{timezone.localtime(timestamp):%Y-%m-%d %H:%M:%S}  {sign}{amount:>12} {currency}")
+    pdf.close()
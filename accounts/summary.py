@@ -0,0 +1,57 @@
+from collections import defaultdict
+from decimal import Decimal
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.routers import use_primary
+from credits.models import Credit
+from .models import Card, SavingsGoal
+
+
+def summary_key(user_id):
+    return settings.BANK_ACCOUNT_SUMMARY_KEY.format(user_id=user_id)
+
+
+def build_summary(user_id):
+    cards = list(Card.objects.filter(user_id=user_id).order_by('id'))
+    balances = defaultdict(Decimal)
+    for card in cards:
+        balances[card.get_currency_display()] += card.balance
+
+    return {
+        'cards': cards,
+        'balances': dict(balances),
+        'credits': list(Credit.objects.filter(user_id=user_id, status='APPROVED').order_by('id')),
+        'savings_goals': list(SavingsGoal.objects.filter(user_id=user_id, approved=True).order_by('id')),
+    }
+
+
+def get_summary(user):
+    """
+    Cards, balances by currency, active credits and approved savings goals
+    of ``user``, served from the cache after the first build.
+    """
+    key = summary_key(user.pk)
+    summary = cache.get(key)
+    if summary is None:
+        # A lagging replica would put balances from before the last write in the cache
+        with use_primary():
+            summary = build_summary(user.pk)
+        cache.set(key, summary, settings.BANK_ACCOUNT_SUMMARY_TTL)
+
+    # Cached instances get the request user back, so Card.__str__ does not query
+    for obj in summary['cards'] + summary['credits'] + summary['savings_goals']:
+        obj._meta.get_field('user').set_cached_value(obj, user)
+    return summary
+
+
+def invalidate(*user_ids):
+    keys = [summary_key(user_id) for user_id in set(user_ids) if user_id is not None]
+    if not keys:
+        return
+    cache.delete_many(keys)
+    # Dropped again on commit, a summary rebuilt meanwhile may still hold the old rows
+    transaction.on_commit(partial(cache.delete_many, keys))
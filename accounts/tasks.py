@@ -1,44 +1,98 @@
+import tempfile
+from datetime import date
+
 from celery import shared_task
-from django.contrib.admin.models import LogEntry, CHANGE
-from django.contrib.contenttypes.models import ContentType
-from django.utils import timezone
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
 
-from banking_system import settings
+from core import routers, sharding
+from . import archive, deposits, ledger, partitions, rates, statements
+from .constants import CREDITS_ACCOUNT
 from .models import Card
 
 
+def credit_cards_in_debt():
+    return Card.objects.filter(card_type='C', balance__lt=0)
+
+
+@sharding.sharded_job('accounts.settle_credit_cards', queryset=credit_cards_in_debt)
+def settle_credit_cards(lo, hi):
+    settled = 0
+    for credit_card in credit_cards_in_debt().filter(id__range=(lo, hi)):
+        # Проверка и погашение задолженности для каждой кредитной карты(временно)
+        with transaction.atomic():
+            credit_card = Card.objects.select_for_update().get(id=credit_card.id)
+            if credit_card.balance < 0:
+                ledger.post([
+                    ledger.card_leg(credit_card, -credit_card.balance),
+                    ledger.system_leg(CREDITS_ACCOUNT, credit_card.balance, credit_card.currency),
+                ])
+                settled += 1
+    return settled
+
+
 @shared_task
 def check_credit_card_payments():
     # Эту функцию нужно будет вызывать из celery beat в начале каждого месяца
-    current_month = timezone.now().month
-    credit_cards = Card.objects.filter(card_type='C')
+    return {'sharded_job_run': sharding.dispatch('accounts.settle_credit_cards')}
 
-    for credit_card in credit_cards:
-        # Проверка и погашение задолженности для каждой кредитной карты(временно)
-        if credit_card.balance < 0 and credit_card.last_payment_month != current_month:
-            credit_card.balance = 0
-            credit_card.last_payment_month = current_month
-            credit_card.save()
+
+def cards_with_pending_deposits():
+    return deposits.pending_deposits().filter(is_deposit_allowed=True, pending_deposit_amount__gt=0)
+
+
+@sharding.sharded_job('accounts.apply_pending_deposits', queryset=cards_with_pending_deposits)
+def apply_pending_deposits(lo, hi, user_id):
+    processed = 0
+    while True:
+        # Settled cards stop matching, so every batch starts from the front of the range
+        card_ids = list(
+            cards_with_pending_deposits().filter(id__range=(lo, hi))
+            .order_by('id').values_list('id', flat=True)[:settings.BANK_DEPOSIT_BATCH_SIZE]
+        )
+        if not card_ids:
+            return processed
+        processed += len(deposits.settle_deposits(card_ids, user_id, change_message='Manual deposit processed.'))
 
 
 @shared_task
 def process_pending_deposits(user_id):
-    # Get cards with pending deposits
-    cards = Card.objects.filter(is_deposit_allowed=True, pending_deposit_amount__gt=0)
-
-    for card in cards:
-        # Process the deposit and update the balance
-        card.balance += card.pending_deposit_amount
-        card.pending_deposit_amount = 0
-        card.save()
-
-        # Log the deposit in the admin panel
-        content_type = ContentType.objects.get_for_model(card)
-        LogEntry.objects.create(
-            user_id=user_id,  # Use the appropriate user ID
-            content_type_id=content_type.id,
-            object_id=card.id,
-            object_repr=str(card),
-            action_flag=CHANGE,
-            change_message='Manual deposit processed.'
-        )
+    return {'sharded_job_run': sharding.dispatch('accounts.apply_pending_deposits', user_id=user_id)}
+
+
+@shared_task
+def refresh_fx_rates():
+    rates.refresh_rates()
+
+
+@shared_task
+def checkpoint_ledger_balances():
+    return ledger.checkpoint_balances()
+
+
+@shared_task
+def create_payment_partitions():
+    return partitions.ensure_partitions()
+
+
+@shared_task
+def archive_old_payments():
+    return archive.archive_payments()
+
+
+@shared_task
+def build_statement_pdf(card_id, start, end):
+    card = Card.objects.get(id=card_id)
+    start, end = date.fromisoformat(start), date.fromisoformat(end)
+
+    name = statements.export_name(card, start, end, 'pdf')
+    if not default_storage.exists(name):
+        # Rendered to a temporary file so memory use does not depend on the row count
+        with tempfile.TemporaryFile() as pdf:
+            with routers.use_replica():
+                statements.write_pdf(pdf, card, start, end)
+            pdf.seek(0)
+            default_storage.save(name, File(pdf))
+    return name
@@ -0,0 +1,159 @@
+import tempfile
+import unittest
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.files.storage import default_storage
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts import archive, partitions
+from accounts.models import Card, Payment, PaymentArchive, User
+from accounts.money import Money
+from accounts.statements import statement_page, statement_totals
+from accounts.tasks import archive_old_payments
+
+
+def months_ago(count):
+    return partitions.add_months(timezone.localdate().replace(day=1), -count)
+
+
+@override_settings(BANK_PAYMENT_ARCHIVE_MONTHS=2)
+class PaymentArchiveTest(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.addCleanup(archive.read_file.cache_clear)
+        storage = self.settings(MEDIA_ROOT=media.name)
+        storage.enable()
+        self.addCleanup(storage.disable)
+
+        self.user = User.objects.create_user(email='testuser@gmail.com', password='testpass')
+        self.card = Card.objects.create(user=self.user, currency='B', balance=1000)
+        self.other = Card.objects.create(user=self.user, currency='U', balance=1000)
+        for months in (5, 4, 1):
+            start = partitions.month_bound(months_ago(months))
+            Payment.objects.bulk_create([
+                Payment(card=self.card, amount=Decimal(i), currency='B', card_type='D', deposit_pending=i % 3 == 0,
+                        timestamp=start + timedelta(days=i % 20, hours=i))
+                for i in range(1, 31)
+            ])
+        Payment.objects.create(card=self.other, amount=Decimal('7'), timestamp=partitions.month_bound(months_ago(4)))
+        self.start = partitions.month_bound(months_ago(6))
+        self.end = timezone.now() + timedelta(days=1)
+
+    def pages(self, start, end):
+        seen, cursor = [], None
+        while True:
+            rows, cursor = statement_page(self.card, start, end, cursor, page_size=7)
+            seen += [row.id for row in rows]
+            if cursor is None:
+                return seen
+
+    def test_old_months_move_to_files(self):
+        self.assertEqual(archive_old_payments(), 61)
+
+        self.assertEqual(Payment.objects.count(), 30)
+        index = PaymentArchive.objects.filter(card=self.card).order_by('month')
+        self.assertEqual([(a.month, a.rows) for a in index], [(months_ago(5), 30), (months_ago(4), 30)])
+        self.assertEqual(index[0].total_deposited, Money.of(sum(range(3, 31, 3)), 'B'))
+        self.assertEqual(PaymentArchive.objects.get(card=self.other).total_spent, Money.of(7, 'U'))
+        self.assertTrue(default_storage.exists(index[0].name))
+        self.assertEqual(archive.archive_payments(), 0)
+
+    def test_statements_read_the_archive_transparently(self):
+        ids = self.pages(self.start, self.end)
+        totals = statement_totals(self.card, self.start, self.end)
+        middle = partitions.month_bound(months_ago(4)) + timedelta(days=10)
+        partial = statement_totals(self.card, self.start, middle)
+
+        archive.archive_payments()
+
+        self.assertEqual(len(ids), 90)
+        self.assertEqual(self.pages(self.start, self.end), ids)
+        self.assertEqual(statement_totals(self.card, self.start, self.end), totals)
+        self.assertEqual(statement_totals(self.card, self.start, middle), partial)
+
+    def test_recent_statement_does_not_look_into_the_archive(self):
+        archive.archive_payments()
+
+        # The payment and the transfer aggregates
+        with self.assertNumQueries(2):
+            totals = statement_totals(self.card, partitions.month_bound(months_ago(1)), self.end)
+
+        self.assertEqual(totals['total_spent'] + totals['total_deposited'], sum(range(1, 31)))
+
+    def test_views(self):
+        archive.archive_payments()
+        self.client.login(email='testuser@gmail.com', password='testpass')
+        month = months_ago(5)
+        params = {
+            'start_date_year': month.year, 'start_date_month': month.month, 'start_date_day': 1,
+            'end_date_year': month.year, 'end_date_month': month.month, 'end_date_day': 28,
+        }
+
+        response = self.client.get(reverse('accounts:card_history', kwargs={'card_id': self.card.id}), params)
+        self.assertEqual(len(response.context['regular_payments']) + len(response.context['pending_deposits']), 30)
+        self.assertEqual(response.context['total_deposited'], sum(Decimal(i) for i in range(3, 31, 3)))
+
+        response = self.client.get(reverse('accounts:card_history_csv', kwargs={'card_id': self.card.id}), params)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 31)
+
+    def test_late_payment_is_merged_into_the_month(self):
+        archive.archive_payments()
+        first = PaymentArchive.objects.get(card=self.card, month=months_ago(5))
+        late = Payment.objects.create(card=self.card, amount=Decimal('100'),
+                                      timestamp=partitions.month_bound(months_ago(5)) + timedelta(days=25))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(archive.archive_payments(), 1)
+
+        merged = PaymentArchive.objects.get(card=self.card, month=months_ago(5))
+        self.assertEqual(merged.rows, 31)
+        self.assertEqual(merged.total_spent, first.total_spent + Money.of(100, 'B'))
+        self.assertEqual(archive.read(merged)[-1].id, late.id)
+        self.assertFalse(default_storage.exists(first.name))
+
+    def test_rows_committed_after_the_read_stay(self):
+        # A payment that took its id before the archived ones but committed after the read
+        late = Payment.objects.filter(card=self.card, timestamp__lt=partitions.month_bound(months_ago(4))).first()
+        late_id = late.id
+        late.delete()
+        late.id = late_id
+        store = archive.store
+
+        def commit_late(card_id, month, payments):
+            if not Payment.objects.filter(id=late.id).exists():
+                Payment.objects.bulk_create([late])
+            return store(card_id, month, payments)
+
+        with mock.patch.object(archive.partitions, 'is_partitioned', return_value=False), \
+                mock.patch.object(archive, 'store', side_effect=commit_late):
+            self.assertEqual(archive.archive_month(months_ago(5)), 29)
+
+        self.assertEqual(list(Payment.objects.filter(timestamp__lt=partitions.month_bound(months_ago(4)))), [late])
+        self.assertEqual(PaymentArchive.objects.get(card=self.card, month=months_ago(5)).rows, 29)
+
+    def test_failed_run_leaves_no_files(self):
+        with mock.patch.object(PaymentArchive.objects, 'bulk_create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                archive.archive_month(months_ago(5))
+
+        self.assertEqual(Payment.objects.count(), 91)
+        self.assertEqual(default_storage.listdir(f"payments/{months_ago(5):%Y/%m}")[1], [])
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', "payments are partitioned on PostgreSQL only")
+    def test_partition_of_an_archived_month_is_dropped(self):
+        partitions.ensure_partitions(start=months_ago(6))
+        connection.check_constraints()
+
+        archive.archive_payments()
+
+        names = partitions.partitions()
+        self.assertNotIn(partitions.partition_name(months_ago(5)), names)
+        self.assertIn(partitions.partition_name(months_ago(2)), names)
+        self.assertEqual(Payment.objects.count(), 30)
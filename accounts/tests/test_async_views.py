@@ -0,0 +1,73 @@
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import Card, Payment
+from core import outbox
+
+User = get_user_model()
+
+
+@override_settings(ROOT_URLCONF='banking_system.urls_async')
+class AsyncViewsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='testuser@example.com', password='testpass')
+        self.card = Card.objects.create(user=self.user, card_type='D', currency='B', balance=100)
+        self.other = Card.objects.create(user=self.user, card_type='D', currency='B', balance=0)
+        self.async_client.force_login(self.user)
+
+    async def test_payment(self):
+        response = await self.async_client.post(reverse('accounts:make_payment'),
+                                                {'card': self.card.id, 'amount': '30'},
+                                                headers={'Idempotency-Key': 'abc'})
+        retry = await self.async_client.post(reverse('accounts:make_payment'),
+                                             {'card': self.card.id, 'amount': '30'},
+                                             headers={'Idempotency-Key': 'abc'})
+
+        self.assertRedirects(response, reverse('accounts:make_payment'), fetch_redirect_response=False)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        card = await Card.objects.aget(id=self.card.id)
+        self.assertEqual(card.balance, Decimal('70'))
+        self.assertEqual(await Payment.objects.filter(card=self.card).acount(), 1)
+
+    async def test_payment_requires_login(self):
+        response = await self.async_client_class().get(reverse('accounts:make_payment'))
+
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('next=', response['Location'])
+
+    async def test_card_to_card_transfer(self):
+        response = await self.async_client.post(reverse('transactions:fund_transfer_card_by_card'),
+                                                {'card_one': self.card.id, 'card_two': self.other.id,
+                                                 'amount': '25'})
+
+        self.assertRedirects(response, reverse('accounts:card_list'), fetch_redirect_response=False)
+        other = await Card.objects.aget(id=self.other.id)
+        self.assertEqual(other.balance, Decimal('25'))
+
+    async def test_statement(self):
+        await Payment.objects.acreate(card=self.card, amount=Decimal('5'), currency='B', card_type='D')
+
+        response = await self.async_client.get(reverse('accounts:card_history', args=[self.card.id]),
+                                               {'start_date': '2000-01-01', 'end_date': '2100-01-01'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['regular_payments']), 1)
+        self.assertEqual(response.context['total_spent'], Decimal('5'))
+
+    async def test_signup_sends_email(self):
+        response = await self.async_client_class().post(reverse('signup'), {
+            'email': 'new@example.com', 'password1': 'Str0ng-pass-123', 'password2': 'Str0ng-pass-123',
+        })
+
+        self.assertRedirects(response, reverse('login'), fetch_redirect_response=False)
+        self.assertTrue(await User.objects.filter(email='new@example.com').aexists())
+        # Sent by the outbox drain, not by the request
+        self.assertEqual(len(mail.outbox), 0)
+        await sync_to_async(outbox.drain)()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['new@example.com'])
@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from accounts.backends import CachedModelBackend
+from accounts.models import Card, User
+
+
+class CachedModelBackendTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='testuser@example.com', password='testpass')
+        self.backend = CachedModelBackend()
+
+    def test_cache_hit_runs_no_queries(self):
+        self.backend.get_user(self.user.pk)
+
+        with self.assertNumQueries(0):
+            user = self.backend.get_user(self.user.pk)
+        self.assertEqual(user, self.user)
+
+    def test_save_invalidates(self):
+        self.backend.get_user(self.user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = 'Ivan'
+            self.user.save()
+
+        self.assertEqual(self.backend.get_user(self.user.pk).first_name, 'Ivan')
+
+    def test_inactive_and_missing_users(self):
+        self.backend.get_user(self.user.pk)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        cache.clear()
+
+        self.assertIsNone(self.backend.get_user(self.user.pk))
+        self.assertIsNone(self.backend.get_user(self.user.pk + 100))
+
+    def test_authenticated_page_skips_session_and_user_queries(self):
+        Card.objects.create(user=self.user, card_type='D', currency='B', balance=100)
+        self.client.login(email='testuser@example.com', password='testpass')
+        self.client.get(reverse('accounts:card_list'))
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('accounts:card_list'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_password_change_ends_other_sessions(self):
+        self.client.login(email='testuser@example.com', password='testpass')
+        self.assertEqual(self.client.get(reverse('accounts:card_list')).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('newpass')
+            self.user.save()
+
+        response = self.client.get(reverse('accounts:card_list'))
+        self.assertEqual(response.status_code, 302)
@@ -0,0 +1,68 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from accounts import cardnumbers
+from accounts.models import Card, LedgerEntry
+
+User = get_user_model()
+
+
+class CardNumberTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='testuser@example.com', password='testpass')
+
+    def test_luhn(self):
+        self.assertTrue(cardnumbers.is_luhn_valid('4539148803436467'))
+        self.assertFalse(cardnumbers.is_luhn_valid('4539148803436468'))
+        self.assertEqual(cardnumbers.luhn_check_digit('7992739871'), '3')
+
+    def test_numbers_are_unique_and_valid(self):
+        numbers = {cardnumbers.card_number(serial) for serial in range(1, 5001)}
+
+        self.assertEqual(len(numbers), 5000)
+        self.assertTrue(all(len(number) == 16 and cardnumbers.is_luhn_valid(number) for number in numbers))
+
+    def test_serial_out_of_range(self):
+        with self.assertRaises(cardnumbers.CardNumbersExhausted):
+            cardnumbers.card_number(cardnumbers.ACCOUNT_SPACE)
+
+    def test_save_allocates_number_and_cvv(self):
+        card = Card.objects.create(user=self.user, card_type='D', currency='B')
+
+        self.assertTrue(cardnumbers.is_luhn_valid(card.account_no))
+        self.assertRegex(card.cvv_code, r'^\d{3}$')
+
+    def test_reserved_serials_do_not_repeat(self):
+        first = cardnumbers.reserve_serials(3)
+        second = cardnumbers.reserve_serials(2)
+
+        self.assertEqual(len(set(first + second)), 5)
+
+    def test_bulk_issue(self):
+        cards = cardnumbers.issue_cards([
+            Card(user=self.user, card_type='D', currency='B', balance=10 if i % 2 else 0)
+            for i in range(200)
+        ])
+
+        self.assertEqual(Card.objects.count(), 200)
+        self.assertEqual(len({card.account_no for card in cards}), 200)
+        self.assertEqual(
+            LedgerEntry.objects.filter(card__isnull=False).aggregate(total=Sum('amount'))['total'], Decimal('1000')
+        )
+
+    def test_bulk_issue_query_count_does_not_grow(self):
+        cardnumbers.reserve_serials(1)
+
+        counts = []
+        for size in (10, 50):
+            cards = [Card(user=self.user, card_type='D', currency='B', balance=5) for _ in range(size)]
+            with CaptureQueriesContext(connection) as queries:
+                cardnumbers.issue_cards(cards)
+            counts.append(len(queries))
+
+        self.assertEqual(counts[0], counts[1])
@@ -0,0 +1,100 @@
+from decimal import Decimal
+
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Sum
+from django.test import TestCase
+from django.urls import reverse
+
+from accounts.deposits import settle_deposits
+from accounts.models import Card, LedgerEntry
+from accounts.tasks import apply_pending_deposits
+
+User = get_user_model()
+
+
+class SettleDepositsTest(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(email='staff@example.com', password='testpass', is_staff=True)
+        self.user = User.objects.create_user(email='testuser@example.com', password='testpass')
+        self.cards = [
+            Card.objects.create(user=self.user, balance=100, currency='B', deposit_pending=True,
+                                pending_deposit_amount=10 * (i + 1))
+            for i in range(5)
+        ]
+        self.ids = [card.id for card in self.cards]
+
+    def test_approves_every_selected_card(self):
+        results = settle_deposits(self.ids, self.staff.id)
+
+        self.assertEqual([result.amount for result in results], [Decimal(10 * (i + 1)) for i in range(5)])
+        for card in Card.objects.filter(id__in=self.ids).order_by('id'):
+            self.assertFalse(card.deposit_pending)
+            self.assertEqual(card.pending_deposit_amount, 0)
+            self.assertEqual(
+                LedgerEntry.objects.filter(card=card).aggregate(total=Sum('amount'))['total'], card.balance
+            )
+        self.assertEqual(Card.objects.get(id=self.ids[-1]).balance, Decimal('150'))
+        self.assertEqual(LogEntry.objects.filter(user=self.staff, change_message='Deposit approved.').count(), 5)
+
+    def test_reject_clears_pending_without_moving_money(self):
+        results = settle_deposits(self.ids[:2], self.staff.id, approve=False)
+
+        self.assertEqual(len(results), 2)
+        self.assertFalse(any(result.approved for result in results))
+        card = Card.objects.get(id=self.ids[0])
+        self.assertEqual(card.balance, Decimal('100'))
+        self.assertFalse(card.deposit_pending)
+
+    def test_settled_cards_are_skipped(self):
+        settle_deposits(self.ids[:3], self.staff.id)
+
+        results = settle_deposits(self.ids, self.staff.id)
+
+        self.assertEqual([result.card_id for result in results], self.ids[3:])
+        self.assertEqual(Card.objects.get(id=self.ids[0]).balance, Decimal('110'))
+
+    def test_query_count_does_not_grow_with_selection(self):
+        ContentType.objects.get_for_model(Card)
+
+        # Lock, journal insert, balance update, log insert, savepoint pair
+        with self.assertNumQueries(6):
+            settle_deposits(self.ids, self.staff.id)
+
+    def test_task_settles_range_in_batches(self):
+        with self.settings(BANK_DEPOSIT_BATCH_SIZE=2):
+            processed = apply_pending_deposits(self.ids[0], self.ids[-1], user_id=self.staff.id)
+
+        self.assertEqual(processed, 5)
+        self.assertFalse(Card.objects.filter(id__in=self.ids, pending_deposit_amount__gt=0).exists())
+
+
+class DepositBulkApprovalViewTest(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(email='staff@example.com', password='testpass', is_staff=True)
+        self.user = User.objects.create_user(email='testuser@example.com', password='testpass')
+        self.cards = [
+            Card.objects.create(user=self.user, balance=0, deposit_pending=True, pending_deposit_amount=20)
+            for _ in range(3)
+        ]
+        self.client.force_login(self.staff)
+
+    def test_bulk_approve_selected(self):
+        response = self.client.post(reverse('accounts:deposit_bulk_approval'), {
+            'card_ids': [self.cards[0].id, self.cards[1].id],
+            'action': 'approve',
+        })
+
+        self.assertRedirects(response, reverse('accounts:deposit_approval_list'))
+        self.assertEqual(
+            list(Card.objects.order_by('id').values_list('balance', flat=True)),
+            [Decimal('20'), Decimal('20'), Decimal('0')],
+        )
+
+    def test_list_is_paginated(self):
+        with self.settings(BANK_DEPOSIT_APPROVAL_PAGE_SIZE=2):
+            response = self.client.get(reverse('accounts:deposit_approval_list'), {'page': 2})
+
+        self.assertEqual(len(response.context['pending_deposit_cards']), 1)
+        self.assertContains(response, 'name="card_ids"', count=1)
@@ -0,0 +1,118 @@
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db.models import Max, Sum
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts import ledger
+from accounts.constants import CARD_ACCOUNT, DEPOSITS_ACCOUNT
+from accounts.models import BalanceCheckpoint, Card, LedgerEntry
+from accounts.money import Money
+
+User = get_user_model()
+
+
+class LedgerTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='testuser@example.com', password='testpass')
+        self.card = Card.objects.create(user=self.user, card_type='D', currency='B', balance=100)
+
+    def journal_balance(self, card):
+        return LedgerEntry.objects.filter(card=card).aggregate(total=Sum('amount'))['total']
+
+    def test_opening_balance_is_journaled(self):
+        self.assertEqual(self.journal_balance(self.card), Decimal('100'))
+        self.assertEqual(LedgerEntry.objects.aggregate(total=Sum('amount'))['total'], 0)
+
+    def test_post_updates_materialized_balance(self):
+        ledger.post_deposit(self.card, Decimal('25.50'))
+
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.balance, Decimal('125.50'))
+        self.assertEqual(self.journal_balance(self.card), self.card.balance)
+
+    def test_unbalanced_transaction_is_rejected(self):
+        with self.assertRaises(ValueError):
+            ledger.post([ledger.card_leg(self.card, Decimal('10'))])
+        self.assertEqual(LedgerEntry.objects.filter(account=DEPOSITS_ACCOUNT).count(), 0)
+
+    def test_legs_are_summed_in_minor_units(self):
+        ledger.post([
+            ledger.card_leg(self.card, Money.of('0.10', 'B')),
+            ledger.card_leg(self.card, 0.2),
+            ledger.system_leg(DEPOSITS_ACCOUNT, Decimal('-0.3'), 'B'),
+        ])
+
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.balance, Decimal('100.30'))
+        with self.assertRaises(ValueError):
+            ledger.post([
+                ledger.card_leg(self.card, Money.of(1, 'U')),
+                ledger.system_leg(DEPOSITS_ACCOUNT, Money.of(-1, 'U'), 'U'),
+            ])
+
+    def test_entries_are_append_only(self):
+        entry = LedgerEntry.objects.filter(card=self.card).first()
+        with self.assertRaises(TypeError):
+            entry.save()
+        with self.assertRaises(TypeError):
+            entry.delete()
+        with self.assertRaises(TypeError):
+            LedgerEntry.objects.filter(card=self.card).update(amount=0)
+
+    def test_make_payment_is_journaled(self):
+        success, _ = self.card.make_payment(Decimal('40'), 'D')
+
+        self.assertTrue(success)
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.balance, Decimal('60'))
+        self.assertEqual(self.journal_balance(self.card), Decimal('60'))
+
+    def test_balance_at_uses_checkpoint_and_tail(self):
+        ledger.post_deposit(self.card, Decimal('50'))
+        self.assertEqual(ledger.checkpoint_balances(), 1)
+        checkpoint = BalanceCheckpoint.objects.get(card=self.card)
+        self.assertEqual(checkpoint.balance, Decimal('150'))
+
+        ledger.post_deposit(self.card, Decimal('5'))
+        now = timezone.now()
+
+        # One checkpoint read plus a tail aggregate, never a full replay
+        with self.assertNumQueries(2):
+            self.assertEqual(ledger.balance_at(self.card, now), Decimal('155'))
+        self.assertEqual(ledger.balance_at(self.card, checkpoint.timestamp), Decimal('150'))
+        self.assertEqual(ledger.balance_at(self.card, now - timedelta(days=1)), 0)
+
+    def test_checkpoint_carries_previous_balance(self):
+        ledger.checkpoint_balances()
+        ledger.post_deposit(self.card, Decimal('1'))
+        ledger.checkpoint_balances()
+
+        latest = BalanceCheckpoint.objects.filter(card=self.card).latest('id')
+        self.assertEqual(latest.balance, Decimal('101'))
+        self.assertEqual(ledger.checkpoint_balances(), 0)
+
+    def test_entry_committed_after_a_checkpoint_is_not_skipped(self):
+        # Its id was taken before the other card's entry, which the first run already covered
+        other = Card.objects.create(user=self.user, card_type='D', currency='B', balance=0)
+        last = LedgerEntry.objects.aggregate(last=Max('id'))['last']
+        LedgerEntry.objects.bulk_create(self.deposit(other, Decimal('7'), last + 3))
+        self.assertEqual(ledger.checkpoint_balances(), 2)
+
+        LedgerEntry.objects.bulk_create(self.deposit(self.card, Decimal('5'), last + 1))
+        ledger.checkpoint_balances()
+
+        self.assertEqual(ledger.balance_at(self.card, timezone.now()), Decimal('105'))
+        self.assertEqual(ledger.balance_at(other, timezone.now()), Decimal('7'))
+
+    def deposit(self, card, amount, first_id):
+        transaction_id = uuid.uuid4()
+        return [
+            LedgerEntry(id=first_id, transaction_id=transaction_id, account=CARD_ACCOUNT, card=card,
+                        amount=amount, currency='B'),
+            LedgerEntry(id=first_id + 1, transaction_id=transaction_id, account=DEPOSITS_ACCOUNT,
+                        amount=-amount, currency='B'),
+        ]
@@ -0,0 +1,95 @@
+import pickle
+import threading
+from decimal import ROUND_HALF_UP, Decimal, getcontext
+
+from django.test import SimpleTestCase, TestCase
+
+from accounts.models import Card, PaymentArchive, User
+from accounts.money import Money, convert, round_amount
+from accounts.utils import convert_currency
+
+
+class MoneyTest(SimpleTestCase):
+    def test_minor_units(self):
+        money = Money.of(Decimal('12.34'), 'B')
+
+        self.assertEqual(money.minor, 1234)
+        self.assertEqual(money.amount, Decimal('12.34'))
+        self.assertEqual(str(money), '12.34')
+        self.assertEqual(f"{money:>8}", '   12.34')
+        self.assertEqual(Money.of(500.10, 'B').minor, 50010)
+        self.assertEqual(Money.of('0.1', 'U') + Money.of(0.2, 'U'), Money.of('0.3', 'U'))
+
+    def test_rounding(self):
+        self.assertEqual(Money.of(Decimal('0.125'), 'B').minor, 12)
+        self.assertEqual(Money.of(Decimal('0.135'), 'B').minor, 14)
+        self.assertEqual(Money.of(Decimal('0.125'), 'B', ROUND_HALF_UP).minor, 13)
+        self.assertEqual(round_amount(Decimal('2.675'), 'B'), Decimal('2.68'))
+
+    def test_arithmetic(self):
+        a, b = Money.of(10, 'B'), Money.of('2.50', 'B')
+
+        self.assertEqual(a - b, Money(750, 'B'))
+        self.assertEqual(sum([a, b, b]), Money(1500, 'B'))
+        self.assertEqual(b * 3, Money(750, 'B'))
+        self.assertEqual(b * Decimal('0.333'), Money(83, 'B'))
+        self.assertEqual(-b, Money(-250, 'B'))
+        self.assertTrue(b < a)
+        self.assertFalse(Money.zero('B'))
+        self.assertEqual(pickle.loads(pickle.dumps(a)), a)
+
+    def test_currencies_do_not_mix(self):
+        with self.assertRaises(ValueError):
+            Money.of(1, 'B') + Money.of(1, 'U')
+        with self.assertRaises(ValueError):
+            Money.of(1, 'B') < Money.of(1, 'U')
+        with self.assertRaises(TypeError):
+            Money.of(1, 'B') * 1.5
+        with self.assertRaises(TypeError):
+            Money(Decimal('1'), 'B')
+        with self.assertRaises(AttributeError):
+            Money.of(1, 'B').minor = 5
+
+    def test_convert(self):
+        usd = Money.of(100, 'U')
+
+        self.assertEqual(convert(usd, 'B', Decimal('3.2')), Money.of(320, 'B'))
+        self.assertEqual(convert(Money.of(100, 'B'), 'U', Decimal('3.2')), Money.of('31.25', 'U'))
+        self.assertIs(convert(usd, 'U', Decimal('3.2')), usd)
+        self.assertEqual(convert(Money.of(10, 'B'), 'U', Decimal('3')), Money.of('3.33', 'U'))
+
+    def test_conversion_leaves_the_global_context_alone(self):
+        context = getcontext()
+        prec = context.prec
+
+        result = convert_currency(100, 'USD', 'BYN', 3.116)
+
+        self.assertEqual(getcontext().prec, prec)
+        self.assertEqual(result, Decimal('32.09242619'))
+
+        # Other threads keep their own precision too
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(
+            (convert_currency(1, 'USD', 'BYN', 3), getcontext().prec)))
+        thread.start()
+        thread.join()
+        self.assertEqual(seen, [(Decimal('0.3333333333'), 28)])
+
+
+class MoneyFieldTest(TestCase):
+    def test_stored_as_minor_units(self):
+        user = User.objects.create_user(email='testuser@gmail.com', password='testpass')
+        card = Card.objects.create(user=user, currency='U', balance=0)
+        archive = PaymentArchive.objects.create(
+            card=card, month='2024-01-01', name='x', rows=1, currency='U',
+            total_spent=Money.of('12.34', 'U'), total_deposited=Money.zero('U'),
+        )
+
+        archive = PaymentArchive.objects.get(id=archive.id)
+        self.assertEqual(archive.total_spent, Money(1234, 'U'))
+        self.assertEqual(PaymentArchive.objects.values_list('total_spent', flat=True).get(), 1234)
+        self.assertTrue(PaymentArchive.objects.filter(total_spent__gt=Money.of(12, 'U')).exists())
+        with self.assertRaises(ValueError):
+            archive.total_spent = Money.of(1, 'B')
+        with self.assertRaises(TypeError):
+            PaymentArchive.objects.filter(total_spent=Decimal('12.34')).exists()
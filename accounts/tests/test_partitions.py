@@ -0,0 +1,86 @@
+import unittest
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts import partitions
+from accounts.models import Card, Payment, User
+from accounts.statements import statement_queryset
+from accounts.tasks import create_payment_partitions
+
+
+def this_month():
+    return timezone.localdate().replace(day=1)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', "payments are partitioned on PostgreSQL only")
+class PaymentPartitionTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='testuser@gmail.com', password='testpass')
+        self.card = Card.objects.create(user=self.user, balance=1000)
+
+    def test_migration_partitions_the_table(self):
+        self.assertTrue(partitions.is_partitioned())
+        self.assertIn(partitions.DEFAULT_PARTITION, partitions.partitions())
+        self.assertIn(partitions.partition_name(this_month()), partitions.partitions())
+
+    def test_upcoming_months_are_created_once(self):
+        month = partitions.add_months(this_month(), 6)
+
+        created = partitions.ensure_partitions(months_ahead=6)
+
+        self.assertIn(partitions.partition_name(month), created)
+        self.assertIn(partitions.partition_name(month), partitions.partitions())
+        self.assertEqual(partitions.ensure_partitions(months_ahead=6), [])
+
+    def test_rows_of_a_new_month_leave_the_default_partition(self):
+        month = partitions.add_months(this_month(), 8)
+        payment = Payment.objects.create(card=self.card, amount=Decimal('50'), timestamp=partitions.month_bound(month))
+
+        partitions.ensure_partitions(months_ahead=8)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT id FROM {partitions.partition_name(month)}")
+            self.assertEqual(cursor.fetchall(), [(payment.id,)])
+            cursor.execute(f"SELECT COUNT(*) FROM {partitions.DEFAULT_PARTITION}")
+            self.assertEqual(cursor.fetchone(), (0,))
+
+    def test_month_statement_reads_one_partition(self):
+        month = this_month()
+        start, end = partitions.month_bound(month), partitions.month_bound(partitions.add_months(month, 1))
+
+        plan = statement_queryset(self.card, start, end).explain()
+
+        self.assertIn(partitions.partition_name(month), plan)
+        self.assertNotIn(partitions.partition_name(partitions.add_months(month, 1)), plan)
+        self.assertNotIn(partitions.DEFAULT_PARTITION, plan)
+
+    def test_detached_month_leaves_the_table(self):
+        month = partitions.add_months(this_month(), -1)
+        partitions.ensure_partitions(start=month)
+        Payment.objects.create(card=self.card, amount=Decimal('50'), timestamp=partitions.month_bound(month))
+        Payment.objects.create(card=self.card, amount=Decimal('30'))
+        # Fire the deferred foreign key checks, a commit would in production
+        connection.check_constraints()
+
+        call_command('payment_partitions', detach=f"{month:%Y-%m}", drop=True, stdout=StringIO())
+
+        self.assertNotIn(partitions.partition_name(month), partitions.partitions())
+        self.assertEqual(list(Payment.objects.values_list('amount', flat=True)), [Decimal('30')])
+
+    def test_task(self):
+        with self.settings(BANK_PAYMENT_PARTITIONS_AHEAD=5):
+            created = create_payment_partitions()
+
+        self.assertIn(partitions.partition_name(partitions.add_months(this_month(), 5)), created)
+
+
+@unittest.skipIf(connection.vendor == 'postgresql', "payments are partitioned on PostgreSQL")
+class UnpartitionedPaymentTest(TestCase):
+    def test_nothing_to_create(self):
+        self.assertFalse(partitions.is_partitioned())
+        self.assertEqual(partitions.ensure_partitions(), [])
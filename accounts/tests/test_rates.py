@@ -0,0 +1,93 @@
+import json
+import threading
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from accounts import rates
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class StubRatesHandler(BaseHTTPRequestHandler):
+    status = 200
+    payload = [{'USD_in': '3.2500', 'USD_out': '3.2900'}]
+    hits = 0
+
+    def do_GET(self):
+        type(self).hits += 1
+        body = json.dumps(self.payload).encode()
+        self.send_response(self.status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ExchangeRateServiceTest(TestCase):
+    def setUp(self):
+        StubRatesHandler.status = 200
+        StubRatesHandler.hits = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubRatesHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/api/kursExchange'
+        cache.clear()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_default_rate_when_cache_is_cold(self):
+        self.assertEqual(rates.get_usd_rate(), Decimal('3.116'))
+
+    def test_refresh_then_read_without_network(self):
+        with self.settings(BANK_FX_RATES_URL=self.url):
+            rates.refresh_rates()
+
+        # Readers only touch the cache
+        self.server.shutdown()
+        self.assertEqual(rates.get_usd_rate(), Decimal('3.2500'))
+        self.assertEqual(rates.get_rate('USD_out'), Decimal('3.2900'))
+        self.assertEqual(StubRatesHandler.hits, 1)
+
+    def test_stale_rate_served_while_upstream_fails(self):
+        with self.settings(BANK_FX_RATES_URL=self.url, BANK_FX_RATES_TTL=0):
+            rates.refresh_rates()
+            StubRatesHandler.status = 500
+            self.assertIsNone(rates.refresh_rates())
+
+            self.assertEqual(rates.get_usd_rate(), Decimal('3.2500'))
+
+    def test_breaker_opens_after_repeated_failures(self):
+        StubRatesHandler.status = 503
+        with self.settings(BANK_FX_RATES_URL=self.url):
+            for _ in range(rates.breaker.threshold + 2):
+                rates.refresh_rates()
+
+        self.assertTrue(rates.breaker.is_open())
+        self.assertEqual(StubRatesHandler.hits, rates.breaker.threshold)
+
+    def test_breaker_follows_overridden_settings(self):
+        StubRatesHandler.status = 503
+        with self.settings(BANK_FX_RATES_URL=self.url, BANK_FX_BREAKER_THRESHOLD=1):
+            rates.refresh_rates()
+            rates.refresh_rates()
+
+        self.assertTrue(rates.breaker.is_open())
+        self.assertEqual(StubRatesHandler.hits, 1)
+
+    def test_breaker_closes_after_success(self):
+        StubRatesHandler.status = 503
+        with self.settings(BANK_FX_RATES_URL=self.url):
+            rates.refresh_rates()
+            StubRatesHandler.status = 200
+            rates.refresh_rates()
+
+        self.assertFalse(rates.breaker.is_open())
+        self.assertIsNone(cache.get(rates.breaker.failures_key))
@@ -1,7 +1,16 @@
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
 from django.test import TestCase
 from django.urls import reverse
+from django.utils import timezone
 from decimal import Decimal
 from accounts.models import Card, Payment, User
+from accounts.statements import statement_page, statement_totals
+from accounts.tasks import build_statement_pdf
+from transactions.models import Transaction
+from transactions.services import transfer_funds
 
 
 class StatementViewTest(TestCase):
@@ -38,4 +47,152 @@ class StatementViewTest(TestCase):
         response = self.client.get(reverse('accounts:card_history', kwargs={'card_id': self.card.id}))
 
         # Проверяем, что пользователь перенаправлен на страницу входа
-        self.assertRedirects(response, '/accounts/login/?next=' + reverse('accounts:card_history', kwargs={'card_id': self.card.id}))
\ No newline at end of file
+        self.assertRedirects(response, '/accounts/login/?next=' + reverse('accounts:card_history', kwargs={'card_id': self.card.id}))
+
+class StatementPaginationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='testuser@gmail.com', password='testpass')
+        self.card = Card.objects.create(user=self.user, balance=1000)
+        now = timezone.now()
+        Payment.objects.bulk_create([
+            Payment(card=self.card, amount=Decimal(i), deposit_pending=i % 5 == 0,
+                    timestamp=now - timedelta(hours=i // 2))
+            for i in range(1, 121)
+        ])
+        self.start = now - timedelta(days=30)
+        self.end = now + timedelta(days=1)
+
+    def test_pages_cover_every_payment_once(self):
+        seen = []
+        cursor = None
+        while True:
+            rows, cursor = statement_page(self.card, self.start, self.end, cursor, page_size=50)
+            seen += [row.id for row in rows]
+            if cursor is None:
+                break
+
+        self.assertEqual(len(seen), 120)
+        self.assertEqual(len(set(seen)), 120)
+        timestamps = list(Payment.objects.filter(id__in=seen).order_by('-timestamp', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, timestamps)
+
+    def test_totals_in_two_queries(self):
+        # One conditional aggregation of the payments, one of the transfers
+        with self.assertNumQueries(2):
+            totals = statement_totals(self.card, self.start, self.end)
+
+        deposited = sum(i for i in range(1, 121) if i % 5 == 0)
+        self.assertEqual(totals['total_deposited'], deposited)
+        self.assertEqual(totals['total_spent'], sum(range(1, 121)) - deposited)
+
+    def test_view_links_next_page(self):
+        self.client.login(email='testuser@gmail.com', password='testpass')
+        today = timezone.now().date()
+        params = {
+            'start_date_year': today.year - 1, 'start_date_month': today.month, 'start_date_day': 1,
+            'end_date_year': today.year, 'end_date_month': today.month, 'end_date_day': today.day,
+        }
+        response = self.client.get(reverse('accounts:card_history', kwargs={'card_id': self.card.id}), params)
+
+        self.assertEqual(len(response.context['regular_payments']) + len(response.context['pending_deposits']), 50)
+        self.assertIn('cursor=', response.context['next_page_url'])
+
+
+class StatementTransferTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='testuser@gmail.com', password='testpass')
+        self.card = Card.objects.create(user=self.user, card_type='D', currency='B', balance=1000)
+        self.other = Card.objects.create(user=self.user, card_type='D', currency='B', balance=0)
+        Payment.objects.create(card=self.card, amount=Decimal('50'), currency='B', card_type='D')
+        transfer_funds(self.card.id, self.other.id, Decimal('30'), Decimal('3.2'))
+        self.start = timezone.now() - timedelta(days=1)
+        self.end = timezone.now() + timedelta(days=1)
+
+    def test_transfer_is_on_both_statements(self):
+        rows, cursor = statement_page(self.card, self.start, self.end, page_size=1)
+        self.assertEqual([(row.amount, row.deposit_pending) for row in rows], [(Decimal('30'), False)])
+        rows, cursor = statement_page(self.card, self.start, self.end, cursor, page_size=1)
+        self.assertEqual([(row.amount, row.deposit_pending) for row in rows], [(Decimal('50'), False)])
+        self.assertIsNone(cursor)
+        self.assertEqual(statement_totals(self.card, self.start, self.end),
+                         {'total_spent': Decimal('80'), 'total_deposited': 0})
+
+        rows, _ = statement_page(self.other, self.start, self.end)
+        self.assertEqual([(row.amount, row.deposit_pending) for row in rows], [(Decimal('30'), True)])
+        self.assertEqual(statement_totals(self.other, self.start, self.end),
+                         {'total_spent': 0, 'total_deposited': Decimal('30')})
+
+    def test_rows_of_one_timestamp_are_paged_once(self):
+        # Ids of payments and transfers come from different tables and may collide
+        Payment.objects.create(card=self.card, amount=Decimal('20'), currency='B', card_type='D')
+        moment = timezone.now()
+        Payment.objects.update(timestamp=moment)
+        Transaction.objects.update(timestamp=moment)
+
+        seen, cursor = [], None
+        while True:
+            rows, cursor = statement_page(self.card, self.start, self.end, cursor, page_size=1)
+            seen += [row.amount for row in rows]
+            if cursor is None:
+                break
+        self.assertEqual(sorted(seen), [Decimal('20'), Decimal('30'), Decimal('50')])
+
+    def test_transfer_is_exported(self):
+        self.client.login(email='testuser@gmail.com', password='testpass')
+        today = timezone.localdate()
+        params = {
+            'start_date_year': today.year, 'start_date_month': today.month, 'start_date_day': today.day,
+            'end_date_year': today.year, 'end_date_month': today.month, 'end_date_day': today.day,
+        }
+
+        response = self.client.get(reverse('accounts:card_history_csv', kwargs={'card_id': self.card.id}), params)
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([line.split(',')[1:] for line in lines[1:]],
+                         [['50.00', 'B', 'D', 'False'], ['30.00', 'B', 'D', 'False']])
+
+
+class StatementExportTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='testuser@gmail.com', password='testpass')
+        self.card = Card.objects.create(user=self.user, balance=1000)
+        Payment.objects.bulk_create([
+            Payment(card=self.card, amount=Decimal(i), currency='B', card_type='D') for i in range(1, 11)
+        ])
+        today = timezone.localdate()
+        self.params = {
+            'start_date_year': today.year, 'start_date_month': today.month, 'start_date_day': 1,
+            'end_date_year': today.year, 'end_date_month': today.month, 'end_date_day': today.day,
+        }
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        self.client.login(email='testuser@gmail.com', password='testpass')
+
+    def test_csv_is_streamed(self):
+        response = self.client.get(reverse('accounts:card_history_csv', kwargs={'card_id': self.card.id}), self.params)
+
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'timestamp,amount,currency,card_type,deposit_pending')
+        self.assertEqual(len(lines), 11)
+
+    def test_export_of_foreign_card_is_hidden(self):
+        other = User.objects.create_user(email='other@gmail.com', password='testpass')
+        card = Card.objects.create(user=other)
+        response = self.client.get(reverse('accounts:card_history_csv', kwargs={'card_id': card.id}), self.params)
+        self.assertEqual(response.status_code, 404)
+
+    def test_pdf_is_built_once_and_served_from_storage(self):
+        url = reverse('accounts:card_history_pdf', kwargs={'card_id': self.card.id})
+        with self.settings(MEDIA_ROOT=self.media.name), \
+                mock.patch('accounts.views.build_statement_pdf.delay') as delay:
+            response = self.client.get(url, self.params)
+            self.assertEqual(response.status_code, 302)
+            self.assertEqual(delay.call_count, 1)
+            # A worker builds it, outside the request
+            build_statement_pdf(*delay.call_args.args)
+
+            response = self.client.get(url, self.params)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF-1.4'))
+            self.assertEqual(delay.call_count, 1)
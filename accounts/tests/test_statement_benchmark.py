@@ -0,0 +1,72 @@
+import os
+import time
+import unittest
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import Card, Payment, User
+from accounts.statements import statement_page, statement_totals
+
+# Seeding a million rows takes minutes, so the benchmark only runs on request:
+#   BANK_BENCHMARKS=1 python manage.py test accounts.tests.test_statement_benchmark
+PAYMENTS = int(os.getenv('BANK_BENCHMARK_PAYMENTS', 1_000_000))
+PAGES = int(os.getenv('BANK_BENCHMARK_PAGES', 200))
+P95_MS = float(os.getenv('BANK_BENCHMARK_STATEMENT_P95_MS', 50))
+# Aggregates the card's whole history, a tenth of PAYMENTS
+TOTALS_MS = float(os.getenv('BANK_BENCHMARK_STATEMENT_TOTALS_MS', 250))
+
+
+def p95(samples):
+    samples = sorted(samples)
+    return samples[int(len(samples) * 0.95) - 1]
+
+
+@unittest.skipUnless(os.getenv('BANK_BENCHMARKS'), "set BANK_BENCHMARKS=1 to run benchmarks")
+class StatementBenchmark(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(email='bench@example.com', password='benchpass')
+        # The measured card shares the table with plenty of other cards' history
+        cards = [Card.objects.create(user=user, card_name=f'Bench {n}') for n in range(10)]
+        cls.card = cards[0]
+
+        now = timezone.now()
+        batch = []
+        for i in range(PAYMENTS):
+            batch.append(Payment(
+                card=cards[i % len(cards)],
+                amount=Decimal(i % 500) + Decimal('0.99'),
+                currency='B',
+                card_type='D',
+                deposit_pending=i % 7 == 0,
+                timestamp=now - timedelta(minutes=i),
+            ))
+            if len(batch) == 10_000:
+                Payment.objects.bulk_create(batch)
+                batch = []
+        Payment.objects.bulk_create(batch)
+
+        cls.start = now - timedelta(minutes=PAYMENTS + 1)
+        cls.end = now + timedelta(minutes=1)
+
+    def test_page_latency_p95(self):
+        samples = []
+        cursor = None
+        for _ in range(PAGES):
+            started = time.perf_counter()
+            rows, cursor = statement_page(self.card, self.start, self.end, cursor)
+            samples.append((time.perf_counter() - started) * 1000)
+            if cursor is None:
+                break
+
+        self.assertLess(p95(samples), P95_MS, f"statement page p95 over {len(samples)} pages, ms")
+
+    def test_totals_latency(self):
+        started = time.perf_counter()
+        statement_totals(self.card, self.start, self.end)
+        elapsed = (time.perf_counter() - started) * 1000
+
+        self.assertLess(elapsed, TOTALS_MS, "statement totals, ms")
@@ -0,0 +1,61 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from accounts import ledger
+from accounts.models import Card, SavingsGoal
+from accounts.summary import get_summary
+from credits.models import Credit
+
+User = get_user_model()
+
+
+class AccountSummaryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='testuser@example.com', password='testpass')
+        self.cards = [
+            Card.objects.create(user=self.user, card_type='D', currency='B', balance=100),
+            Card.objects.create(user=self.user, card_type='D', currency='U', balance=20),
+            Card.objects.create(user=self.user, card_type='C', currency='B', balance=50),
+        ]
+
+    def test_cache_hit_runs_no_queries(self):
+        get_summary(self.user)
+
+        with self.assertNumQueries(0):
+            summary = get_summary(self.user)
+            [str(card) for card in summary['cards']]
+
+        self.assertEqual(summary['balances'], {'BYN': Decimal('150'), 'USD': Decimal('20')})
+
+    def test_saves_invalidate(self):
+        get_summary(self.user)
+
+        SavingsGoal.objects.create(user=self.user, goal_name='Bike', target_amount=100,
+                                   target_date='2030-01-01', approved=True)
+        Credit.objects.create(user=self.user, amount=500, interest_rate=5, term_months=12,
+                              monthly_payment=Decimal('50'), remaining_amount=Decimal('500'), status='APPROVED')
+
+        summary = get_summary(self.user)
+        self.assertEqual(len(summary['savings_goals']), 1)
+        self.assertEqual(len(summary['credits']), 1)
+
+    def test_ledger_postings_invalidate(self):
+        get_summary(self.user)
+
+        ledger.post_deposit(self.cards[0], Decimal('25'))
+
+        self.assertEqual(get_summary(self.user)['balances']['BYN'], Decimal('175'))
+
+    def test_card_list_served_from_cache(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('accounts:card_list'))
+
+        response = self.client.get(reverse('accounts:card_list'))
+
+        self.assertEqual(len(response.context['cards']), 3)
+        self.assertContains(response, '150')
@@ -1,7 +1,7 @@
 from django.urls import path
 from .views import (LogoutView, UserProfileView, CardCreateView,
-                    CardListView, deposit_card, StaffProfileView, make_payment, statement, deposit_approval,
-                    deposit_approval_list, create_savings_goal,
+                    CardListView, deposit_card, StaffProfileView, make_payment, statement, statement_csv, statement_pdf, deposit_approval,
+                    deposit_approval_list, deposit_bulk_approval, create_savings_goal,
                     review_savings_plan, savings_goal_list, edit_savings_goal, delete_savings_goal, EditUserAddressView,
                     AccountLoginView)
 
@@ -42,6 +42,14 @@ urlpatterns = [
         'card_history/<int:card_id>', statement,
         name='card_history'
     ),
+    path(
+        'card_history/<int:card_id>/export.csv', statement_csv,
+        name='card_history_csv'
+    ),
+    path(
+        'card_history/<int:card_id>/export.pdf', statement_pdf,
+        name='card_history_pdf'
+    ),
     path(
         'deposit_card/<int:card_id>', deposit_card,
         name='deposit_form'
@@ -52,6 +60,9 @@ urlpatterns = [
     path(
         'deposit-approval/<int:card_id>/', deposit_approval, name='deposit_approval'
     ),
+    path(
+        'deposit-approval/bulk/', deposit_bulk_approval, name='deposit_bulk_approval'
+    ),
     path(
         'savings-goal/create/', create_savings_goal, name='create_savings_goal'
     ),
@@ -0,0 +1,8 @@
+from core.asyncviews import swap_views
+from . import async_views
+from .urls import app_name, urlpatterns as sync_urlpatterns  # noqa: F401
+
+urlpatterns = swap_views(sync_urlpatterns, {
+    'make_payment': async_views.make_payment,
+    'card_history': async_views.statement,
+})
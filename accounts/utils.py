@@ -1,6 +1,7 @@
 import logging
-from decimal import Decimal, getcontext
+from decimal import localcontext
 
+from accounts import money
 from accounts.constants import CURRENCY
 
 
@@ -13,11 +14,7 @@ def convert_currency(amount, from_currency, to_currency, rate):
     if from_currency == to_currency:
         return amount
     else:
-        # Устанавливаем точность для объектов Decimal
-        getcontext().prec = 10
-
-        amount = Decimal(str(amount))
-        rate = Decimal(str(rate))
-        result = amount / rate
-
-        return result
+        # Точность задаётся в локальном контексте, глобальный общий для всего потока
+        with localcontext(money.CONTEXT) as context:
+            context.prec = 10
+            return money.to_decimal(amount) / money.to_decimal(rate)
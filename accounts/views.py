@@ -1,27 +1,37 @@
 from datetime import timedelta
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
-from django.contrib.auth import login, logout
+from django.contrib.auth import logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.views import LoginView
-import requests
-from django.contrib.sites.shortcuts import get_current_site
 from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.core.paginator import Paginator
 from django.core.mail import EmailMessage
-from django.db.models import Sum
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.db import transaction
 from django.shortcuts import get_object_or_404, redirect, render
 from django.template.loader import render_to_string
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.views import View
 from django.views.generic import TemplateView, RedirectView, FormView
-from django_otp import match_token, devices_for_user
+from django_otp import devices_for_user
 from django_otp.forms import OTPAuthenticationForm
 from django_otp.plugins.otp_totp.models import TOTPDevice
 
+from core import outbox
+from core.idempotency import idempotent
+from core.querybudget import query_budget
+from core.routers import replica_reads
+
 from .forms import UserAddressForm, CardCreationForm, \
     DepositCardForm, PaymentForm, StatementFilterForm, DepositApprovalForm, SavingsGoalForm, SignUpForm
 from .models import UserAddress, Card, Payment, SavingsGoal
+from . import deposits, rates, summary
+from .statements import export_name, statement_page, statement_totals, stream_csv
+from .tasks import build_statement_pdf
 import logging
 
 from .utils import convert_currency
@@ -43,30 +53,30 @@ class SignUpView(View):
         form = self.form_class()
         return render(request, self.template_name, {'form': form})
 
-    def post(self, request, *args, **kwargs):
-        form = self.form_class(request.POST)
-        if form.is_valid():
-
+    def register(self, form):
+        # The activation e-mail is saved with the user and sent by core.tasks.send_outbox
+        with transaction.atomic():
             user = form.save(commit=False)
             user.is_active = True  # Deactivate account till it is confirmed
             user.save()
             device = self.get_user_totp_device(user)
             if not device:
                 device = user.totpdevice_set.create(confirmed=True)
-                print(device.config_url)
-            current_site = get_current_site(request)
-            mail_subject = 'DJANGO OTP DEMO'
             message = render_to_string('emails/account_activation_email.html', {
                 'user': user,
                 'qr_code': device.config_url,
             })
-            to_email = form.cleaned_data.get('email')
             email = EmailMessage(
-                mail_subject, message, to=[to_email]
+                'DJANGO OTP DEMO', message, to=[form.cleaned_data.get('email')]
             )
             email.content_subtype = "html"
-            email.send()
+            outbox.enqueue(email)
+        return user
 
+    def post(self, request, *args, **kwargs):
+        form = self.form_class(request.POST)
+        if form.is_valid():
+            self.register(form)
             messages.success(request, 'Please Confirm your email to complete registration.')
 
             return redirect('login')
@@ -74,36 +84,15 @@ class SignUpView(View):
         return render(request, self.template_name, {'form': form})
 
 
+@query_budget(13)
 class AccountLoginView(LoginView):
     template_name = 'commons/login.html'
+    # Checks the password and the OTP token, LoginView.form_valid only logs in
     form_class = OTPAuthenticationForm
     redirect_authenticated_user = True
 
-    def form_invalid(self, form):
-        return super().form_invalid(form)
-
-    def form_valid(self, form):
-        # Let the custom authentication form handle authentication
-        user = form.get_user()
-
-        if user is not None:
-            otp_token = form.cleaned_data.get('otp_token')
-            device_match = match_token(user=user, token=otp_token)
-
-            if device_match:
-                # Log the user in
-                login(self.request, user)
-                return super().form_valid(form)
-            else:
-                # Handle token mismatch
-                form.add_error('otp_token', 'Invalid OTP token')
-        else:
-            # Handle authentication failure
-            form.add_error(None, 'Invalid email or password')
-
-        return super().form_valid(form)
-
 
+@query_budget(4)
 class LogoutView(RedirectView):
     pattern_name = 'home'
 
@@ -113,6 +102,7 @@ class LogoutView(RedirectView):
         return super().get_redirect_url(*args, **kwargs)
 
 
+@query_budget(3)
 class UserProfileView(TemplateView):
     template_name = 'accounts/user_profile.html'
 
@@ -132,6 +122,7 @@ class UserProfileView(TemplateView):
         return context
 
 
+@query_budget(4)
 class EditUserAddressView(LoginRequiredMixin, FormView):
     template_name = 'accounts/edit_user_address.html'
     form_class = UserAddressForm
@@ -171,29 +162,13 @@ class EditUserAddressView(LoginRequiredMixin, FormView):
 
 
 def get_usd_exchange_rate():
-    url = "https://belarusbank.by/api/kursExchange"
-
-    # Отправка GET-запроса к API
-    response = requests.get(url)
-
-    # Проверка успешности запроса
-    if response.status_code == 200:
-        data = response.json()
-
-        # Предположим, что "USD_in" находится внутри первого элемента списка
-        if isinstance(data, list) and len(data) > 0:
-            usd_in_rate = data[0].get("USD_in")
-            return usd_in_rate
-        else:
-            print("Структура данных не соответствует ожидаемой.")
-            return None
-    else:
-        # Вывод сообщения об ошибке в случае неудачного запроса
-        print(f"Ошибка при получении данных. Статус код: {response.status_code}")
-        return None
+    # Served from the cache, celery beat keeps it fresh (see accounts.rates)
+    return rates.get_usd_rate()
 
 
+@query_budget(12)
 @login_required()
+@idempotent
 def make_payment(request, card_id=None):
     card = get_object_or_404(Card, id=card_id) if card_id else 1
 
@@ -207,11 +182,6 @@ def make_payment(request, card_id=None):
             card_type = selected_card.card_type
             if selected_card.currency == 'U':
                 usd_in_rate = get_usd_exchange_rate()
-
-                # Пример значения по умолчанию, если запрос к API неудачен
-                if usd_in_rate is None:
-                    usd_in_rate = 3.116
-                print(usd_in_rate)
                 converted_amount = convert_currency(amount, 'USD', 'BYN', usd_in_rate)
 
             else:
@@ -233,10 +203,12 @@ def make_payment(request, card_id=None):
     return render(request, 'accounts/payment_form.html', {'form': form, 'card': card})
 
 
+@query_budget(2)
 class StaffProfileView(TemplateView):
     template_name = 'accounts/staff_profile.html'
 
 
+@query_budget(9)
 class CardCreateView(LoginRequiredMixin, View):
     template_name = 'accounts/create_card.html'
     success_url = 'accounts:card_list'
@@ -261,21 +233,27 @@ class CardCreateView(LoginRequiredMixin, View):
         return render(request, self.template_name, {'form': form})
 
 
+@query_budget(5)
+@replica_reads
 class CardListView(LoginRequiredMixin, View):
     template_name = 'accounts/card_list.html'
 
     def get(self, request):
         if request.user.is_authenticated:
-            user = request.user
-            if not user.has_cards():
+            account_summary = summary.get_summary(request.user)
+            if not account_summary['cards']:
                 return render(request, 'accounts/no_cards.html')
-            cards = user.user_cards.all()
-            return render(request, self.template_name, {'cards': cards})
+            return render(request, self.template_name, {
+                'cards': account_summary['cards'],
+                'balances': account_summary['balances'],
+            })
         else:
             return render(request, 'accounts/no_cards.html')
 
 
+@query_budget(10)
 @login_required
+@idempotent
 def deposit_card(request, card_id):
     card = Card.objects.get(id=card_id)
 
@@ -309,12 +287,41 @@ def deposit_card(request, card_id):
     return render(request, 'accounts/deposit_form.html', {'form': form, 'card': card})
 
 
+@query_budget(4)
+@replica_reads
 @staff_member_required
 def deposit_approval_list(request):
-    pending_deposit_cards = Card.objects.filter(deposit_pending=True)
-    return render(request, 'accounts/deposit_approval_list.html', {'pending_deposit_cards': pending_deposit_cards})
+    pending_deposit_cards = deposits.pending_deposits().select_related('user').order_by('id')
+    paginator = Paginator(pending_deposit_cards, settings.BANK_DEPOSIT_APPROVAL_PAGE_SIZE)
+    page = paginator.get_page(request.GET.get('page'))
+    return render(request, 'accounts/deposit_approval_list.html', {
+        'pending_deposit_cards': page,
+        'page_obj': page,
+    })
 
 
+@query_budget(8)
+@staff_member_required
+def deposit_bulk_approval(request):
+    if request.method != 'POST':
+        return redirect('accounts:deposit_approval_list')
+
+    card_ids = [card_id for card_id in request.POST.getlist('card_ids') if card_id.isdigit()]
+    approve = request.POST.get('action') != 'reject'
+    results = deposits.settle_deposits(card_ids, request.user.id, approve=approve)
+
+    skipped = len(card_ids) - len(results)
+    if approve:
+        messages.success(request, f"Approved {len(results)} deposit requests.")
+    else:
+        messages.warning(request, f"Rejected {len(results)} deposit requests.")
+    if skipped:
+        messages.info(request, f"{skipped} selected requests were no longer pending.")
+
+    return redirect('accounts:deposit_approval_list')
+
+
+@query_budget(10)
 @staff_member_required
 def deposit_approval(request, card_id):
     card = get_object_or_404(Card, id=card_id)
@@ -323,21 +330,11 @@ def deposit_approval(request, card_id):
         form = DepositApprovalForm(request.POST)
         if form.is_valid():
             approved = form.cleaned_data['approved']
+            deposits.settle_deposits([card.id], request.user.id, approve=approved)
 
             if approved:
-                # Process the approved deposit
-                card.balance += card.pending_deposit_amount
-                card.pending_deposit_amount = 0
-                card.deposit_pending = False
-                card.save()
-
                 messages.success(request, f"Deposit request for Card {card.account_no} approved.")
             else:
-                # Reject the deposit
-                card.pending_deposit_amount = 0
-                card.deposit_pending = False
-                card.save()
-
                 messages.warning(request, f"Deposit request for Card {card.account_no} rejected.")
 
             return redirect('accounts:deposit_approval_list')
@@ -348,39 +345,108 @@ def deposit_approval(request, card_id):
     return render(request, 'accounts/deposit_approval_form.html', {'form': form, 'card': card})
 
 
-@login_required
-def statement(request, card_id):
-    form = StatementFilterForm(request.GET or None)
-    card = Card.objects.get(id=card_id)
-
-    if form.is_valid():
-        start_date = form.cleaned_data['start_date']
-        end_date = form.cleaned_data['end_date'] + timedelta(days=1)
+def statement_context(request, form, card, page=None, totals=None):
+    next_page_url = None
 
-        payments = Payment.objects.filter(card=card, timestamp__range=[start_date, end_date])
+    if page is not None:
+        payments, next_cursor = page
 
         # Separate payments and pending deposits
-        regular_payments = payments.filter(deposit_pending=False)
-        pending_deposits = payments.filter(deposit_pending=True)
+        regular_payments = [payment for payment in payments if not payment.deposit_pending]
+        pending_deposits = [payment for payment in payments if payment.deposit_pending]
+
+        total_spent = totals['total_spent']
+        total_deposited = totals['total_deposited']
 
-        total_spent = regular_payments.aggregate(Sum('amount'))['amount__sum'] or 0
+        if next_cursor:
+            query = request.GET.copy()
+            query['cursor'] = next_cursor
+            next_page_url = f"?{query.urlencode()}"
     else:
         regular_payments = []
         pending_deposits = []
         total_spent = 0
+        total_deposited = 0
 
-    return render(request, 'accounts/statement.html', {
+    return {
         'form': form,
         'regular_payments': regular_payments,
         'pending_deposits': pending_deposits,
         'total_spent': total_spent,
+        'total_deposited': total_deposited,
+        'next_page_url': next_page_url,
         'card': card,
-    })
+    }
+
+
+@query_budget(8)
+@replica_reads
+@login_required
+def statement(request, card_id):
+    form = StatementFilterForm(request.GET or None)
+    card = Card.objects.get(id=card_id)
+    page = totals = None
+
+    if form.is_valid():
+        start_date = form.cleaned_data['start_date']
+        end_date = form.cleaned_data['end_date'] + timedelta(days=1)
+
+        page = statement_page(card, start_date, end_date, request.GET.get('cursor'))
+        totals = statement_totals(card, start_date, end_date)
+
+    return render(request, 'accounts/statement.html', statement_context(request, form, card, page, totals))
+
+
+def get_export_card(request, card_id):
+    card = get_object_or_404(Card, id=card_id)
+    if card.user_id != request.user.id and not request.user.is_staff:
+        raise Http404
+    return card
+
+
+@query_budget(3)
+@login_required
+def statement_csv(request, card_id):
+    card = get_export_card(request, card_id)
+    form = StatementFilterForm(request.GET or None)
+    if not form.is_valid():
+        return redirect('accounts:card_history', card_id=card.id)
+
+    start_date = form.cleaned_data['start_date']
+    end_date = form.cleaned_data['end_date'] + timedelta(days=1)
+
+    response = StreamingHttpResponse(stream_csv(card, start_date, end_date), content_type='text/csv')
+    filename = f"statement_{card.account_no}_{start_date:%Y%m%d}_{form.cleaned_data['end_date']:%Y%m%d}.csv"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@query_budget(5)
+@login_required
+def statement_pdf(request, card_id):
+    card = get_export_card(request, card_id)
+    form = StatementFilterForm(request.GET or None)
+    history_url = f"{reverse('accounts:card_history', kwargs={'card_id': card.id})}?{request.GET.urlencode()}"
+    if not form.is_valid():
+        return redirect(history_url)
+
+    start_date = form.cleaned_data['start_date']
+    end_date = form.cleaned_data['end_date'] + timedelta(days=1)
+
+    name = export_name(card, start_date, end_date, 'pdf')
+    if default_storage.exists(name):
+        return FileResponse(default_storage.open(name), as_attachment=True,
+                            filename=f"statement_{card.account_no}.pdf")
+
+    build_statement_pdf.delay(card.id, start_date.isoformat(), end_date.isoformat())
+    messages.info(request, "Your PDF statement is being prepared, download it again in a moment.")
+    return redirect(history_url)
 
 
 # ----------------Savings Goals-----------------------
 
 
+@query_budget(4)
 @login_required
 def create_savings_goal(request):
     if request.method == 'POST':
@@ -396,6 +462,7 @@ def create_savings_goal(request):
     return render(request, 'accounts/create_savings_goal.html', {'form': form})
 
 
+@query_budget(12)
 @login_required
 def review_savings_plan(request, goal_id):
     savings_goal = get_object_or_404(SavingsGoal, id=goal_id)
@@ -438,10 +505,11 @@ def review_savings_plan(request, goal_id):
     return render(request, 'accounts/review_savings_plan.html', context)
 
 
+@query_budget(2)
+@replica_reads
 @login_required
 def savings_goal_list(request):
-    user = request.user
-    active_goals = SavingsGoal.objects.filter(user=user, approved=True)
+    active_goals = summary.get_summary(request.user)['savings_goals']
 
     context = {
         'active_goals': active_goals,
@@ -450,6 +518,7 @@ def savings_goal_list(request):
     return render(request, 'accounts/savings_goal_list.html', context)
 
 
+@query_budget(5)
 @login_required
 def edit_savings_goal(request, goal_id):
     savings_goal = get_object_or_404(SavingsGoal, id=goal_id)
@@ -479,6 +548,7 @@ def edit_savings_goal(request, goal_id):
     return render(request, 'accounts/edit_savings_goal.html', context)
 
 
+@query_budget(4)
 @login_required
 def delete_savings_goal(request, goal_id):
     goal = get_object_or_404(SavingsGoal, id=goal_id)
@@ -1,7 +1,6 @@
 from __future__ import absolute_import, unicode_literals
 import os
 from celery import Celery
-from celery.schedules import crontab
 
 # set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'banking_system.settings')
@@ -16,10 +15,5 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 # Load task modules from all registered Django app configs.
 app.autodiscover_tasks()
 
-# Configure scheduled tasks (Celery Beat)
-app.conf.beat_schedule = {
-    'monthly-payment-task': {
-        'task': 'credits.tasks.monthly_payment_task',
-        'schedule': crontab(day_of_month=1, hour=0, minute=0),
-    },
-}
\ No newline at end of file
+# The beat schedule is CELERY_BEAT_SCHEDULE in settings, beat refuses to start
+# when an entry names a task that is not registered (see core.taskruns)
@@ -58,6 +58,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.querybudget.QueryBudgetMiddleware',
+    'core.routers.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -68,7 +71,8 @@ MIDDLEWARE = [
     'whitenoise.middleware.WhiteNoiseMiddleware',
 ]
 
-ROOT_URLCONF = 'banking_system.urls'
+# The ASGI application serves the async views (banking_system.urls_async)
+ROOT_URLCONF = os.getenv('DJANGO_ROOT_URLCONF', 'banking_system.urls')
 AUTH_USER_MODEL = 'accounts.User'
 
 TEMPLATES = [
@@ -113,6 +117,20 @@ else:
         }
     }
 
+# Read replica (see core.routers). Without DB_REPLICA_HOST the alias points at the
+# primary and nothing reads from it; tests run it against the default test database.
+DB_REPLICA_HOST = os.getenv('DB_REPLICA_HOST')
+DATABASES['replica'] = {
+    **DATABASES['default'],
+    'HOST': DB_REPLICA_HOST or DATABASES['default'].get('HOST'),
+    'PORT': os.getenv('DB_REPLICA_PORT') or DATABASES['default'].get('PORT'),
+    'TEST': {'MIRROR': 'default'},
+}
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+BANK_READ_REPLICAS = ['replica'] if DB_REPLICA_HOST else []
+# A client that wrote reads from the primary this long, until the replicas caught up
+BANK_REPLICA_STICKY_SECONDS = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
@@ -178,30 +196,150 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'accounts.tasks.check_credit_card_payments',
         'schedule': crontab(day_of_month='1', hour='0'),  # Start every month
     },
-    'calculate_interest': {
-        'task': 'calculate_interest',
-        # http://docs.celeryproject.org/en/latest/userguide/periodic-tasks.html
-        'schedule': crontab(day_of_month='1', hour='0'),
+    'monthly-credit-payments': {
+        'task': 'credits.tasks.process_monthly_payment',
+        'schedule': crontab(day_of_month='1', hour='0', minute='30'),
+    },
+    'refresh-fx-rates': {
+        'task': 'accounts.tasks.refresh_fx_rates',
+        'schedule': 300,
+    },
+    'checkpoint-ledger-balances': {
+        'task': 'accounts.tasks.checkpoint_ledger_balances',
+        'schedule': crontab(minute='30', hour='3'),
+    },
+    'purge-idempotency-keys': {
+        'task': 'core.tasks.purge_idempotency_keys',
+        'schedule': crontab(minute='0', hour='4'),
+    },
+    'purge-task-runs': {
+        'task': 'core.tasks.purge_task_runs',
+        'schedule': crontab(minute='15', hour='4'),
+    },
+    # Retries, and anything enqueued while the broker was unreachable
+    'send-outbox': {
+        'task': 'core.tasks.send_outbox',
+        'schedule': 60,
+    },
+    'purge-outbox': {
+        'task': 'core.tasks.purge_outbox',
+        'schedule': crontab(minute='30', hour='4'),
     },
-    'process-pending-deposits': {
-        'task': 'your_project.tasks.process_pending_deposits',
-        'schedule': 60,  # Set the schedule interval in seconds (e.g., every 10 minutes)
+    'create-payment-partitions': {
+        'task': 'accounts.tasks.create_payment_partitions',
+        'schedule': crontab(minute='45', hour='4'),
+    },
+    'archive-old-payments': {
+        'task': 'accounts.tasks.archive_old_payments',
+        'schedule': crontab(minute='0', hour='5'),
     },
 }
 
 CACHES = {
     'default': {
-        'BACKEND': 'django_redis.cache.RedisCache',
+        # django-redis with hit/miss counters (core.metrics)
+        'BACKEND': 'core.cache.RedisCache',
         'LOCATION': 'redis://127.0.0.1:18000/1'
     }
 }
 BANK_USER_CONFIRMATION_KEY = "user_confirmation_{token}"
 BANK_USER_CONFIRMATION_TIMEOUT = 300
 
+# Exchange rates are refreshed by celery beat and read from the cache only
+BANK_FX_RATES_URL = "https://belarusbank.by/api/kursExchange"
+BANK_FX_RATES_CACHE_KEY = "fx_rates"
+BANK_FX_RATES_TTL = 600  # seconds a fetched rate counts as fresh
+BANK_FX_RATES_STALE_TTL = 60 * 60 * 24  # how long a stale rate is still served
+BANK_FX_RATES_TIMEOUT = 3
+BANK_FX_BREAKER_THRESHOLD = 3
+BANK_FX_BREAKER_COOLDOWN = 300
+BANK_FX_DEFAULT_USD_RATE = "3.116"  # used until the first successful refresh
+
+# Cards locked and checkpointed per transaction by the ledger checkpoint run
+BANK_LEDGER_CHECKPOINT_BATCH_SIZE = 1000
+
+# Credits charged per transaction by the monthly repayment run
+BANK_REPAYMENT_BATCH_SIZE = 500
+
+# Month-end jobs are split into this many primary key ranges (see core.sharding)
+BANK_JOB_SHARDS = int(os.getenv('BANK_JOB_SHARDS', 4))
+
+# Issuer prefix of generated card numbers (see accounts.cardnumbers)
+BANK_CARD_BIN = "400000"
+BANK_CARD_ISSUE_BATCH_SIZE = 1000
+
+# Sessions are read from the cache and written through to the database
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+# The user of every request comes from the cache, dropped by accounts.signals when the row is saved
+AUTHENTICATION_BACKENDS = ['accounts.backends.CachedModelBackend']
+BANK_USER_CACHE_KEY = "user_{user_id}"
+BANK_USER_CACHE_TTL = 60 * 10
+
+# Per-user dashboard data, dropped by accounts.signals whenever it changes
+BANK_ACCOUNT_SUMMARY_KEY = "account_summary_{user_id}"
+BANK_ACCOUNT_SUMMARY_TTL = 60 * 10
+
+# Responses of retried payment, deposit and transfer POSTs are replayed for this long
+BANK_IDEMPOTENCY_KEY = "idempotency_{user_id}_{key}"
+BANK_IDEMPOTENCY_TTL = 60 * 60 * 24
+# A key still without a response this long after its claim was left by a dead worker and is reclaimed
+BANK_IDEMPOTENCY_CLAIM_TIMEOUT = 60 * 5
+
+# How long a worker reuses its last /readyz/ database and cache probe
+BANK_READINESS_CACHE_SECONDS = 5
+
+# Bearer token required by /metrics/, which is closed while it is unset
+BANK_METRICS_TOKEN = os.getenv('BANK_METRICS_TOKEN')
+
+# core.TaskRun rows older than this are deleted
+BANK_TASK_RUN_RETENTION_DAYS = 90
+
+# Most queries per request of views owned by other apps, by URL name (see core.querybudget)
+BANK_QUERY_BUDGETS = {
+    'admin:accounts_card_changelist': 5,
+    'admin:accounts_card_add': 6,
+    'admin:accounts_payment_changelist': 5,
+    'admin:accounts_payment_add': 6,
+    'admin:accounts_savingsgoal_changelist': 5,
+    'admin:accounts_savingsgoal_add': 6,
+    'admin:accounts_ledgerentry_changelist': 5,
+    'admin:accounts_ledgerentry_add': 6,
+    'admin:transactions_transaction_changelist': 5,
+    'admin:transactions_transaction_add': 7,
+    'admin:credits_credit_changelist': 5,
+    'admin:credits_credit_add': 7,
+}
+# check_budget raises instead of logging a warning, requests over budget are only ever logged
+BANK_QUERY_BUDGET_RAISE = os.getenv('DEBUG', '').lower() in ('1', 'true', 'yes')
+
+# Results of manage.py bench are compared with this file, a median more than
+# BANK_BENCH_TOLERANCE slower fails the run
+BANK_BENCH_BASELINE = BASE_DIR / 'bench_baseline.json'
+BANK_BENCH_TOLERANCE = 0.25
+
+BANK_DEPOSIT_APPROVAL_PAGE_SIZE = 100
+BANK_DEPOSIT_BATCH_SIZE = 1000  # cards settled per transaction by process_pending_deposits
+
+# Monthly partitions of the payment table created ahead of time (see accounts.partitions)
+BANK_PAYMENT_PARTITIONS_AHEAD = 3
+
+# Payments of months older than this are moved to gzip CSV files in default_storage (see accounts.archive).
+# Statements only look into the archive before this horizon, so it may be lowered but never raised.
+BANK_PAYMENT_ARCHIVE_MONTHS = 24
+
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.getenv('EMAIL')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_PASSWORD')
+EMAIL_TIMEOUT = 10
+
+# E-mails are saved to core.OutgoingEmail with the change they report on and
+# sent by core.tasks.send_outbox, BANK_EMAIL_BATCH_SIZE per transaction
+BANK_EMAIL_BATCH_SIZE = 50
+BANK_EMAIL_MAX_ATTEMPTS = 8
+BANK_EMAIL_RETRY_DELAY = 60  # seconds before the first retry, doubled after every failure
+BANK_EMAIL_RETRY_MAX_DELAY = 60 * 60
+BANK_EMAIL_RETENTION_DAYS = 30  # sent messages are deleted after this
 
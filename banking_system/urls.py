@@ -21,11 +21,15 @@ from django.contrib.auth.views import PasswordChangeView, PasswordResetView, Pas
 from django.urls import include, path
 
 from accounts.views import AccountLoginView, SignUpView
-from core.views import HomeView
+from core.metrics import metrics_view
+from core.views import HomeView, healthz, readyz
 
 
 urlpatterns = [
     path('', HomeView.as_view(), name='home'),
+    path('healthz/', healthz, name='healthz'),
+    path('readyz/', readyz, name='readyz'),
+    path('metrics/', metrics_view, name='metrics'),
     path('accounts/', include('accounts.urls', namespace='accounts')),
     path('admin/', admin.site.urls),
     path(
@@ -0,0 +1,20 @@
+"""
+URL configuration of the ASGI application: the same routes as
+``banking_system.urls`` with the money movement, statement and signup pages
+served by ``async def`` views. Selected by ``DJANGO_ROOT_URLCONF`` (see asgi.py).
+"""
+from django.urls import include, path
+
+from accounts.async_views import AsyncSignUpView
+from .urls import urlpatterns as sync_urlpatterns
+
+async_routes = {
+    'accounts': path('accounts/', include('accounts.urls_async', namespace='accounts')),
+    'transactions': path('transactions/', include('transactions.urls_async', namespace='transactions')),
+    'signup': path('signup/', AsyncSignUpView.as_view(), name='signup'),
+}
+
+urlpatterns = [
+    async_routes.get(getattr(pattern, 'namespace', None) or getattr(pattern, 'name', None), pattern)
+    for pattern in sync_urlpatterns
+]
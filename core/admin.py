@@ -1,3 +1,22 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import IdempotencyKey, OutgoingEmail, ShardedJobRun, TaskRun
+
+admin.site.register(ShardedJobRun)
+admin.site.register(IdempotencyKey)
+
+
+@admin.register(TaskRun)
+class TaskRunAdmin(admin.ModelAdmin):
+    list_display = ('task_name', 'state', 'started_at', 'runtime', 'queue_wait', 'rows', 'retries', 'hostname')
+    list_filter = ('state', 'task_name')
+    date_hierarchy = 'started_at'
+    ordering = ('-started_at',)
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'to', 'created_at', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = (('sent_at', admin.EmptyFieldListFilter),)
+    date_hierarchy = 'created_at'
+    ordering = ('-created_at',)
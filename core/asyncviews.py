@@ -0,0 +1,44 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404
+from django.shortcuts import render
+from django.urls import path
+
+# Templates may still run queries (forms, context processors)
+arender = sync_to_async(render)
+
+
+def load_user(request):
+    # Resolves the lazy request.user, afterwards it can be read from async code
+    request.user.is_authenticated
+    return request.user
+
+
+def alogin_required(view):
+    """``login_required`` for ``async def`` views."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await sync_to_async(load_user)(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path(), settings.LOGIN_URL)
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+async def aget_object_or_404(queryset, **kwargs):
+    obj = await queryset.filter(**kwargs).afirst()
+    if obj is None:
+        raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+    return obj
+
+
+def swap_views(urlpatterns, views):
+    """Copy of ``urlpatterns`` with the routes named in ``views`` pointing at the given views."""
+    return [
+        path(str(pattern.pattern), views[pattern.name], name=pattern.name)
+        if getattr(pattern, 'name', None) in views else pattern
+        for pattern in urlpatterns
+    ]
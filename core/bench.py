@@ -0,0 +1,171 @@
+"""
+Micro-benchmarks of the money operations (``manage.py bench``).
+
+Every benchmark runs against the database filled by ``seed_bank`` inside a
+transaction that is rolled back, so runs do not change the data and stay
+comparable. Timings are per call; ``compare`` flags the benchmarks whose
+median got slower than a stored baseline.
+"""
+import random
+import time
+from collections import namedtuple
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from accounts import rates
+from accounts.models import Card, Payment
+from accounts.statements import statement_page, statement_totals
+from accounts.utils import convert_currency
+from credits.models import Credit
+from credits.repayments import run_monthly_repayments
+from credits.views import calculate_monthly_payment
+from transactions.services import transfer_funds
+from .loadtest import percentile
+from .seeding import copy_rows
+
+BENCHMARKS = {}
+AMOUNT = Decimal('1.00')
+
+Regression = namedtuple('Regression', 'name baseline_ms current_ms ratio')
+
+
+class NotSeeded(Exception):
+    pass
+
+
+def benchmark(name):
+    def decorator(function):
+        BENCHMARKS[name] = function
+        return function
+    return decorator
+
+
+class Bench:
+    def __init__(self, repeat=200, credits=100_000, seed=0):
+        self.repeat = repeat
+        self.credits = credits
+        self.rng = random.Random(seed)
+
+    def measure(self, operation, number=1, repeat=None):
+        samples = []
+        for _ in range(repeat or self.repeat):
+            started = time.perf_counter()
+            for _ in range(number):
+                operation()
+            samples.append((time.perf_counter() - started) / number * 1000)
+        return {
+            'runs': len(samples),
+            'calls_per_run': number,
+            'p50_ms': round(percentile(samples, 0.5), 4),
+            'p95_ms': round(percentile(samples, 0.95), 4),
+            'min_ms': round(min(samples), 4),
+        }
+
+    def cards(self, count=50):
+        cards = list(Card.objects.filter(card_type='D', balance__gte=1000).order_by('id')[:count])
+        if len(cards) < 2:
+            raise NotSeeded("Not enough debit cards with money on them, run seed_bank first")
+        return cards
+
+    def run(self, names=None):
+        results = {}
+        for name in names or BENCHMARKS:
+            with transaction.atomic():
+                results[name] = BENCHMARKS[name](self)
+                # Leave the seeded data as it was for the next benchmark and the next run
+                transaction.set_rollback(True)
+        return {
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'results': results,
+        }
+
+
+@benchmark('make_payment')
+def bench_make_payment(bench):
+    cards = bench.cards()
+    return bench.measure(lambda: bench.rng.choice(cards).make_payment(AMOUNT, 'D'))
+
+
+@benchmark('transfer')
+def bench_transfer(bench):
+    cards = bench.cards()
+    rate = rates.get_usd_rate()
+
+    def transfer():
+        sender, receiver = bench.rng.sample(cards, 2)
+        transfer_funds(sender.id, receiver.id, AMOUNT, rate)
+    return bench.measure(transfer)
+
+
+@benchmark('statement')
+def bench_statement(bench):
+    # The busiest card, its statement pages through the most rows
+    busiest = Payment.objects.values('card').annotate(payments=Count('id')).order_by('-payments').first()
+    if busiest is None:
+        raise NotSeeded("No payments, run seed_bank first")
+    card = Card.objects.get(id=busiest['card'])
+    end = timezone.now()
+    start = end - timedelta(days=365)
+
+    def statement():
+        statement_page(card, start, end)
+        statement_totals(card, start, end)
+    return bench.measure(statement)
+
+
+@benchmark('calculate_monthly_payment')
+def bench_calculate_monthly_payment(bench):
+    amounts = [Decimal(bench.rng.randint(500, 50_000)) for _ in range(100)]
+    return bench.measure(lambda: [calculate_monthly_payment(amount) for amount in amounts], number=10)
+
+
+@benchmark('convert_currency')
+def bench_convert_currency(bench):
+    amounts = [Decimal(bench.rng.randint(1, 10_000)) / 100 for _ in range(100)]
+    rate = Decimal('3.116')
+    return bench.measure(lambda: [convert_currency(amount, 'USD', 'BYN', rate) for amount in amounts], number=10)
+
+
+@benchmark('month_end_repayments')
+def bench_month_end_repayments(bench):
+    cards = bench.cards(1000)
+    first_id = (Credit.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+    now = timezone.now()
+    rows = []
+    for i in range(bench.credits):
+        card = cards[i % len(cards)]
+        amount = Decimal(bench.rng.randint(500, 20_000))
+        rows.append((card.user_id, amount, 5, 12, calculate_monthly_payment(amount), amount, 'APPROVED',
+                     card.id, now, now))
+    copy_rows(Credit, ('user', 'amount', 'interest_rate', 'term_months', 'monthly_payment', 'remaining_amount',
+                       'status', 'card', 'created_at', 'updated_at'), rows)
+
+    # A month nobody has been charged for yet, only the credits created above are in range
+    period = (timezone.localdate().replace(day=1) + timedelta(days=400)).replace(day=1)
+    started = time.perf_counter()
+    run = run_monthly_repayments(period, lo=first_id)
+    seconds = time.perf_counter() - started
+    return {
+        'runs': 1,
+        'credits': run.processed,
+        'p50_ms': round(seconds * 1000, 1),
+        'credits_per_second': round(run.processed / seconds) if seconds else None,
+    }
+
+
+def compare(results, baseline, tolerance=0.25):
+    """Benchmarks whose median is more than ``tolerance`` slower than in ``baseline``."""
+    regressions = []
+    for name, result in results['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if not before or not before.get('p50_ms'):
+            continue
+        ratio = result['p50_ms'] / before['p50_ms']
+        if ratio > 1 + tolerance:
+            regressions.append(Regression(name, before['p50_ms'], result['p50_ms'], round(ratio, 2)))
+    return regressions
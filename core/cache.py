@@ -0,0 +1,30 @@
+from django.core.cache.backends.locmem import LocMemCache as DjangoLocMemCache
+from django_redis.cache import RedisCache as DjangoRedisCache
+
+from .metrics import CACHE_REQUESTS
+
+MISSING = object()
+
+
+class CacheMetricsMixin:
+    """Counts hits and misses of cache reads in ``bank_cache_requests_total``."""
+    def get(self, key, default=None, version=None, **kwargs):
+        value = super().get(key, MISSING, version=version, **kwargs)
+        CACHE_REQUESTS.labels('miss' if value is MISSING else 'hit').inc()
+        return default if value is MISSING else value
+
+
+class RedisCache(CacheMetricsMixin, DjangoRedisCache):
+    def get_many(self, keys, version=None, **kwargs):
+        # django-redis reads all keys with one MGET instead of going through get()
+        keys = list(keys)
+        found = super().get_many(keys, version=version, **kwargs)
+        if found:
+            CACHE_REQUESTS.labels('hit').inc(len(found))
+        if len(keys) > len(found):
+            CACHE_REQUESTS.labels('miss').inc(len(keys) - len(found))
+        return found
+
+
+class LocMemCache(CacheMetricsMixin, DjangoLocMemCache):
+    pass
@@ -0,0 +1,15 @@
+from django.core import checks
+
+from .taskruns import unknown_beat_tasks
+
+
+@checks.register('celery')
+def check_beat_schedule(app_configs, **kwargs):
+    return [
+        checks.Error(
+            f"Beat entry {name!r} runs {task!r}, which is not a registered task.",
+            hint="Fix the task name in CELERY_BEAT_SCHEDULE.",
+            id='core.E001',
+        )
+        for name, task in sorted(unknown_beat_tasks().items())
+    ]
@@ -0,0 +1,63 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_last_result = None
+_last_checked = 0.0
+
+
+def probe_database():
+    for alias in [DEFAULT_DB_ALIAS] + settings.BANK_READ_REPLICAS:
+        with connections[alias].cursor() as cursor:
+            cursor.execute("SELECT 1")
+
+
+def probe_cache():
+    cache.set('readiness_probe', 1, 10)
+    if cache.get('readiness_probe') != 1:
+        raise RuntimeError("cache did not return the probe value")
+
+
+PROBES = {
+    'database': probe_database,
+    'cache': probe_cache,
+}
+
+
+def run_probes():
+    results = {}
+    for name, probe in PROBES.items():
+        try:
+            probe()
+            results[name] = 'ok'
+        except Exception as e:
+            logger.warning(f"Readiness probe {name} failed: {e}")
+            results[name] = 'error'
+    return results
+
+
+def readiness():
+    """
+    Probe results, rerun at most every ``BANK_READINESS_CACHE_SECONDS`` per
+    worker so frequent orchestrator checks do not add database load.
+    """
+    global _last_result, _last_checked
+
+    with _lock:
+        if _last_result is None or time.monotonic() - _last_checked >= settings.BANK_READINESS_CACHE_SECONDS:
+            _last_result = run_probes()
+            _last_checked = time.monotonic()
+        return _last_result
+
+
+def reset():
+    global _last_result
+    with _lock:
+        _last_result = None
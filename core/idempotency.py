@@ -0,0 +1,157 @@
+import asyncio
+import logging
+from datetime import timedelta
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'Idempotency-Key'
+FIELD = 'idempotency_key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+# Response headers worth replaying, cookies and the like belong to the first request
+STORED_HEADERS = ('Content-Type', 'Location')
+
+
+def cache_key(user_id, key):
+    return settings.BANK_IDEMPOTENCY_KEY.format(user_id=user_id, key=key)
+
+
+def cache_get(key):
+    # The table is the source of truth, the cache only saves the query
+    try:
+        return cache.get(key)
+    except Exception as e:
+        logger.warning(f"Idempotency cache read failed: {e}")
+        return None
+
+
+def cache_set(key, value):
+    try:
+        cache.set(key, value, settings.BANK_IDEMPOTENCY_TTL)
+    except Exception as e:
+        logger.warning(f"Idempotency cache write failed: {e}")
+
+
+def store(response):
+    return {
+        'status': response.status_code,
+        'content': response.content.decode(response.charset),
+        'headers': {name: response[name] for name in STORED_HEADERS if response.has_header(name)},
+    }
+
+
+def replay(stored):
+    response = HttpResponse(stored['content'], status=stored['status'])
+    for name, value in stored['headers'].items():
+        response[name] = value
+    response[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def begin(request):
+    """
+    Claim the request's key. Returns ``(response, record)``: a response to
+    send instead of running the view, or the claimed row (both ``None`` when
+    the request carries no key).
+    """
+    key = request.headers.get(HEADER) or request.POST.get(FIELD)
+    if request.method != 'POST' or not key or not request.user.is_authenticated:
+        return None, None
+    if len(key) > IdempotencyKey._meta.get_field('key').max_length:
+        return HttpResponseBadRequest("Idempotency key is too long"), None
+
+    stored = cache_get(cache_key(request.user.pk, key))
+    if stored is not None:
+        return replay(stored), None
+
+    try:
+        with transaction.atomic():
+            return None, IdempotencyKey.objects.create(user=request.user, key=key, path=request.path)
+    except IntegrityError:
+        record = IdempotencyKey.objects.get(user=request.user, key=key)
+        if record.path != request.path:
+            return HttpResponse("Idempotency key was used for another request", status=422), None
+        if record.response is None:
+            if reclaim(record):
+                return None, record
+            return HttpResponse("A request with this idempotency key is in progress", status=409), None
+        cache_set(cache_key(request.user.pk, key), record.response)
+        return replay(record.response), None
+
+
+def reclaim(record):
+    """
+    Take over a claim older than ``BANK_IDEMPOTENCY_CLAIM_TIMEOUT``, well past
+    the worker timeout. Of concurrent retries only one updates the row.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.BANK_IDEMPOTENCY_CLAIM_TIMEOUT)
+    reclaimed = IdempotencyKey.objects.filter(
+        pk=record.pk, response__isnull=True, claimed_at__lt=stale,
+    ).update(claimed_at=now)
+    if reclaimed:
+        record.claimed_at = now
+        logger.warning(f"Reclaimed idempotency key {record.key} of user {record.user_id}, its request never finished")
+    return bool(reclaimed)
+
+
+def finish(record, response):
+    if response is None or response.streaming or response.status_code >= 500:
+        # Nothing was committed for the key, the client may retry it
+        record.delete()
+        return
+
+    record.response = store(response)
+    record.save(update_fields=['response'])
+    cache_set(cache_key(record.user_id, record.key), record.response)
+
+
+def idempotent(view):
+    """
+    Run a POST once per ``Idempotency-Key`` header (or hidden form token) and
+    user, replaying the stored response for retries.
+
+    A retry of a finished request costs one cache read. A retry that arrives
+    while the first request is still running gets 409 instead of running twice,
+    unless the claim is so old that its worker must have died.
+    Requests without a key are not affected. Works for sync and async views.
+    """
+    if asyncio.iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            response, record = await sync_to_async(begin)(request)
+            if record is None:
+                return response or await view(request, *args, **kwargs)
+            try:
+                response = await view(request, *args, **kwargs)
+            finally:
+                await sync_to_async(finish)(record, response)
+            return response
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response, record = begin(request)
+        if record is None:
+            return response or view(request, *args, **kwargs)
+        try:
+            response = view(request, *args, **kwargs)
+        finally:
+            finish(record, response)
+        return response
+    return wrapper
+
+
+def purge_expired_keys():
+    expired = timezone.now() - timedelta(seconds=settings.BANK_IDEMPOTENCY_TTL)
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=expired).delete()
+    return deleted
@@ -0,0 +1,220 @@
+"""
+A small closed-loop load generator: ``concurrency`` clients each send their
+share of ``requests`` back to back, so the server always has exactly that
+many requests in flight.
+
+``run`` hammers one URL. ``run_scenario`` logs seeded users in (password and
+TOTP token, see ``core.seeding``) and replays what customers do: open the
+card list and statements, transfer money and pay.
+"""
+import math
+import random
+import threading
+import time
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import requests
+from django.urls import reverse
+
+
+def percentile(latencies, fraction):
+    if not latencies:
+        return None
+    ordered = sorted(latencies)
+    return ordered[min(math.ceil(fraction * len(ordered)) - 1, len(ordered) - 1)]
+
+
+def run(url, concurrency=32, total=1000, method='GET', data=None, headers=None, cookies=None, timeout=30):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def client(count):
+        session = requests.Session()
+        session.headers.update(headers or {})
+        session.cookies.update(cookies or {})
+        for _ in range(count):
+            started = time.perf_counter()
+            try:
+                response = session.request(method, url, data=data, timeout=timeout, allow_redirects=False)
+                failed = response.status_code >= 400
+            except requests.RequestException:
+                failed = True
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if failed:
+                    errors.append(elapsed)
+
+    shares = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(client, shares))
+    seconds = time.perf_counter() - started
+
+    return {'url': url, 'concurrency': concurrency, **summarize(latencies, len(errors), seconds)}
+
+
+def milliseconds(seconds):
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+def summarize(latencies, errors, seconds):
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'seconds': round(seconds, 3),
+        'rps': round(len(latencies) / seconds, 1) if seconds else None,
+        'p50_ms': milliseconds(percentile(latencies, 0.5)),
+        'p95_ms': milliseconds(percentile(latencies, 0.95)),
+        'p99_ms': milliseconds(percentile(latencies, 0.99)),
+    }
+
+
+class Client:
+    """One logged in customer, recording the latency of every request by step."""
+    def __init__(self, base_url, user, record, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.user = user
+        self.record = record
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def request(self, step, method, path, data=None, params=None, expect=None):
+        headers = {'X-CSRFToken': self.session.cookies.get('csrftoken', '')} if method == 'POST' else None
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, data=data, params=params,
+                                            headers=headers, timeout=self.timeout, allow_redirects=False)
+            failed = response.status_code >= 400 or (expect is not None and response.status_code != expect)
+        except requests.RequestException:
+            response, failed = None, True
+        self.record(step, time.perf_counter() - started, failed)
+        return response
+
+    def login(self):
+        path = reverse('accounts:login')
+        # The form sets the CSRF cookie
+        self.request('login_form', 'GET', path)
+        response = self.request('login', 'POST', path, expect=302, data={
+            'username': self.user.email,
+            'password': self.user.password,
+            'otp_device': self.user.device_id,
+            'otp_token': self.user.token(),
+        })
+        return response is not None and response.status_code == 302
+
+
+def card_list(client, rng, receivers):
+    client.request('card_list', 'GET', reverse('accounts:card_list'), expect=200)
+
+
+def statement(client, rng, receivers):
+    card = rng.choice(client.user.cards)
+    end, start = date.today(), date.today() - timedelta(days=rng.choice((30, 90, 365)))
+    client.request('statement', 'GET', reverse('accounts:card_history', args=[card.id]), expect=200, params={
+        'start_date_year': start.year, 'start_date_month': start.month, 'start_date_day': start.day,
+        'end_date_year': end.year, 'end_date_month': end.month, 'end_date_day': end.day,
+    })
+
+
+def transfer(client, rng, receivers):
+    client.request('transfer', 'POST', reverse('transactions:fund_transfer'), expect=302, data={
+        'card': rng.choice(client.user.cards).id,
+        'receiver_account_number': rng.choice(receivers),
+        'amount': '1.00',
+    })
+
+
+def payment(client, rng, receivers):
+    client.request('payment', 'POST', reverse('accounts:make_payment'), expect=302, data={
+        'card': rng.choice(client.user.cards).id,
+        'amount': '1.00',
+    })
+
+
+# ``relogin``: every iteration logs in as the next seeded user, otherwise
+# each client logs in once and then runs the weighted actions
+Scenario = namedtuple('Scenario', 'actions relogin')
+
+SCENARIOS = {
+    'login': Scenario({}, relogin=True),
+    'card_list': Scenario({card_list: 1}, relogin=False),
+    'statement': Scenario({statement: 1}, relogin=False),
+    'transfer': Scenario({transfer: 1}, relogin=False),
+    'payment': Scenario({payment: 1}, relogin=False),
+    'mixed': Scenario({card_list: 40, statement: 30, transfer: 15, payment: 15}, relogin=False),
+}
+
+
+def users_needed(scenario, concurrency, iterations):
+    # A TOTP token is accepted once, so a user logs in at most once per run
+    return iterations if SCENARIOS[scenario].relogin else concurrency
+
+
+def run_scenario(base_url, scenario, users, concurrency=8, iterations=200, seed=0, timeout=30):
+    """
+    Run ``iterations`` of ``scenario`` over ``concurrency`` clients logged in
+    as ``users`` (``core.seeding.virtual_users``). Returns the totals and,
+    under ``steps``, the requests, errors and latency percentiles of each
+    kind of request.
+    """
+    scenario_name, scenario = scenario, SCENARIOS[scenario]
+    if len(users) < users_needed(scenario_name, concurrency, iterations):
+        raise ValueError(f"{scenario_name} needs {users_needed(scenario_name, concurrency, iterations)} "
+                         f"seeded users, got {len(users)}")
+
+    receivers = [card.account_no for user in users for card in user.cards]
+    actions, weights = list(scenario.actions), list(scenario.actions.values())
+    steps = defaultdict(lambda: ([], []))
+    lock = threading.Lock()
+    pool = iter(users)
+
+    def record(step, elapsed, failed):
+        with lock:
+            latencies, errors = steps[step]
+            latencies.append(elapsed)
+            if failed:
+                errors.append(elapsed)
+
+    def next_user():
+        with lock:
+            return next(pool, None)
+
+    def customer_loop(worker):
+        count, rng = worker
+        customer = None
+        for _ in range(count):
+            if customer is None or scenario.relogin:
+                user = next_user()
+                if user is None:
+                    return
+                customer = Client(base_url, user, record, timeout)
+                if not customer.login():
+                    customer = None
+                    continue
+            if actions:
+                rng.choices(actions, weights)[0](customer, rng, receivers)
+
+    workers = [
+        (iterations // concurrency + (1 if i < iterations % concurrency else 0), random.Random(f"{seed}-{i}"))
+        for i in range(concurrency)
+    ]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(customer_loop, workers))
+    seconds = time.perf_counter() - started
+
+    everything = [latency for latencies, _ in steps.values() for latency in latencies]
+    return {
+        'scenario': scenario_name,
+        'concurrency': concurrency,
+        'iterations': iterations,
+        **summarize(everything, sum(len(errors) for _, errors in steps.values()), seconds),
+        'steps': {
+            step: summarize(latencies, len(errors), seconds)
+            for step, (latencies, errors) in sorted(steps.items())
+        },
+    }
@@ -0,0 +1,65 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import bench
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the money operations on a database filled by seed_bank, write the results as JSON "
+        "and fail when a benchmark got slower than the stored baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', metavar='benchmark', help=f"Any of {', '.join(bench.BENCHMARKS)}")
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--credits', type=int, default=100_000, help="Credits charged by month_end_repayments")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Write the results to this JSON file")
+        parser.add_argument('--baseline', default=str(settings.BANK_BENCH_BASELINE))
+        parser.add_argument('--update-baseline', action='store_true', help="Store these results as the baseline")
+        parser.add_argument('--tolerance', type=float, default=settings.BANK_BENCH_TOLERANCE,
+                            help="Allowed slowdown of the median, 0.25 is 25%%")
+
+    def handle(self, *args, **options):
+        unknown = set(options['names']) - set(bench.BENCHMARKS)
+        if unknown:
+            raise CommandError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+        runner = bench.Bench(repeat=options['repeat'], credits=options['credits'], seed=options['seed'])
+        try:
+            results = runner.run(options['names'])
+        except bench.NotSeeded as e:
+            raise CommandError(str(e))
+
+        baseline = self.load(options['baseline'])
+        self.stdout.write(f"{'benchmark':<28}{'p50 ms':>12}{'p95 ms':>12}{'baseline':>12}")
+        for name, result in results['results'].items():
+            before = baseline.get('results', {}).get(name, {}).get('p50_ms', '-')
+            self.stdout.write(f"{name:<28}{result['p50_ms']:>12}{result.get('p95_ms', '-'):>12}{before:>12}")
+
+        if options['output']:
+            self.dump(results, options['output'])
+        if options['update_baseline']:
+            self.dump(results, options['baseline'])
+            self.stdout.write(f"Baseline stored in {options['baseline']}")
+            return
+
+        regressions = bench.compare(results, baseline, options['tolerance'])
+        if regressions:
+            raise CommandError("Slower than the baseline: " + ", ".join(
+                f"{r.name} {r.baseline_ms} -> {r.current_ms} ms (x{r.ratio})" for r in regressions
+            ))
+
+    def load(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def dump(self, results, path):
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,69 @@
+import os
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+
+# Any constant works, it only has to be the same for every container
+MIGRATION_LOCK_ID = 7301
+
+
+class Command(BaseCommand):
+    help = (
+        "Prepare the database for serving: apply pending migrations and create the "
+        "superuser from DJANGO_SUPERUSER_EMAIL/DJANGO_SUPERUSER_PASSWORD. Both steps "
+        "are skipped with a single query each when there is nothing to do."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help="Exit with an error instead of migrating when migrations are pending")
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        database = options['database']
+
+        if self.pending_migrations(database):
+            if options['check']:
+                raise CommandError("Unapplied migrations")
+            # Containers starting together must not run the same migrations twice
+            with self.migration_lock(database):
+                if self.pending_migrations(database):
+                    call_command('migrate', database=database, interactive=False, verbosity=options['verbosity'])
+        else:
+            self.stdout.write("No migrations to apply.")
+
+        self.ensure_superuser(database)
+
+    def pending_migrations(self, database):
+        executor = MigrationExecutor(connections[database])
+        return executor.migration_plan(executor.loader.graph.leaf_nodes())
+
+    @contextmanager
+    def migration_lock(self, database):
+        connection = connections[database]
+        if connection.vendor != 'postgresql':
+            yield
+            return
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(%s)", [MIGRATION_LOCK_ID])
+        try:
+            yield
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", [MIGRATION_LOCK_ID])
+
+    def ensure_superuser(self, database):
+        email = os.getenv('DJANGO_SUPERUSER_EMAIL')
+        password = os.getenv('DJANGO_SUPERUSER_PASSWORD')
+        if not email or not password:
+            return
+
+        User = get_user_model()
+        if User.objects.using(database).filter(email=email).exists():
+            return
+        User.objects.db_manager(database).create_superuser(email, password)
+        self.stdout.write(f"Created superuser {email}.")
@@ -0,0 +1,76 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import loadtest, seeding
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare requests per second and p99 latency of the same path on several "
+        "running servers, e.g. --target wsgi=http://127.0.0.1:8000 --target asgi=http://127.0.0.1:8001. "
+        "With --scenario, users created by seed_bank log in and replay customer traffic instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', required=True, metavar='NAME=BASE_URL')
+        parser.add_argument('--path', default='/')
+        parser.add_argument('--method', default='GET')
+        parser.add_argument('--data', action='append', default=[], metavar='FIELD=VALUE',
+                            help="Form field sent with every request")
+        parser.add_argument('--cookie', action='append', default=[], metavar='NAME=VALUE',
+                            help="e.g. the sessionid of a logged in user")
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--requests', type=int, default=1000,
+                            help="Requests, or scenario iterations with --scenario")
+        parser.add_argument('--warmup', type=int, default=50)
+        parser.add_argument('--scenario', choices=sorted(loadtest.SCENARIOS))
+        parser.add_argument('--prefix', default='seed', help="E-mail prefix of the seeded users")
+        parser.add_argument('--password', default=seeding.DEFAULT_PASSWORD)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        targets = [self.pair(target) for target in options['target']]
+        if options['scenario']:
+            return self.run_scenario(targets, options)
+
+        cookies = dict(self.pair(cookie) for cookie in options['cookie'])
+        data = dict(self.pair(field) for field in options['data']) or None
+
+        self.stdout.write(f"{'target':<12}{'rps':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for name, base_url in targets:
+            url = base_url.rstrip('/') + options['path']
+            run_options = dict(method=options['method'], data=data, cookies=cookies,
+                               concurrency=options['concurrency'])
+            if options['warmup']:
+                loadtest.run(url, total=options['warmup'], **run_options)
+            result = loadtest.run(url, total=options['requests'], **run_options)
+            self.stdout.write(
+                f"{name:<12}{result['rps']:>10}{result['p50_ms']:>10}{result['p99_ms']:>10}{result['errors']:>8}"
+            )
+
+    def run_scenario(self, targets, options):
+        scenario, concurrency, iterations = options['scenario'], options['concurrency'], options['requests']
+        needed = loadtest.users_needed(scenario, concurrency, iterations)
+        # Every target gets users of its own, a TOTP token is accepted only once
+        users = seeding.virtual_users(needed * len(targets), options['prefix'], options['password'])
+        if len(users) < needed * len(targets):
+            raise CommandError(f"{scenario} needs {needed * len(targets)} seeded users, found {len(users)}. "
+                               f"Create more with seed_bank.")
+
+        self.stdout.write(f"{'target':<12}{'step':<16}{'requests':>10}{'rps':>10}"
+                          f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for index, (name, base_url) in enumerate(targets):
+            result = loadtest.run_scenario(
+                base_url, scenario, users[index * needed:(index + 1) * needed],
+                concurrency=concurrency, iterations=iterations, seed=options['seed'],
+            )
+            for step, stats in [('total', result)] + list(result['steps'].items()):
+                self.stdout.write(
+                    f"{name:<12}{step:<16}{stats['requests']:>10}{stats['rps']:>10}{stats['p50_ms']:>10}"
+                    f"{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats['errors']:>8}"
+                )
+
+    def pair(self, value):
+        name, sep, rest = value.partition('=')
+        if not sep:
+            raise CommandError(f"Expected NAME=VALUE, got {value!r}")
+        return name, rest
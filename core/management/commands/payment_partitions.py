@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts import partitions
+
+
+def month(value):
+    try:
+        return datetime.strptime(value, '%Y-%m').date()
+    except ValueError:
+        raise CommandError(f"Expected a month as YYYY-MM, got {value!r}")
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the monthly partitions of the payment table up to --ahead months from now, "
+        "or detach (and drop) an old month, then list the partitions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, help="Months after the current one, BANK_PAYMENT_PARTITIONS_AHEAD by default")
+        parser.add_argument('--detach', metavar='YYYY-MM', help="Take this month out of the payment table")
+        parser.add_argument('--drop', action='store_true', help="Drop the detached partition")
+
+    def handle(self, *args, **options):
+        if not partitions.is_partitioned():
+            raise CommandError("The payment table is not partitioned, migrate a PostgreSQL database first")
+
+        if options['detach']:
+            name = partitions.detach_partition(month(options['detach']), drop=options['drop'])
+            self.stdout.write(f"{'Dropped' if options['drop'] else 'Detached'} {name}")
+        else:
+            for name in partitions.ensure_partitions(months_ahead=options['ahead']):
+                self.stdout.write(f"Created {name}")
+
+        for name in partitions.partitions():
+            self.stdout.write(name)
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from core import seeding
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic users with cards, payments, credits and savings goals for load tests. "
+        "The same --seed always generates the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--payments-per-card', type=int, default=20, help="Mean, the counts are exponential")
+        parser.add_argument('--credit-share', type=float, default=0.2, help="Share of users with a credit")
+        parser.add_argument('--goal-share', type=float, default=0.3, help="Share of users saving for a goal")
+        parser.add_argument('--days', type=int, default=365, help="How far back the payments go")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--prefix', default='seed', help="E-mails are <prefix><n>@example.com")
+        parser.add_argument('--password', default=seeding.DEFAULT_PASSWORD)
+        parser.add_argument('--batch-size', type=int, default=1000, help="Users created per transaction")
+
+    def handle(self, *args, **options):
+        counts = seeding.seed_bank(
+            options['users'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            log=self.stdout.write,
+            payments_per_card=options['payments_per_card'],
+            credit_share=options['credit_share'],
+            goal_share=options['goal_share'],
+            days=options['days'],
+            prefix=options['prefix'],
+            password=options['password'],
+        )
+        self.stdout.write(self.style.SUCCESS(", ".join(f"{count} {name}" for name, count in counts.items())))
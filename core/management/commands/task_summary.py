@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import TaskRun
+
+
+def seconds(value):
+    return f"{value:.2f}" if value is not None else '-'
+
+
+class Command(BaseCommand):
+    help = "Per task runtime, queue wait, rows, retries and failures of the recent celery runs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7)
+        parser.add_argument('--task', help="Only tasks whose name contains this")
+
+    def handle(self, *args, **options):
+        runs = TaskRun.objects.filter(started_at__gte=timezone.now() - timedelta(days=options['days']))
+        if options['task']:
+            runs = runs.filter(task_name__contains=options['task'])
+
+        self.stdout.write(
+            f"{'task':<50}{'runs':>6}{'failed':>8}{'retry':>7}{'rows':>10}"
+            f"{'avg s':>9}{'max s':>9}{'wait s':>9}"
+        )
+        for row in runs.summary():
+            self.stdout.write(
+                f"{row['task_name']:<50}{row['runs']:>6}{row['failures']:>8}{row['retries']:>7}"
+                f"{row['rows'] or 0:>10}{seconds(row['avg_runtime']):>9}{seconds(row['max_runtime']):>9}"
+                f"{seconds(row['avg_queue_wait']):>9}"
+            )
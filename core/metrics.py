@@ -0,0 +1,157 @@
+"""
+Prometheus metrics of the web workers.
+
+Under gunicorn every worker writes its samples to ``PROMETHEUS_MULTIPROC_DIR``
+(see gunicorn.conf.py) and ``/metrics`` aggregates the files, so any worker
+can answer the scrape. Without the variable the process registry is served.
+The endpoint is closed unless ``BANK_METRICS_TOKEN`` is set.
+"""
+import os
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess,
+)
+
+REQUESTS = Counter(
+    'bank_requests_total', "HTTP responses by URL name", ['view', 'method', 'status'],
+)
+REQUEST_LATENCY = Histogram(
+    'bank_request_seconds', "Request latency by URL name", ['view', 'method'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUEST_QUERIES = Histogram(
+    'bank_request_db_queries', "Database queries per request", ['view'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250),
+)
+REQUEST_DB_TIME = Histogram(
+    'bank_request_db_seconds', "Time spent in database queries per request", ['view'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+CACHE_REQUESTS = Counter(
+    'bank_cache_requests_total', "Cache reads by result", ['result'],
+)
+
+UNRESOLVED = '<unresolved>'
+
+# Any other method is counted as 'other', clients choose it
+METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+
+# Timers measuring in this context. A connection shared between threads (the live
+# test server on in-memory SQLite) also runs the queries of other requests.
+_timers = ContextVar('query_timers', default=())
+
+
+class QueryTimer:
+    """``execute_wrapper`` counting the queries of one request and their time."""
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    @contextmanager
+    def measure(self):
+        previous = _timers.get()
+        _timers.set(previous + (self,))
+        self.install()
+        try:
+            yield self
+        finally:
+            self.uninstall()
+            _timers.set(previous)
+
+    @asynccontextmanager
+    async def ameasure(self):
+        # Connections belong to a thread, the sync views and the async ORM
+        # run their queries in the thread of sync_to_async
+        previous = _timers.get()
+        _timers.set(previous + (self,))
+        await sync_to_async(self.install)()
+        try:
+            yield self
+        finally:
+            await sync_to_async(self.uninstall)()
+            _timers.set(previous)
+
+    def install(self):
+        for alias in connections:
+            connections[alias].execute_wrappers.append(self)
+
+    def uninstall(self):
+        # Not pop(): concurrent async requests share the connections of that thread
+        for alias in connections:
+            connections[alias].execute_wrappers.remove(self)
+
+    def __call__(self, execute, sql, params, many, context):
+        if self not in _timers.get():
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None and match.view_name else UNRESOLVED
+
+
+def method_name(request):
+    return request.method if request.method in METHODS else 'other'
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer = QueryTimer()
+        started = time.perf_counter()
+        with timer.measure():
+            response = self.get_response(request)
+        self.observe(request, response, timer, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        timer = QueryTimer()
+        started = time.perf_counter()
+        async with timer.ameasure():
+            response = await self.get_response(request)
+        self.observe(request, response, timer, time.perf_counter() - started)
+        return response
+
+    def observe(self, request, response, timer, elapsed):
+        view, method = view_name(request), method_name(request)
+        REQUESTS.labels(view, method, response.status_code).inc()
+        REQUEST_LATENCY.labels(view, method).observe(elapsed)
+        REQUEST_QUERIES.labels(view).observe(timer.count)
+        REQUEST_DB_TIME.labels(view).observe(timer.seconds)
+
+
+def registry():
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        collector_registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(collector_registry)
+        return collector_registry
+    return REGISTRY
+
+
+def metrics_view(request):
+    token = settings.BANK_METRICS_TOKEN
+    if not token or request.headers.get('Authorization') != f"Bearer {token}":
+        return HttpResponseForbidden()
+    return HttpResponse(generate_latest(registry()), content_type=CONTENT_TYPE_LATEST)
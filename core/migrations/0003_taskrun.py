@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_name', models.CharField(max_length=200)),
+                ('task_id', models.CharField(max_length=255)),
+                ('state', models.CharField(max_length=20)),
+                ('started_at', models.DateTimeField()),
+                ('runtime', models.FloatField()),
+                ('queue_wait', models.FloatField(blank=True, null=True)),
+                ('rows', models.PositiveIntegerField(blank=True, null=True)),
+                ('retries', models.PositiveIntegerField(default=0)),
+                ('hostname', models.CharField(blank=True, max_length=255)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['task_name', 'started_at'], name='taskrun_task_started_idx'), models.Index(fields=['started_at'], name='taskrun_started_idx')],
+            },
+        ),
+    ]
@@ -1,3 +1,122 @@
+from django.conf import settings
+from django.core.mail import EmailMessage
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class ShardedJobRun(models.Model):
+    """One run of a sharded month-end job with the timing of every shard."""
+    job = models.CharField(max_length=100)
+    shard_count = models.PositiveIntegerField()
+    rows = models.PositiveIntegerField(default=0)
+    # [{'lo': ..., 'hi': ..., 'rows': ..., 'seconds': ...}, ...]
+    shards = models.JSONField(default=list)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['job', 'started_at'], name='shardedjobrun_job_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.job} ({self.started_at:%Y-%m-%d %H:%M})"
+
+
+class IdempotencyKey(models.Model):
+    """
+    A client supplied key of a POST and the response it got. The unique
+    index makes concurrent duplicates lose the race for the row.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='idempotency_keys',
+        on_delete=models.CASCADE,
+    )
+    key = models.CharField(max_length=64)
+    path = models.CharField(max_length=200)
+    # {'status': ..., 'content': ..., 'headers': {...}}, empty while the request runs
+    response = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # When a request last took the key, a claim left by a dead worker expires
+    claimed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotencykey_user_key_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['created_at'], name='idempotencykey_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.key} {self.path}"
+
+
+class TaskRunQuerySet(models.QuerySet):
+    def summary(self):
+        """Per task totals of the runs in the queryset, slowest tasks first."""
+        return self.values('task_name').annotate(
+            runs=models.Count('id'),
+            failures=models.Count('id', filter=models.Q(state='FAILURE')),
+            retries=models.Count('id', filter=models.Q(state='RETRY')),
+            rows=models.Sum('rows'),
+            avg_runtime=models.Avg('runtime'),
+            max_runtime=models.Max('runtime'),
+            avg_queue_wait=models.Avg('queue_wait'),
+        ).order_by('-max_runtime')
+
+
+class TaskRun(models.Model):
+    """One execution of a celery task, written by the signal handlers in core.taskruns."""
+    task_name = models.CharField(max_length=200)
+    task_id = models.CharField(max_length=255)
+    state = models.CharField(max_length=20)
+    started_at = models.DateTimeField()
+    runtime = models.FloatField()
+    # Seconds between publishing and the worker starting it, unknown for eager calls
+    queue_wait = models.FloatField(null=True, blank=True)
+    rows = models.PositiveIntegerField(null=True, blank=True)
+    retries = models.PositiveIntegerField(default=0)
+    hostname = models.CharField(max_length=255, blank=True)
+
+    objects = TaskRunQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['task_name', 'started_at'], name='taskrun_task_started_idx'),
+            models.Index(fields=['started_at'], name='taskrun_started_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task_name} {self.state} ({self.started_at:%Y-%m-%d %H:%M})"
+
+
+class OutgoingEmail(models.Model):
+    """An e-mail saved with the change it reports on, sent later by core.outbox."""
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    content_subtype = models.CharField(max_length=20, default='plain')
+    from_email = models.CharField(max_length=255, blank=True)
+    to = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Only unsent messages are looked up by due time
+            models.Index(fields=['next_attempt_at'], condition=models.Q(sent_at__isnull=True),
+                         name='outgoingemail_due_idx'),
+            models.Index(fields=['sent_at'], name='outgoingemail_sent_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {', '.join(self.to)}"
+
+    def message(self, connection=None):
+        message = EmailMessage(self.subject, self.body, self.from_email or None, self.to, connection=connection)
+        message.content_subtype = self.content_subtype
+        return message
@@ -0,0 +1,127 @@
+"""
+Transactional e-mail outbox.
+
+``enqueue`` saves a message in the transaction of the change it reports on,
+so a signup that rolls back sends nothing and a committed one cannot lose
+its e-mail. Requests never wait for the mail server: ``drain``, run by the
+``core.tasks.send_outbox`` celery task, sends due messages in batches over
+one SMTP session. Failures are retried with exponential backoff, several
+workers can drain at once since locked rows are skipped.
+"""
+import logging
+import smtplib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+# Refused by the server for this message only, the connection is still usable
+MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+
+def enqueue(message):
+    email = OutgoingEmail.objects.create(
+        subject=message.subject,
+        body=message.body,
+        content_subtype=message.content_subtype,
+        from_email=message.from_email or '',
+        to=list(message.to),
+    )
+    transaction.on_commit(send_soon)
+    return email
+
+
+def send_soon():
+    from .tasks import send_outbox
+    try:
+        send_outbox.delay()
+    except Exception as e:
+        # The beat schedule drains the outbox every minute anyway
+        logger.warning(f"Could not queue the outbox drain: {e}")
+
+
+def due_emails():
+    return OutgoingEmail.objects.filter(
+        sent_at__isnull=True,
+        next_attempt_at__lte=timezone.now(),
+        attempts__lt=settings.BANK_EMAIL_MAX_ATTEMPTS,
+    )
+
+
+def retry_delay(attempts):
+    delay = settings.BANK_EMAIL_RETRY_DELAY * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, settings.BANK_EMAIL_RETRY_MAX_DELAY))
+
+
+def drain(batch_size=None):
+    """Send every due message, returns how many were sent."""
+    batch_size = batch_size or settings.BANK_EMAIL_BATCH_SIZE
+    connection = get_connection()
+    sent = 0
+    try:
+        try:
+            # One SMTP session for the run, send_messages would open one per call
+            connection.open()
+        except Exception as e:
+            logger.warning(f"Could not connect to the mail server: {e}")
+            return sent
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    due_emails().select_for_update(skip_locked=True).order_by('next_attempt_at', 'id')[:batch_size]
+                )
+                if not batch:
+                    return sent
+                batch_sent, connected = send_batch(connection, batch)
+                sent += batch_sent
+            if not connected:
+                # Left for the next run, the backoff spaces out the attempts
+                return sent
+    finally:
+        connection.close()
+
+
+def send_batch(connection, batch):
+    """Returns the number sent and whether the connection is still usable."""
+    now = timezone.now()
+    sent, connected = 0, True
+    for email in batch:
+        if not connected:
+            # Not attempted, so it does not count towards giving up
+            email.next_attempt_at = now + retry_delay(email.attempts + 1)
+            continue
+        email.attempts += 1
+        try:
+            connection.send_messages([email.message(connection)])
+        except MESSAGE_ERRORS as e:
+            failed(email, e, now)
+        except Exception as e:
+            failed(email, e, now)
+            connected = False
+        else:
+            email.sent_at = now
+            email.last_error = ''
+            sent += 1
+    OutgoingEmail.objects.bulk_update(batch, ['attempts', 'sent_at', 'last_error', 'next_attempt_at'])
+    return sent, connected
+
+
+def failed(email, error, now):
+    email.last_error = str(error)
+    email.next_attempt_at = now + retry_delay(email.attempts)
+    if email.attempts >= settings.BANK_EMAIL_MAX_ATTEMPTS:
+        logger.error(f"Giving up on e-mail {email.pk} to {', '.join(email.to)}: {error}")
+    else:
+        logger.warning(f"E-mail {email.pk} failed, attempt {email.attempts}: {error}")
+
+
+def purge_sent_emails():
+    cutoff = timezone.now() - timedelta(days=settings.BANK_EMAIL_RETENTION_DAYS)
+    deleted, _ = OutgoingEmail.objects.filter(sent_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,91 @@
+"""
+Query budgets: the most database queries a view may run for one request.
+
+Views declare theirs with ``@query_budget(n)``, class-based views take it as
+a class decorator. Views of other apps (auth, admin) are budgeted by URL name
+in ``BANK_QUERY_BUDGETS``. ``QueryBudgetMiddleware`` counts the queries of
+every request and logs the ones over budget. It never fails a request: by
+then the view has run and committed.
+
+``check_budget`` raises instead when ``BANK_QUERY_BUDGET_RAISE`` is on, the
+budget tests use it to fail on a regression.
+"""
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .metrics import QueryTimer
+
+logger = logging.getLogger(__name__)
+
+ATTRIBUTE = 'query_budget'
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(limit):
+    def decorator(view):
+        setattr(view, ATTRIBUTE, limit)
+        return view
+    return decorator
+
+
+def budget_for(view, view_name=None):
+    limit = getattr(view, ATTRIBUTE, None)
+    if limit is None:
+        limit = getattr(getattr(view, 'view_class', None), ATTRIBUTE, None)
+    if limit is None and view_name:
+        limit = settings.BANK_QUERY_BUDGETS.get(view_name)
+    return limit
+
+
+class QueryBudgetMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer = QueryTimer()
+        with timer.measure():
+            response = self.get_response(request)
+        self.log_over_budget(request, timer)
+        return response
+
+    async def __acall__(self, request):
+        timer = QueryTimer()
+        async with timer.ameasure():
+            response = await self.get_response(request)
+        self.log_over_budget(request, timer)
+        return response
+
+    def log_over_budget(self, request, timer):
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            message = over_budget(match.func, match.view_name, timer.count)
+            if message:
+                logger.warning(message)
+
+
+def over_budget(view, view_name, count):
+    limit = budget_for(view, view_name)
+    if limit is None or count <= limit:
+        return None
+    return f"{view_name} ran {count} queries, its budget is {limit}"
+
+
+def check_budget(view, view_name, count):
+    message = over_budget(view, view_name, count)
+    if not message:
+        return
+    if settings.BANK_QUERY_BUDGET_RAISE:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
@@ -0,0 +1,123 @@
+"""
+Read replicas.
+
+Writes, and every read inside ``transaction.atomic``, go to ``default``.
+Views marked ``@replica_reads`` read from one of ``BANK_READ_REPLICAS`` on
+GET requests, reports read from them inside ``use_replica()``.
+
+Replicas lag behind the primary. A request that wrote gets a cookie which
+keeps that client's reads on the primary for ``BANK_REPLICA_STICKY_SECONDS``,
+so nobody sees their balance from before their own payment.
+"""
+import random
+from contextlib import contextmanager
+
+from asgiref.local import Local
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+ATTRIBUTE = 'replica_reads'
+STICKY_COOKIE = 'primary_reads'
+
+_state = Local()
+
+
+class Scope:
+    def __init__(self, replica=False):
+        self.replica = replica
+        self.wrote = False
+
+
+def current_scope():
+    return getattr(_state, 'scope', None)
+
+
+@contextmanager
+def _scope(scope):
+    previous = current_scope()
+    _state.scope = scope
+    try:
+        yield scope
+    finally:
+        _state.scope = previous
+
+
+def use_replica():
+    return _scope(Scope(replica=True))
+
+
+def use_primary():
+    return _scope(Scope())
+
+
+def replica_reads(view):
+    setattr(view, ATTRIBUTE, True)
+    return view
+
+
+def reads_from_replica(view):
+    return getattr(view, ATTRIBUTE, False) or getattr(getattr(view, 'view_class', None), ATTRIBUTE, False)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        scope = current_scope()
+        if (
+            scope is None or not scope.replica or scope.wrote or not settings.BANK_READ_REPLICAS
+            # Reads of a money path are followed by writes based on them
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.BANK_READ_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        scope = current_scope()
+        if scope is not None:
+            scope.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaMiddleware:
+    """Goes before SessionMiddleware, so session saves count as writes."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with use_primary() as scope:
+            response = self.get_response(request)
+        return self.stick(request, response, scope)
+
+    async def __acall__(self, request):
+        # The scope reaches the sync_to_async threads with the request's context
+        with use_primary() as scope:
+            response = await self.get_response(request)
+        return self.stick(request, response, scope)
+
+    def stick(self, request, response, scope):
+        if scope.wrote:
+            response.set_cookie(STICKY_COOKIE, '1', max_age=settings.BANK_REPLICA_STICKY_SECONDS,
+                                secure=request.is_secure(), httponly=True, samesite='Lax')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        scope = current_scope()
+        if (
+            scope is not None and request.method in ('GET', 'HEAD') and reads_from_replica(view_func)
+            and STICKY_COOKIE not in request.COOKIES
+        ):
+            scope.replica = True
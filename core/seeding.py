@@ -0,0 +1,214 @@
+"""
+Synthetic bank data for load tests and benchmarks (``manage.py seed_bank``).
+
+Users get one to four cards, a year of payments skewed towards recent months,
+and some of them credits and savings goals. Amounts are log-normal, like real
+balances and spending. Every user has a confirmed TOTP device, so the load
+scenarios of ``core.loadtest`` can log in as them.
+
+A given ``seed`` always produces the same rows.
+"""
+import csv
+import io
+import random
+import time
+from collections import Counter, namedtuple
+from datetime import timedelta
+from decimal import Decimal
+from functools import partial
+
+from django.contrib.auth.hashers import make_password
+from django.db import connections, router, transaction
+from django.utils import timezone
+from django_otp.oath import TOTP
+from django_otp.plugins.otp_totp.models import TOTPDevice
+
+from accounts.cardnumbers import issue_cards
+from accounts.models import Card, Payment, SavingsGoal, User
+from credits.models import Credit, CreditApplication
+from credits.views import calculate_monthly_payment
+
+DEFAULT_PASSWORD = 'seed-password'
+BATCH_SIZE = 5000
+
+FIRST_NAMES = ('Ivan', 'Aliaksandr', 'Siarhei', 'Dzmitry', 'Andrei', 'Maksim', 'Pavel', 'Artsiom',
+               'Olga', 'Anastasia', 'Tatsiana', 'Volha', 'Maryia', 'Iryna', 'Katsiaryna', 'Alena')
+LAST_NAMES = ('Ivanou', 'Kavalenka', 'Novik', 'Karpovich', 'Melnik', 'Sidarenka', 'Bandarenka',
+              'Shevchuk', 'Kazlou', 'Lukashevich', 'Zhuk', 'Vasilevich', 'Tkachou', 'Hrynevich')
+CARD_NAMES = ('Salary', 'Everyday', 'Travel', 'Shopping', 'Savings', 'Family')
+CREDIT_PURPOSES = ('Car', 'Flat', 'Education', 'Repairs', 'Holiday', 'Appliances')
+GOAL_NAMES = ('Car', 'Vacation', 'Wedding', 'Laptop', 'Flat', 'Rainy day')
+
+VirtualUser = namedtuple('VirtualUser', 'email password device_id token cards')
+VirtualCard = namedtuple('VirtualCard', 'id account_no currency')
+
+
+def money(value):
+    return Decimal(value).quantize(Decimal('0.01'))
+
+
+def copy_rows(model, fields, rows):
+    """
+    Insert ``rows`` (tuples in ``fields`` order) with ``COPY`` on PostgreSQL,
+    which is several times faster than INSERT for bulk loads, and with
+    ``bulk_create`` elsewhere.
+    """
+    connection = connections[router.db_for_write(model)]
+    fields = [model._meta.get_field(name) for name in fields]
+
+    if connection.vendor != 'postgresql':
+        model.objects.bulk_create(
+            [model(**{field.attname: value for field, value in zip(fields, row)}) for row in rows],
+            batch_size=BATCH_SIZE,
+        )
+        return
+
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+
+
+class BankSeeder:
+    def __init__(self, seed=None, payments_per_card=20, credit_share=0.2, goal_share=0.3,
+                 pending_share=0.05, days=365, prefix='seed', password=DEFAULT_PASSWORD):
+        self.rng = random.Random(seed)
+        self.payments_per_card = payments_per_card
+        self.credit_share = credit_share
+        self.goal_share = goal_share
+        self.pending_share = pending_share
+        self.days = days
+        self.prefix = prefix
+        # Hashing is the slow part of creating users, every seeded user shares one hash
+        self.password_hash = make_password(password)
+        self.now = timezone.now()
+        self.counts = Counter()
+
+    def seed(self, users, batch_size=1000, log=None):
+        start = User.objects.filter(email__startswith=self.prefix).count()
+        for offset in range(0, users, batch_size):
+            with transaction.atomic():
+                self.seed_batch(start + offset, min(batch_size, users - offset))
+            if log:
+                log(f"{min(offset + batch_size, users)}/{users} users")
+        return dict(self.counts)
+
+    def seed_batch(self, first, count):
+        rng = self.rng
+        users = User.objects.bulk_create([
+            User(email=f"{self.prefix}{first + i}@example.com", password=self.password_hash,
+                 first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES))
+            for i in range(count)
+        ])
+        TOTPDevice.objects.bulk_create([
+            TOTPDevice(user=user, name='default', confirmed=True, key=rng.randbytes(20).hex())
+            for user in users
+        ])
+
+        cards, credits, applications, goals = [], [], [], []
+        for user in users:
+            for _ in range(rng.choices((1, 2, 3, 4), weights=(50, 30, 15, 5))[0]):
+                cards.append(Card(
+                    user=user, card_name=rng.choice(CARD_NAMES),
+                    card_type=rng.choices('DC', weights=(85, 15))[0],
+                    currency=rng.choices('BU', weights=(80, 20))[0],
+                    balance=money(min(rng.lognormvariate(6, 1.2), 10 ** 7)),
+                ))
+            if rng.random() < self.credit_share:
+                credit, application, card = self.credit(user)
+                credits.append(credit)
+                applications.append(application)
+                cards.append(card)
+            elif rng.random() < self.pending_share:
+                applications.append(CreditApplication(
+                    user=user, amount=money(rng.lognormvariate(8.5, 0.6)),
+                    purpose=rng.choice(CREDIT_PURPOSES), status='PENDING',
+                ))
+            if rng.random() < self.goal_share:
+                goals += [self.goal(user, index) for index in range(rng.choice((1, 1, 2)))]
+
+        issue_cards(cards)
+        Credit.objects.bulk_create(credits)
+        CreditApplication.objects.bulk_create(applications)
+        SavingsGoal.objects.bulk_create(goals)
+        payments = self.payments(cards)
+
+        self.counts.update(users=len(users), cards=len(cards), credits=len(credits),
+                           credit_applications=len(applications), savings_goals=len(goals),
+                           payments=payments)
+
+    def credit(self, user):
+        rng = self.rng
+        amount = money(rng.lognormvariate(8.5, 0.6))
+        purpose = rng.choice(CREDIT_PURPOSES)
+        card = Card(user=user, card_name=f"{purpose} Credit", card_type='C', currency='B', balance=amount)
+        credit = Credit(
+            user=user, amount=amount, interest_rate=5, term_months=12,
+            monthly_payment=calculate_monthly_payment(amount),
+            remaining_amount=money(amount * Decimal(rng.random())),
+            status='APPROVED', card=card,
+        )
+        return credit, CreditApplication(user=user, amount=amount, purpose=purpose, status='APPROVED'), card
+
+    def goal(self, user, index):
+        rng = self.rng
+        target_amount = money(rng.lognormvariate(7.5, 0.8))
+        target_date = (self.now + timedelta(days=rng.randint(60, 900))).date()
+        months = max((target_date.year - self.now.year) * 12 + target_date.month - self.now.month, 1)
+        return SavingsGoal(
+            user=user, goal_name=f"{rng.choice(GOAL_NAMES)} {user.pk}-{index}",
+            target_amount=target_amount, target_date=target_date,
+            approved=rng.random() < 0.7, monthly_payment=money(target_amount / months),
+        )
+
+    def payments(self, cards):
+        rng = self.rng
+        rows = []
+        for card in cards:
+            # Exponential counts: most cards are quiet, a few are very busy
+            count = min(int(rng.expovariate(1 / self.payments_per_card)), self.payments_per_card * 10) \
+                if self.payments_per_card else 0
+            for _ in range(count):
+                # Squaring skews the dates towards the recent months
+                age = timedelta(days=self.days * rng.random() ** 2)
+                rows.append((card.id, money(rng.lognormvariate(3, 1)), card.currency, card.card_type,
+                             self.now - age, False))
+        copy_rows(Payment, ('card', 'amount', 'currency', 'card_type', 'timestamp', 'deposit_pending'), rows)
+        return len(rows)
+
+
+def seed_bank(users, seed=None, batch_size=1000, log=None, **options):
+    return BankSeeder(seed=seed, **options).seed(users, batch_size=batch_size, log=log)
+
+
+def totp_token(device):
+    # The current token, as an authenticator app shows it (the device drift is the server's business)
+    return f"{TOTP(device.bin_key, device.step, device.t0, device.digits).token():0{device.digits}d}"
+
+
+def virtual_users(count=None, prefix='seed', password=DEFAULT_PASSWORD):
+    """Seeded users with a card, as the load scenarios log in as them."""
+    # A token is accepted once per 30 s step (seeded devices keep the default),
+    # users who logged in during the current step are left for the next run
+    devices = (
+        TOTPDevice.objects.filter(user__email__startswith=prefix, confirmed=True, last_t__lt=int(time.time()) // 30)
+        .select_related('user').order_by('user_id')
+    )
+    if count is not None:
+        devices = devices[:count]
+    devices = list(devices)
+
+    cards = {}
+    for card in Card.objects.filter(user__in=[device.user_id for device in devices]).order_by('id'):
+        cards.setdefault(card.user_id, []).append(VirtualCard(card.id, card.account_no, card.currency))
+
+    return [
+        VirtualUser(device.user.email, password, device.persistent_id, partial(totp_token, device),
+                    cards[device.user_id])
+        for device in devices if device.user_id in cards
+    ]
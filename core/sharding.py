@@ -0,0 +1,86 @@
+import logging
+import time
+
+from celery import chord, shared_task
+from django.conf import settings
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .models import ShardedJobRun
+
+logger = logging.getLogger(__name__)
+
+jobs = {}
+
+
+class ShardedJob:
+    def __init__(self, name, queryset, handler):
+        self.name = name
+        self.queryset = queryset
+        self.handler = handler
+
+
+def sharded_job(name, queryset):
+    """
+    Register ``handler(lo, hi, **kwargs)`` as the shard body of job ``name``.
+
+    ``queryset`` is a callable returning the rows the job walks; its primary
+    key range is what gets split between the shards. The handler returns the
+    number of rows it processed.
+    """
+    def register(handler):
+        jobs[name] = ShardedJob(name, queryset, handler)
+        return handler
+    return register
+
+
+def pk_ranges(queryset, shards):
+    bounds = queryset.aggregate(lo=Min('pk'), hi=Max('pk'))
+    if bounds['lo'] is None:
+        return []
+
+    lo, hi = bounds['lo'], bounds['hi']
+    step = max((hi - lo + 1) // shards, 1)
+    ranges = []
+    while lo <= hi:
+        upper = hi if len(ranges) == shards - 1 else min(lo + step - 1, hi)
+        ranges.append((lo, upper))
+        lo = upper + 1
+    return ranges
+
+
+@shared_task
+def run_shard(job_name, lo, hi, **kwargs):
+    started = time.monotonic()
+    rows = jobs[job_name].handler(lo, hi, **kwargs)
+    return {'lo': lo, 'hi': hi, 'rows': rows or 0, 'seconds': round(time.monotonic() - started, 3)}
+
+
+@shared_task
+def finish_sharded_job(results, run_id):
+    run = ShardedJobRun.objects.get(id=run_id)
+    run.shards = sorted(results, key=lambda shard: shard['lo'])
+    run.rows = sum(shard['rows'] for shard in results)
+    run.finished_at = timezone.now()
+    run.save(update_fields=['shards', 'rows', 'finished_at'])
+
+    slowest = max((shard['seconds'] for shard in results), default=0)
+    logger.info(f"{run.job}: {run.rows} rows in {len(results)} shards, slowest shard {slowest:.2f}s")
+    return {'sharded_job_run': run.id, 'rows': run.rows}
+
+
+def dispatch(job_name, shards=None, **kwargs):
+    """Split the job's primary key range and run it as a chord of shard tasks."""
+    job = jobs[job_name]
+    shards = shards or settings.BANK_JOB_SHARDS
+    ranges = pk_ranges(job.queryset(), shards)
+
+    run = ShardedJobRun.objects.create(job=job_name, shard_count=len(ranges))
+    if not ranges:
+        finish_sharded_job(results=[], run_id=run.id)
+        return run.id
+
+    chord(
+        run_shard.s(job_name, lo, hi, **kwargs) for lo, hi in ranges
+    )(finish_sharded_job.s(run.id))
+    return run.id
@@ -0,0 +1,103 @@
+"""
+Celery signal handlers recording every task execution as a ``TaskRun``
+(runtime, queue wait, rows processed, retries, final state), and the check
+that every beat entry names a registered task.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from celery import current_app
+from celery.signals import beat_init, before_task_publish, task_postrun, task_prerun
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import TaskRun
+
+logger = logging.getLogger(__name__)
+
+PUBLISHED_HEADER = 'published_at'
+
+# task id -> (wall clock start, monotonic start, queue wait)
+_started = {}
+
+
+def task_rows(retval):
+    # Tasks report what they touched as an int or as {'rows': ...}
+    if isinstance(retval, bool):
+        return None
+    if isinstance(retval, int):
+        return retval
+    if isinstance(retval, dict) and isinstance(retval.get('rows'), int):
+        return retval['rows']
+    return None
+
+
+@before_task_publish.connect
+def stamp_publish_time(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault(PUBLISHED_HEADER, time.time())
+
+
+@task_prerun.connect
+def start_run(task_id=None, task=None, **kwargs):
+    published_at = getattr(task.request, PUBLISHED_HEADER, None) or (task.request.headers or {}).get(PUBLISHED_HEADER)
+    queue_wait = max(time.time() - published_at, 0) if published_at else None
+    _started[task_id] = (timezone.now(), time.monotonic(), queue_wait)
+
+
+@task_postrun.connect
+def finish_run(task_id=None, task=None, retval=None, state=None, **kwargs):
+    started = _started.pop(task_id, None)
+    if started is None:
+        return
+    started_at, monotonic_start, queue_wait = started
+
+    try:
+        TaskRun.objects.create(
+            task_name=task.name,
+            task_id=task_id,
+            state=state or '',
+            started_at=started_at,
+            runtime=time.monotonic() - monotonic_start,
+            queue_wait=queue_wait,
+            rows=task_rows(retval) if state == 'SUCCESS' else None,
+            retries=task.request.retries or 0,
+            hostname=task.request.hostname or '',
+        )
+    except Exception as e:
+        # Instrumentation must never fail the task itself
+        logger.warning(f"Could not record run of {task.name}: {e}")
+
+
+def unknown_beat_tasks(app=None, schedule=None):
+    app = app or current_app
+    schedule = app.conf.beat_schedule if schedule is None else schedule
+    # Registers the shared tasks of every app, like the worker's autodiscovery
+    autodiscover_modules('tasks')
+    return {
+        name: entry['task'] for name, entry in schedule.items()
+        if entry['task'] not in app.tasks
+    }
+
+
+def validate_beat_schedule(app=None, schedule=None):
+    unknown = unknown_beat_tasks(app, schedule)
+    if unknown:
+        raise ImproperlyConfigured(
+            "Beat entries with unregistered tasks: "
+            + ", ".join(f"{name} -> {task}" for name, task in sorted(unknown.items()))
+        )
+
+
+@beat_init.connect
+def check_beat_schedule(sender=None, **kwargs):
+    validate_beat_schedule(sender.app)
+
+
+def purge_old_runs():
+    cutoff = timezone.now() - timedelta(days=settings.BANK_TASK_RUN_RETENTION_DAYS)
+    deleted, _ = TaskRun.objects.filter(started_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,23 @@
+from celery import shared_task
+
+from . import idempotency, outbox, taskruns
+
+
+@shared_task
+def purge_idempotency_keys():
+    return idempotency.purge_expired_keys()
+
+
+@shared_task
+def purge_task_runs():
+    return taskruns.purge_old_runs()
+
+
+@shared_task
+def send_outbox():
+    return outbox.drain()
+
+
+@shared_task
+def purge_outbox():
+    return outbox.purge_sent_emails()
@@ -0,0 +1,14 @@
+import uuid
+
+from django import template
+from django.utils.html import format_html
+
+from core.idempotency import FIELD
+
+register = template.Library()
+
+
+@register.simple_tag
+def idempotency_field():
+    # A fresh token per rendered form, resubmitting the same page replays the first result
+    return format_html('<input type="hidden" name="{}" value="{}">', FIELD, uuid.uuid4().hex)
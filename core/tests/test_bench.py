@@ -0,0 +1,60 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from accounts.models import Card, Payment
+from core import bench
+from core.seeding import seed_bank
+from credits.models import Credit
+
+
+class BenchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed_bank(10, seed=2, payments_per_card=5)
+        # Enough money everywhere for the payments and transfers
+        Card.objects.update(card_type='D', balance=5000)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.baseline = Path(directory.name) / 'baseline.json'
+        self.output = Path(directory.name) / 'results.json'
+
+    def bench(self, *args):
+        call_command('bench', '--repeat', '3', '--credits', '30', '--baseline', str(self.baseline),
+                     *args, stdout=StringIO())
+
+    def test_runs_every_benchmark_and_leaves_the_data_alone(self):
+        payments, credits = Payment.objects.count(), Credit.objects.count()
+
+        self.bench('--output', str(self.output))
+
+        results = json.loads(self.output.read_text())['results']
+        self.assertEqual(set(results), set(bench.BENCHMARKS))
+        self.assertEqual(results['make_payment']['runs'], 3)
+        self.assertEqual(results['month_end_repayments']['credits'], 30)
+        self.assertEqual(Payment.objects.count(), payments)
+        self.assertEqual(Credit.objects.count(), credits)
+
+    def test_fails_on_regression_against_the_baseline(self):
+        self.bench('convert_currency', '--update-baseline')
+        self.assertTrue(self.baseline.exists())
+
+        stored = json.loads(self.baseline.read_text())
+        stored['results']['convert_currency']['p50_ms'] /= 100
+        self.baseline.write_text(json.dumps(stored))
+
+        with self.assertRaisesMessage(CommandError, 'convert_currency'):
+            self.bench('convert_currency')
+
+    def test_compare(self):
+        baseline = {'results': {'transfer': {'p50_ms': 2.0}, 'statement': {'p50_ms': 2.0}}}
+        results = {'results': {'transfer': {'p50_ms': 2.4}, 'statement': {'p50_ms': 2.6}, 'new': {'p50_ms': 1}}}
+
+        self.assertEqual(bench.compare(results, baseline, tolerance=0.25),
+                         [bench.Regression('statement', 2.0, 2.6, 1.3)])
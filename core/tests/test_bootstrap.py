@@ -0,0 +1,39 @@
+import os
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from accounts.models import User
+
+
+class BootstrapCommandTest(TestCase):
+    env = {'DJANGO_SUPERUSER_EMAIL': 'admin@example.com', 'DJANGO_SUPERUSER_PASSWORD': 'adminpass'}
+
+    def call(self, *args):
+        out = StringIO()
+        with mock.patch.dict(os.environ, self.env):
+            call_command('bootstrap', *args, stdout=out)
+        return out.getvalue()
+
+    def test_creates_superuser_once(self):
+        self.assertIn('Created superuser', self.call())
+        self.assertNotIn('Created superuser', self.call())
+
+        user = User.objects.get(email='admin@example.com')
+        self.assertTrue(user.is_superuser)
+        self.assertTrue(user.check_password('adminpass'))
+
+    def test_nothing_to_migrate_is_cheap(self):
+        User.objects.create_superuser('admin@example.com', 'adminpass')
+
+        # Migration table lookup, applied migrations, superuser lookup
+        with self.assertNumQueries(3):
+            output = self.call()
+        self.assertIn('No migrations to apply', output)
+
+    def test_check_fails_on_pending_migrations(self):
+        with mock.patch('core.management.commands.bootstrap.Command.pending_migrations', return_value=[object()]):
+            with self.assertRaises(CommandError):
+                self.call('--check')
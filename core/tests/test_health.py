@@ -0,0 +1,31 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import health
+
+
+class HealthEndpointsTest(TestCase):
+    def setUp(self):
+        health.reset()
+
+    def test_liveness_does_not_query(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('healthz'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_readiness_probe_is_cached(self):
+        response = self.client.get(reverse('readyz'))
+        self.assertEqual(response.json(), {'database': 'ok', 'cache': 'ok'})
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse('readyz')).status_code, 200)
+
+    @override_settings(BANK_READINESS_CACHE_SECONDS=0)
+    def test_failed_probe_is_not_ready(self):
+        with mock.patch.dict(health.PROBES, cache=mock.Mock(side_effect=ConnectionError("redis down"))):
+            response = self.client.get(reverse('readyz'))
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['cache'], 'error')
@@ -0,0 +1,94 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Card, Payment, User
+from core.idempotency import purge_expired_keys
+from core.models import IdempotencyKey
+
+
+class IdempotentPostTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='testuser@gmail.com', password='testpass')
+        self.card = Card.objects.create(user=self.user, card_type='D', currency='B', balance=100)
+        self.client.force_login(self.user)
+        self.url = reverse('accounts:make_payment')
+
+    def pay(self, key, amount='10'):
+        return self.client.post(self.url, {'card': self.card.id, 'amount': amount},
+                                HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_without_paying_twice(self):
+        first = self.pay('abc')
+        second = self.pay('abc')
+
+        self.assertEqual(second.status_code, first.status_code)
+        self.assertEqual(second['Location'], first['Location'])
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Payment.objects.filter(card=self.card).count(), 1)
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.balance, Decimal('90'))
+
+    def test_cached_replay_does_not_query(self):
+        self.pay('abc')
+
+        with mock.patch('accounts.views.Card.make_payment') as make_payment:
+            with self.assertNumQueries(0):  # the session and the user come from the cache too
+                self.pay('abc')
+        make_payment.assert_not_called()
+
+    def test_replay_falls_back_to_table(self):
+        self.pay('abc')
+        cache.clear()
+
+        response = self.pay('abc')
+
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+        self.assertEqual(Payment.objects.filter(card=self.card).count(), 1)
+
+    def test_request_in_progress_conflicts(self):
+        IdempotencyKey.objects.create(user=self.user, key='abc', path=self.url)
+
+        self.assertEqual(self.pay('abc').status_code, 409)
+        self.assertFalse(Payment.objects.exists())
+
+    def test_abandoned_claim_is_reclaimed(self):
+        # The worker died before storing a response
+        IdempotencyKey.objects.create(user=self.user, key='abc', path=self.url,
+                                      claimed_at=timezone.now() - timedelta(minutes=10))
+
+        with self.assertLogs('core.idempotency', 'WARNING'):
+            self.assertEqual(self.pay('abc').status_code, 302)
+        self.assertEqual(Payment.objects.filter(card=self.card).count(), 1)
+        self.assertEqual(self.pay('abc')['Idempotent-Replayed'], 'true')
+
+    def test_key_reused_for_another_path(self):
+        self.pay('abc')
+        cache.clear()
+
+        response = self.client.post(reverse('accounts:deposit_form', args=[self.card.id]),
+                                    {'deposit_amount': '5'}, HTTP_IDEMPOTENCY_KEY='abc')
+
+        self.assertEqual(response.status_code, 422)
+
+    def test_form_token_and_distinct_keys(self):
+        self.client.post(self.url, {'card': self.card.id, 'amount': '10', 'idempotency_key': 'one'})
+        self.client.post(self.url, {'card': self.card.id, 'amount': '10', 'idempotency_key': 'one'})
+        self.pay('two')
+
+        self.assertEqual(Payment.objects.filter(card=self.card).count(), 2)
+
+    def test_form_renders_token(self):
+        self.assertContains(self.client.get(self.url), 'name="idempotency_key"')
+
+    def test_purge_expired_keys(self):
+        self.pay('abc')
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+
+        self.assertEqual(purge_expired_keys(), 1)
@@ -0,0 +1,17 @@
+from django.test import LiveServerTestCase
+
+from core import loadtest
+
+
+class LoadTestRunnerTest(LiveServerTestCase):
+    def test_run_reports_throughput_and_latency(self):
+        result = loadtest.run(self.live_server_url + '/', concurrency=4, total=10)
+
+        self.assertEqual(result['requests'], 10)
+        self.assertEqual(result['errors'], 0)
+        self.assertGreater(result['rps'], 0)
+        self.assertGreaterEqual(result['p99_ms'], result['p50_ms'])
+
+    def test_percentile(self):
+        self.assertEqual(loadtest.percentile(list(range(1, 101)), 0.99), 99)
+        self.assertIsNone(loadtest.percentile([], 0.5))
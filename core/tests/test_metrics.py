@@ -0,0 +1,82 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+
+from accounts.models import Card, User
+from core.cache import LocMemCache
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsMiddlewareTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='testuser@gmail.com', password='testpass')
+        self.card = Card.objects.create(user=self.user, card_type='D', currency='B', balance=10)
+        self.client.force_login(self.user)
+        self.async_client.force_login(self.user)
+
+    def test_records_latency_and_queries_by_url_name(self):
+        view = 'accounts:card_history'
+        requests = sample('bank_requests_total', view=view, method='GET', status='200')
+        observed = sample('bank_request_seconds_count', view=view, method='GET')
+        queries = sample('bank_request_db_queries_sum', view=view)
+
+        self.client.get(reverse('accounts:card_history', args=[self.card.id]))
+
+        self.assertEqual(sample('bank_requests_total', view=view, method='GET', status='200'), requests + 1)
+        self.assertEqual(sample('bank_request_seconds_count', view=view, method='GET'), observed + 1)
+        self.assertGreater(sample('bank_request_db_queries_sum', view=view), queries)
+
+    @override_settings(ROOT_URLCONF='banking_system.urls_async')
+    async def test_records_async_requests(self):
+        view = 'accounts:card_history'
+        requests = sample('bank_requests_total', view=view, method='GET', status='200')
+        queries = sample('bank_request_db_queries_sum', view=view)
+
+        response = await self.async_client.get(reverse('accounts:card_history', args=[self.card.id]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sample('bank_requests_total', view=view, method='GET', status='200'), requests + 1)
+        self.assertGreater(sample('bank_request_db_queries_sum', view=view), queries)
+
+    def test_unknown_methods_share_a_label(self):
+        other = sample('bank_requests_total', view='home', method='other', status='405')
+
+        response = self.client.generic('BREW', reverse('home'))
+
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(sample('bank_requests_total', view='home', method='other', status='405'), other + 1)
+        self.assertEqual(sample('bank_requests_total', view='home', method='BREW', status='405'), 0)
+
+    @override_settings(BANK_METRICS_TOKEN='secret')
+    def test_metrics_endpoint(self):
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'bank_request_seconds_bucket', response.content)
+
+    @override_settings(BANK_METRICS_TOKEN='secret')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(BANK_METRICS_TOKEN=None)
+    def test_metrics_closed_without_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+
+class CacheMetricsTest(TestCase):
+    def test_counts_hits_and_misses(self):
+        cache = LocMemCache('metrics-test', {})
+        hits, misses = sample('bank_cache_requests_total', result='hit'), sample('bank_cache_requests_total', result='miss')
+
+        cache.set('a', 1)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('b', 'default'), 'default')
+        self.assertEqual(cache.get_many(['a', 'b', 'c']), {'a': 1})
+
+        self.assertEqual(sample('bank_cache_requests_total', result='hit'), hits + 2)
+        self.assertEqual(sample('bank_cache_requests_total', result='miss'), misses + 3)
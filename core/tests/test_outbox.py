@@ -0,0 +1,186 @@
+import smtplib
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from banking_system.celery import app
+from core import outbox
+from core.models import OutgoingEmail
+
+
+class FlakyBackend(EmailBackend):
+    """
+    locmem backend that refuses the recipients in ``refused``, fails on ``down``
+    and cannot connect while ``unreachable``. Like the SMTP backend it opens a
+    session of its own for a send outside ``open()``.
+    """
+    refused = set()
+    down = set()
+    unreachable = False
+    sessions = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.session = False
+
+    def open(self):
+        if self.session:
+            return False
+        if self.unreachable:
+            raise ConnectionRefusedError("mail server is down")
+        FlakyBackend.sessions += 1
+        self.session = True
+        return True
+
+    def close(self):
+        self.session = False
+
+    def send_messages(self, messages):
+        new_session = self.open()
+        try:
+            return self.send(messages)
+        finally:
+            if new_session:
+                self.close()
+
+    def send(self, messages):
+        for message in messages:
+            if set(message.to) & self.down:
+                raise ConnectionRefusedError("mail server is down")
+            if set(message.to) & self.refused:
+                raise smtplib.SMTPRecipientsRefused({message.to[0]: (550, b'No such user')})
+        return super().send_messages(messages)
+
+
+def message(to='client@example.com'):
+    email = EmailMessage('Welcome', '<p>Hello</p>', to=[to])
+    email.content_subtype = 'html'
+    return email
+
+
+@override_settings(EMAIL_BACKEND='core.tests.test_outbox.FlakyBackend', BANK_EMAIL_BATCH_SIZE=2)
+class OutboxTest(TestCase):
+    def setUp(self):
+        self.eager = app.conf.task_always_eager
+        app.conf.task_always_eager = True
+        FlakyBackend.refused, FlakyBackend.down = set(), set()
+        FlakyBackend.unreachable, FlakyBackend.sessions = False, 0
+
+    def tearDown(self):
+        app.conf.task_always_eager = self.eager
+
+    def test_sent_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            outbox.enqueue(message())
+            self.assertEqual(len(mail.outbox), 0)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].content_subtype, 'html')
+        self.assertIsNotNone(OutgoingEmail.objects.get().sent_at)
+
+    def test_rolled_back_message_is_not_sent(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                outbox.enqueue(message())
+                transaction.set_rollback(True)
+
+        self.assertEqual(callbacks, [])
+        self.assertFalse(OutgoingEmail.objects.exists())
+
+    def test_batches_share_one_session(self):
+        for i in range(5):
+            outbox.enqueue(message(f'client{i}@example.com'))
+
+        self.assertEqual(outbox.drain(), 5)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(FlakyBackend.sessions, 1)
+        self.assertEqual(outbox.drain(), 0)
+
+    def test_no_session_leaves_the_messages_due(self):
+        FlakyBackend.unreachable = True
+        email = outbox.enqueue(message())
+
+        with self.assertLogs('core.outbox', 'WARNING'):
+            self.assertEqual(outbox.drain(), 0)
+        email.refresh_from_db()
+        self.assertEqual((email.attempts, email.last_error), (0, ''))
+
+        FlakyBackend.unreachable = False
+        self.assertEqual(outbox.drain(), 1)
+
+    def test_refused_message_is_retried_with_backoff(self):
+        FlakyBackend.refused = {'bad@example.com'}
+        bad = outbox.enqueue(message('bad@example.com'))
+        outbox.enqueue(message())
+
+        self.assertEqual(outbox.drain(), 1)
+        bad.refresh_from_db()
+        self.assertEqual(bad.attempts, 1)
+        self.assertIn('No such user', bad.last_error)
+        self.assertGreater(bad.next_attempt_at, timezone.now() + timedelta(seconds=30))
+
+        OutgoingEmail.objects.filter(id=bad.id).update(next_attempt_at=timezone.now())
+        outbox.drain()
+        bad.refresh_from_db()
+        self.assertEqual(bad.attempts, 2)
+        self.assertGreater(bad.next_attempt_at, timezone.now() + timedelta(seconds=90))
+
+    def test_unreachable_server_stops_the_run(self):
+        FlakyBackend.down = {'first@example.com'}
+        first = outbox.enqueue(message('first@example.com'))
+        second = outbox.enqueue(message('second@example.com'))
+
+        self.assertEqual(outbox.drain(), 0)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.attempts, second.attempts), (1, 0))
+        self.assertGreater(second.next_attempt_at, timezone.now())
+
+    @override_settings(BANK_EMAIL_MAX_ATTEMPTS=2)
+    def test_gives_up_after_max_attempts(self):
+        FlakyBackend.refused = {'bad@example.com'}
+        bad = outbox.enqueue(message('bad@example.com'))
+
+        for _ in range(3):
+            OutgoingEmail.objects.filter(id=bad.id).update(next_attempt_at=timezone.now())
+            outbox.drain()
+
+        bad.refresh_from_db()
+        self.assertEqual(bad.attempts, 2)
+        self.assertIsNone(bad.sent_at)
+
+    def test_purge_keeps_unsent_and_recent(self):
+        old = outbox.enqueue(message())
+        outbox.drain()
+        OutgoingEmail.objects.filter(id=old.id).update(sent_at=timezone.now() - timedelta(days=31))
+        recent = outbox.enqueue(message())
+        outbox.drain()
+        unsent = OutgoingEmail.objects.create(subject='Later', body='', to=['client@example.com'])
+
+        self.assertEqual(outbox.purge_sent_emails(), 1)
+        self.assertEqual(set(OutgoingEmail.objects.values_list('id', flat=True)), {recent.id, unsent.id})
+
+    def test_broker_outage_does_not_fail_the_commit(self):
+        with mock.patch('core.tasks.send_outbox.delay', side_effect=ConnectionError), \
+                self.captureOnCommitCallbacks(execute=True):
+            outbox.enqueue(message())
+
+        self.assertEqual(outbox.drain(), 1)
+
+    def test_signup_writes_the_activation_email(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('signup'), {
+                'email': 'new@example.com', 'password1': 'Str0ng-pass-123', 'password2': 'Str0ng-pass-123',
+            })
+
+        self.assertRedirects(response, reverse('login'), fetch_redirect_response=False)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['new@example.com'])
+        self.assertIn('otpauth://', mail.outbox[0].body)
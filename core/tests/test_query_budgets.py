@@ -0,0 +1,260 @@
+import re
+import tempfile
+from datetime import date, timedelta
+from importlib import import_module
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django_otp.plugins.otp_totp.models import TOTPDevice
+
+from accounts import archive, partitions
+from accounts.models import Card, Payment, SavingsGoal, User
+from accounts.tasks import build_statement_pdf
+from core.idempotency import FIELD
+from core.metrics import QueryTimer
+from core.querybudget import QueryBudgetExceeded, budget_for, check_budget, query_budget
+from core.seeding import totp_token
+from credits.models import Credit, CreditApplication
+from transactions.models import Transaction
+
+ROUTE_MODULES = ('accounts.urls', 'transactions.urls', 'credits.urls')
+STAFF_ROUTES = {
+    'accounts:staff_profile', 'accounts:deposit_approval_list', 'accounts:deposit_approval',
+    'accounts:deposit_bulk_approval', 'credits:credit_list', 'credits:approve_credit',
+}
+ADMIN_MODELS = ('accounts.card', 'accounts.payment', 'accounts.savingsgoal', 'accounts.ledgerentry',
+                'transactions.transaction', 'credits.credit')
+ANONYMOUS_ROUTES = {'accounts:login', 'transactions:login', 'credits:login'}
+# Their forms carry an idempotency token, claiming it and storing the response cost queries too
+IDEMPOTENT_ROUTES = {
+    'accounts:make_payment', 'accounts:deposit_form', 'transactions:fund_transfer',
+    'transactions:fund_transfer_card_by_card',
+}
+TOKEN = re.compile(rf'name="{FIELD}" value="(\w+)"'.encode())
+# Enough rows that a query per row blows any budget
+ROWS = 10
+
+
+def routes():
+    for module_name in ROUTE_MODULES:
+        module = import_module(module_name)
+        for pattern in module.urlpatterns:
+            yield f"{module.app_name}:{pattern.name}", list(pattern.pattern.converters)
+
+
+@override_settings(BANK_QUERY_BUDGET_RAISE=True)
+class RouteQueryBudgetTest(TestCase):
+    """Every page of the bank stays within its query budget, however many rows it shows."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='client@example.com', password='testpass',
+                                            first_name='Ivan', last_name='Petrov')
+        cls.staff = User.objects.create_user(email='staff@example.com', password='testpass', is_staff=True)
+        cls.admin = User.objects.create_superuser(email='admin@example.com', password='testpass')
+        cls.device = TOTPDevice.objects.create(user=cls.user, name='default', confirmed=True)
+        others = [User.objects.create_user(email=f'other{i}@example.com', password='testpass') for i in range(ROWS)]
+
+        cls.cards = [
+            Card.objects.create(user=cls.user, card_type='D', currency='BU'[i % 2], balance=1000)
+            for i in range(ROWS)
+        ]
+        card = cls.cards[0]
+        for other in others:
+            pending = Card.objects.create(user=other, card_type='D', currency='B', balance=10)
+            Card.objects.filter(id=pending.id).update(pending_deposit_amount=50, deposit_pending=True)
+            CreditApplication.objects.create(user=other, amount=1000, purpose='Car', status='PENDING')
+        for i in range(ROWS):
+            Payment.objects.create(card=card, amount=i + 1, currency='B', card_type='D')
+            Transaction.objects.create(sender_card=card, receiver_card=cls.cards[1], amount=i + 1)
+            SavingsGoal.objects.create(user=cls.user, goal_name=f'Goal {i}', target_amount=1000,
+                                       target_date=date.today() + timedelta(days=400), approved=True)
+            Credit.objects.create(user=cls.user, amount=500, interest_rate=5, term_months=12,
+                                  monthly_payment=43, remaining_amount=500, status='APPROVED', card=card)
+
+        today, month_ago = date.today(), date.today() - timedelta(days=30)
+        statement_filter = {
+            'start_date_year': month_ago.year, 'start_date_month': month_ago.month, 'start_date_day': month_ago.day,
+            'end_date_year': today.year, 'end_date_month': today.month, 'end_date_day': today.day,
+        }
+        cls.query = {
+            'accounts:card_history': statement_filter,
+            'accounts:card_history_csv': statement_filter,
+            'accounts:card_history_pdf': statement_filter,
+        }
+        cls.url_kwargs = {
+            'card_id': card.id,
+            'goal_id': SavingsGoal.objects.filter(user=cls.user).first().id,
+            'credit_app_id': CreditApplication.objects.first().id,
+        }
+
+    def setUp(self):
+        cache.clear()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_root = override_settings(MEDIA_ROOT=media.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+        # Only the request is measured, the PDF is built by a worker
+        delay = mock.patch('accounts.views.build_statement_pdf.delay')
+        delay.start()
+        self.addCleanup(delay.stop)
+
+    def client_for(self, view_name):
+        if view_name.startswith('admin:'):
+            self.client.force_login(self.admin)
+        elif view_name in STAFF_ROUTES:
+            self.client.force_login(self.staff)
+        elif view_name not in ANONYMOUS_ROUTES:
+            self.client.force_login(self.user)
+
+    def request(self, method, view_name, url, data=None):
+        view = resolve(url).func
+        self.assertIsNotNone(budget_for(view, view_name), f"{view_name} has no query budget")
+
+        self.client.logout()
+        self.client_for(view_name)
+        # Counted on every connection, like QueryBudgetMiddleware does
+        timer = QueryTimer()
+        with timer.measure(), CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data)
+
+        try:
+            check_budget(view, view_name, timer.count)
+        except QueryBudgetExceeded as e:
+            self.fail(f"{e}:\n" + "\n".join(q['sql'] for q in queries))
+        return response
+
+    def form_token(self, view_name, url):
+        """The idempotency token of the form the view renders, like a browser would post it."""
+        self.client.logout()
+        self.client_for(view_name)
+        match = TOKEN.search(self.client.get(url).content)
+        return {FIELD: match.group(1).decode()} if match else {}
+
+    def test_routes_stay_within_budget(self):
+        for view_name, arguments in routes():
+            with self.subTest(view_name):
+                url = reverse(view_name, kwargs={name: self.url_kwargs[name] for name in arguments})
+                response = self.request('get', view_name, url, self.query.get(view_name))
+                self.assertLess(response.status_code, 400)
+
+    @override_settings(BANK_PAYMENT_ARCHIVE_MONTHS=2)
+    def test_statement_paths_stay_within_budget(self):
+        card = self.cards[0]
+        url = reverse('accounts:card_history', kwargs={'card_id': card.id})
+        pdf_url = reverse('accounts:card_history_pdf', kwargs={'card_id': card.id})
+        old = partitions.add_months(date.today().replace(day=1), -5)
+        Payment.objects.bulk_create([
+            Payment(card=card, amount=i + 1, currency='B', card_type='D',
+                    timestamp=partitions.month_bound(old) + timedelta(days=i))
+            for i in range(ROWS)
+        ])
+        archive.archive_payments()
+        self.addCleanup(archive.read_file.cache_clear)
+        since_old = {
+            'start_date_year': old.year, 'start_date_month': old.month, 'start_date_day': 1,
+            'end_date_year': date.today().year, 'end_date_month': date.today().month,
+            'end_date_day': date.today().day,
+        }
+
+        # Payments and sent transfers, plus the archived payments
+        for name, query, rows in (('recent', self.query['accounts:card_history'], 2 * ROWS),
+                                  ('archive', since_old, 3 * ROWS)):
+            with self.subTest(name):
+                response = self.request('get', 'accounts:card_history', url, query)
+                self.assertEqual(len(response.context['regular_payments']), rows)
+            with self.subTest(f"async {name}"), self.settings(ROOT_URLCONF='banking_system.urls_async'):
+                self.request('get', 'accounts:card_history', url, query)
+
+        with self.subTest('pdf miss'):
+            self.assertEqual(self.request('get', 'accounts:card_history_pdf', pdf_url, since_old).status_code, 302)
+        build_statement_pdf(card.id, old.isoformat(), (date.today() + timedelta(days=1)).isoformat())
+        with self.subTest('pdf hit'):
+            self.assertEqual(self.request('get', 'accounts:card_history_pdf', pdf_url, since_old).status_code, 200)
+
+    def test_admin_pages_stay_within_budget(self):
+        for model in ADMIN_MODELS:
+            for page in ('changelist', 'add'):
+                view_name = f"admin:{model.replace('.', '_')}_{page}"
+                with self.subTest(view_name):
+                    response = self.request('get', view_name, reverse(view_name))
+                    self.assertEqual(response.status_code, 200)
+
+    def test_writes_stay_within_budget(self):
+        card, other_card = self.cards[0], self.cards[2]
+        goal_ids = list(SavingsGoal.objects.filter(user=self.user).order_by('id').values_list('id', flat=True))
+        target_date = (date.today() + timedelta(days=400)).isoformat()
+        pending_ids = list(Card.objects.filter(deposit_pending=True).values_list('id', flat=True))
+        posts = {
+            'accounts:login': ({}, {'username': 'client@example.com', 'password': 'testpass',
+                                    'otp_device': self.device.persistent_id, 'otp_token': totp_token(self.device)}),
+            'accounts:edit_profile': ({}, {'street_address': 'Nezavisimosti 4', 'city': 'Minsk',
+                                           'postal_code': '220030', 'country': 'Belarus'}),
+            'accounts:create_savings_goal': ({}, {'goal_name': 'Flat', 'target_amount': '5000',
+                                                  'target_date': target_date}),
+            'accounts:review_savings_plan': ({'goal_id': goal_ids[1]}, {}),
+            'accounts:edit_savings_goal': ({'goal_id': goal_ids[2]}, {'goal_name': 'Boat', 'target_amount': '900',
+                                                                      'target_date': target_date}),
+            'accounts:delete_savings_goal': ({'goal_id': goal_ids[3]}, {}),
+            'credits:apply_credit': ({}, {'amount': '1000', 'purpose': 'Flat'}),
+            'accounts:make_payment': ({}, {'card': card.id, 'amount': '5'}),
+            'accounts:create_card': ({}, {'card_name': 'Travel', 'card_type': 'D', 'currency': 'B'}),
+            'accounts:deposit_form': ({'card_id': other_card.id}, {'deposit_amount': '50'}),
+            'accounts:deposit_approval': ({'card_id': pending_ids[0]}, {'approved': 'on'}),
+            'accounts:deposit_bulk_approval': ({}, {'card_ids': pending_ids[1:], 'action': 'approve'}),
+            'transactions:fund_transfer': ({}, {'card': card.id, 'receiver_account_number': other_card.account_no,
+                                                'amount': '5'}),
+            'transactions:fund_transfer_card_by_card': ({}, {'card_one': card.id, 'card_two': other_card.id,
+                                                             'amount': '5'}),
+            'credits:approve_credit': ({'credit_app_id': self.url_kwargs['credit_app_id']}, {'approved': 'on'}),
+        }
+        for view_name, (kwargs, data) in posts.items():
+            with self.subTest(view_name):
+                url = reverse(view_name, kwargs=kwargs)
+                token = self.form_token(view_name, url) if view_name in IDEMPOTENT_ROUTES else {}
+                self.assertEqual(bool(token), view_name in IDEMPOTENT_ROUTES)
+                response = self.request('post', view_name, url, {**data, **token})
+                self.assertEqual(response.status_code, 302)
+
+
+class QueryBudgetMiddlewareTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='client@example.com', password='testpass')
+        self.client.force_login(self.user)
+        self.async_client.force_login(self.user)
+
+    @override_settings(BANK_QUERY_BUDGETS={'home': 0}, BANK_QUERY_BUDGET_RAISE=False)
+    def test_logs_views_over_budget(self):
+        with self.assertLogs('core.querybudget', 'WARNING') as logs:
+            response = self.client.get(reverse('home'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("home ran", logs.output[0])
+
+    @override_settings(BANK_QUERY_BUDGETS={'home': 0}, BANK_QUERY_BUDGET_RAISE=True)
+    def test_strict_mode_does_not_fail_the_request(self):
+        # The view has already run and committed, failing now would only hide its result
+        with self.assertLogs('core.querybudget', 'WARNING'):
+            response = self.client.get(reverse('home'))
+
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(BANK_QUERY_BUDGETS={'home': 0}, BANK_QUERY_BUDGET_RAISE=False)
+    async def test_async_requests_are_counted(self):
+        with self.assertLogs('core.querybudget', 'WARNING'):
+            response = await self.async_client.get(reverse('home'))
+
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(BANK_QUERY_BUDGETS={'home': 0}, BANK_QUERY_BUDGET_RAISE=True)
+    def test_declared_budget_wins_over_settings(self):
+        view = query_budget(5)(lambda request: None)
+
+        check_budget(view, 'home', 5)
+        with self.assertRaises(QueryBudgetExceeded):
+            check_budget(view, 'home', 6)
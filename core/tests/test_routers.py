@@ -0,0 +1,108 @@
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Card, Payment, User
+from core.routers import STICKY_COOKIE, ReplicaRouter, use_primary, use_replica
+
+
+@override_settings(BANK_READ_REPLICAS=['replica'])
+class ReplicaRouterTest(SimpleTestCase):
+    router = ReplicaRouter()
+
+    def test_reads_go_to_the_primary_by_default(self):
+        self.assertEqual(self.router.db_for_read(Card), DEFAULT_DB_ALIAS)
+        with use_primary():
+            self.assertEqual(self.router.db_for_read(Card), DEFAULT_DB_ALIAS)
+
+    def test_replica_reads_until_the_first_write(self):
+        with use_replica():
+            self.assertEqual(self.router.db_for_read(Card), 'replica')
+            self.assertEqual(self.router.db_for_write(Card), DEFAULT_DB_ALIAS)
+            self.assertEqual(self.router.db_for_read(Card), DEFAULT_DB_ALIAS)
+
+    def test_nested_scopes(self):
+        with use_replica():
+            with use_primary():
+                self.assertEqual(self.router.db_for_read(Card), DEFAULT_DB_ALIAS)
+            self.assertEqual(self.router.db_for_read(Card), 'replica')
+
+    @override_settings(BANK_READ_REPLICAS=[])
+    def test_no_replicas_configured(self):
+        with use_replica():
+            self.assertEqual(self.router.db_for_read(Card), DEFAULT_DB_ALIAS)
+
+    def test_only_the_primary_is_migrated(self):
+        self.assertTrue(self.router.allow_migrate(DEFAULT_DB_ALIAS, 'accounts'))
+        self.assertFalse(self.router.allow_migrate('replica', 'accounts'))
+
+
+@override_settings(BANK_READ_REPLICAS=['replica'])
+class ReplicaRoutingTest(TransactionTestCase):
+    """The replica alias mirrors the default test database, so both see the same rows."""
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='client@example.com', password='testpass')
+        self.card = Card.objects.create(user=self.user, card_type='D', currency='B', balance=1000)
+        Payment.objects.create(card=self.card, amount=Decimal('50'), currency='B', card_type='D')
+        self.client.force_login(self.user)
+        today = timezone.localdate()
+        self.statement_url = reverse('accounts:card_history', kwargs={'card_id': self.card.id}) + (
+            f"?start_date_year={today.year}&start_date_month={today.month}&start_date_day=1"
+            f"&end_date_year={today.year}&end_date_month={today.month}&end_date_day={today.day}"
+        )
+
+    def get(self, url):
+        with CaptureQueriesContext(connections['replica']) as replica, \
+                CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as primary:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, self.tables(replica), self.tables(primary)
+
+    def tables(self, queries):
+        return {table for table in ('accounts_card', 'accounts_payment')
+                if any(table in query['sql'] for query in queries)}
+
+    def test_read_only_view_reads_from_the_replica(self):
+        response, replica, primary = self.get(self.statement_url)
+        self.assertEqual(replica, {'accounts_card', 'accounts_payment'})
+        self.assertEqual(primary, set())
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    def test_other_views_read_from_the_primary(self):
+        response, replica, primary = self.get(reverse('accounts:make_payment'))
+        self.assertEqual(replica, set())
+        self.assertEqual(primary, {'accounts_card'})
+
+    def test_reads_stick_to_the_primary_after_a_write(self):
+        response = self.client.post(reverse('accounts:make_payment'), {'card': self.card.id, 'amount': '10'})
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(STICKY_COOKIE, response.cookies)
+
+        response, replica, primary = self.get(self.statement_url)
+        self.assertEqual(replica, set())
+        self.assertEqual(primary, {'accounts_card', 'accounts_payment'})
+
+    @override_settings(ROOT_URLCONF='banking_system.urls_async')
+    async def test_async_writes_stick_to_the_primary(self):
+        await sync_to_async(self.async_client.force_login)(self.user)
+        response = await self.async_client.post(reverse('accounts:make_payment'),
+                                                {'card': self.card.id, 'amount': '10'})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(STICKY_COOKIE, response.cookies)
+
+    def test_atomic_blocks_read_from_the_primary(self):
+        router = ReplicaRouter()
+        with use_replica():
+            self.assertEqual(router.db_for_read(Card), 'replica')
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(Card), DEFAULT_DB_ALIAS)
+                self.assertEqual(Card.objects.get(id=self.card.id).balance, 1000)
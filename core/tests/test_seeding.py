@@ -0,0 +1,76 @@
+from django.db import connection
+from django.db.models import Sum
+from django.test import LiveServerTestCase, TestCase
+from django.urls import reverse
+
+from accounts.cardnumbers import is_luhn_valid
+from accounts.models import Card, LedgerEntry, Payment, User
+from core import loadtest
+from core.seeding import seed_bank, virtual_users
+from credits.models import Credit
+
+
+class SeedBankTest(TestCase):
+    def test_generates_users_cards_and_history(self):
+        counts = seed_bank(20, seed=1, batch_size=8, payments_per_card=5, credit_share=0.5)
+
+        self.assertEqual(counts['users'], 20)
+        self.assertEqual(User.objects.filter(email__startswith='seed').count(), 20)
+        self.assertEqual(Card.objects.count(), counts['cards'])
+        self.assertEqual(Payment.objects.count(), counts['payments'])
+        self.assertEqual(Credit.objects.filter(card__card_type='C').count(), counts['credits'])
+        self.assertGreaterEqual(counts['cards'], 20)
+        self.assertTrue(all(is_luhn_valid(number) for number in Card.objects.values_list('account_no', flat=True)))
+        # Opening balances are journaled like for cards created one by one
+        self.assertEqual(LedgerEntry.objects.aggregate(total=Sum('amount'))['total'], 0)
+        self.assertEqual(
+            LedgerEntry.objects.filter(card__isnull=False).aggregate(total=Sum('amount'))['total'],
+            Card.objects.aggregate(total=Sum('balance'))['total'],
+        )
+
+    def test_same_seed_generates_the_same_data(self):
+        def generate(prefix):
+            seed_bank(5, seed=7, prefix=prefix, payments_per_card=3)
+            cards = Card.objects.filter(user__email__startswith=prefix).order_by('id')
+            return (list(cards.values_list('card_type', 'currency', 'balance')),
+                    list(Payment.objects.filter(card__in=cards).order_by('id').values_list('amount', flat=True)))
+
+        self.assertEqual(generate('first'), generate('second'))
+
+    def test_seeded_users_log_in_with_totp(self):
+        seed_bank(2, seed=1, payments_per_card=0)
+        user = virtual_users(1)[0]
+
+        response = self.client.post(reverse('accounts:login'), {
+            'username': user.email, 'password': user.password,
+            'otp_device': user.device_id, 'otp_token': user.token(),
+        })
+
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(user.cards)
+
+
+class LoadScenarioTest(LiveServerTestCase):
+    def setUp(self):
+        seed_bank(6, seed=3, payments_per_card=3)
+        self.users = virtual_users()
+
+    def test_mixed_scenario(self):
+        result = loadtest.run_scenario(self.live_server_url, 'mixed', self.users[:1], concurrency=1, iterations=8)
+
+        self.assertEqual(result['errors'], 0)
+        self.assertEqual(result['steps']['login']['requests'], 1)
+        actions = sum(result['steps'][step]['requests'] for step in result['steps'] if not step.startswith('login'))
+        self.assertEqual(actions, 8)
+        self.assertGreater(result['rps'], 0)
+
+    def test_login_scenario_uses_a_user_per_iteration(self):
+        # The live server shares one in-memory SQLite connection between its threads
+        concurrency = 1 if connection.vendor == 'sqlite' else 2
+        result = loadtest.run_scenario(self.live_server_url, 'login', self.users, concurrency=concurrency, iterations=4)
+
+        self.assertEqual(result['errors'], 0)
+        self.assertEqual(result['steps']['login']['requests'], 4)
+
+        with self.assertRaises(ValueError):
+            loadtest.run_scenario(self.live_server_url, 'login', self.users, iterations=len(self.users) + 1)
@@ -0,0 +1,66 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from accounts.models import Card, User
+from banking_system.celery import app
+from core.models import ShardedJobRun
+from core.sharding import dispatch, pk_ranges
+from credits import tasks  # noqa: F401, registers the sharded repayment job
+from credits.models import Credit
+
+
+class PkRangesTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='testuser@gmail.com', password='testpass')
+        self.cards = [Card.objects.create(user=self.user) for _ in range(10)]
+
+    def test_ranges_cover_every_row_once(self):
+        ranges = pk_ranges(Card.objects.all(), 3)
+
+        self.assertEqual(len(ranges), 3)
+        self.assertEqual(ranges[0][0], self.cards[0].id)
+        self.assertEqual(ranges[-1][1], self.cards[-1].id)
+        for (_, hi), (lo, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(lo, hi + 1)
+
+    def test_more_shards_than_rows(self):
+        queryset = Card.objects.filter(id__in=[card.id for card in self.cards[:2]])
+        self.assertEqual(len(pk_ranges(queryset, 8)), 2)
+
+    def test_empty_queryset(self):
+        self.assertEqual(pk_ranges(Card.objects.none(), 4), [])
+
+
+class ShardedRepaymentTest(TestCase):
+    def setUp(self):
+        self.eager = app.conf.task_always_eager
+        app.conf.task_always_eager = True
+
+        self.user = User.objects.create_user(email='testuser@gmail.com', password='testpass')
+        for _ in range(9):
+            card = Card.objects.create(user=self.user, card_type='C', currency='B', balance=500)
+            Credit.objects.create(user=self.user, card=card, amount=500, interest_rate=5, term_months=12,
+                                  monthly_payment=Decimal('50'), remaining_amount=Decimal('500'),
+                                  status='APPROVED')
+
+    def tearDown(self):
+        app.conf.task_always_eager = self.eager
+
+    def test_chord_records_every_shard(self):
+        dispatch('credits.monthly_repayments', shards=3, period='2026-10-01')
+
+        run = ShardedJobRun.objects.get(job='credits.monthly_repayments')
+        self.assertEqual(run.shard_count, 3)
+        self.assertEqual(run.rows, 9)
+        self.assertIsNotNone(run.finished_at)
+        self.assertEqual(len(run.shards), 3)
+        self.assertTrue(all('seconds' in shard for shard in run.shards))
+        self.assertEqual(Credit.objects.filter(remaining_amount=Decimal('450')).count(), 9)
+
+    def test_overlapping_runs_do_not_double_charge(self):
+        dispatch('credits.monthly_repayments', shards=3, period='2026-10-01')
+        dispatch('credits.monthly_repayments', shards=2, period='2026-10-01')
+
+        self.assertEqual(Credit.objects.filter(remaining_amount=Decimal('450')).count(), 9)
+        self.assertEqual(ShardedJobRun.objects.latest('id').rows, 0)
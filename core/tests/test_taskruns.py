@@ -0,0 +1,72 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.checks import run_checks
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import TestCase
+
+from accounts.models import Card, User
+from banking_system.celery import app
+from core import taskruns
+from core.models import TaskRun
+from core.tasks import purge_idempotency_keys
+
+
+class TaskRunTest(TestCase):
+    def setUp(self):
+        self.eager = app.conf.task_always_eager
+        app.conf.task_always_eager = True
+
+    def tearDown(self):
+        app.conf.task_always_eager = self.eager
+
+    def test_records_runtime_and_rows(self):
+        purge_idempotency_keys.delay()
+
+        run = TaskRun.objects.get(task_name='core.tasks.purge_idempotency_keys')
+        self.assertEqual(run.state, 'SUCCESS')
+        self.assertEqual(run.rows, 0)
+        self.assertGreaterEqual(run.runtime, 0)
+        self.assertIsNone(run.queue_wait)
+
+    def test_records_failures(self):
+        with mock.patch('core.idempotency.purge_expired_keys', side_effect=RuntimeError("boom")):
+            purge_idempotency_keys.apply()
+
+        self.assertEqual(TaskRun.objects.get().state, 'FAILURE')
+
+    def test_sharded_job_rows_come_from_the_shards(self):
+        from accounts.tasks import check_credit_card_payments
+
+        user = User.objects.create_user(email='testuser@gmail.com', password='testpass')
+        Card.objects.create(user=user, card_type='C', currency='B', balance=-50)
+
+        check_credit_card_payments.delay()
+
+        self.assertIsNone(TaskRun.objects.get(task_name='accounts.tasks.check_credit_card_payments').rows)
+        self.assertEqual(TaskRun.objects.get(task_name='core.sharding.run_shard').rows, 1)
+
+    def test_summary(self):
+        purge_idempotency_keys.delay()
+        purge_idempotency_keys.delay()
+
+        summary = list(TaskRun.objects.summary())
+
+        self.assertEqual(summary[0]['task_name'], 'core.tasks.purge_idempotency_keys')
+        self.assertEqual(summary[0]['runs'], 2)
+        out = StringIO()
+        call_command('task_summary', stdout=out)
+        self.assertIn('core.tasks.purge_idempotency_keys', out.getvalue())
+
+
+class BeatScheduleTest(TestCase):
+    def test_every_beat_entry_is_registered(self):
+        self.assertEqual(taskruns.unknown_beat_tasks(app), {})
+        self.assertEqual([error.id for error in run_checks(tags=['celery'])], [])
+
+    def test_unknown_task_is_reported(self):
+        schedule = {'typo': {'task': 'your_project.tasks.missing', 'schedule': 60}}
+
+        with self.assertRaises(ImproperlyConfigured):
+            taskruns.validate_beat_schedule(app, schedule)
@@ -1,5 +1,19 @@
+from django.http import HttpResponse, JsonResponse
 from django.views.generic import TemplateView
 
+from . import health
+
 
 class HomeView(TemplateView):
     template_name = 'core/index.html'
+
+
+def healthz(request):
+    # Liveness only says the worker answers, it never touches the database
+    return HttpResponse("ok", content_type='text/plain')
+
+
+def readyz(request):
+    results = health.readiness()
+    ready = all(result == 'ok' for result in results.values())
+    return JsonResponse(results, status=200 if ready else 503)
@@ -1,8 +1,9 @@
 from django.contrib import admin
 
-from .models import Credit, CreditApplication
+from accounts.admin import CardChoicesAdmin
+from .models import Credit, CreditApplication, RepaymentRun
 
 
-admin.site.register(Credit)
+admin.site.register(Credit, CardChoicesAdmin)
 admin.site.register(CreditApplication)
-
+admin.site.register(RepaymentRun)
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def link_credit_cards(apps, schema_editor):
+    # approve_credit creates the credit and its card together, so pair them per user in creation order
+    Credit = apps.get_model('credits', 'Credit')
+    Card = apps.get_model('accounts', 'Card')
+
+    unlinked = Credit.objects.filter(card__isnull=True).order_by('user_id', 'id')
+    for user_id in unlinked.values_list('user_id', flat=True).distinct():
+        credits = list(unlinked.filter(user_id=user_id))
+        cards = Card.objects.filter(
+            user_id=user_id, card_type='C', card_name__endswith=' Credit'
+        ).order_by('id')
+        for credit, card in zip(credits, cards):
+            credit.card = card
+            credit.save(update_fields=['card'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0022_payment_card_ts_id_idx'),
+        ('credits', '0002_alter_creditapplication_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='credit',
+            name='card',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='card_credits', to='accounts.card'),
+        ),
+        migrations.CreateModel(
+            name='RepaymentRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField(unique=True)),
+                ('last_credit_id', models.BigIntegerField(default=0)),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('credits_per_second', models.FloatField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(link_credit_cards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 21:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('credits', '0003_credit_card_repaymentrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='credit',
+            name='last_charged_period',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='repaymentrun',
+            name='range_end',
+            field=models.BigIntegerField(default=9223372036854775807),
+        ),
+        migrations.AddField(
+            model_name='repaymentrun',
+            name='range_start',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='repaymentrun',
+            name='period',
+            field=models.DateField(),
+        ),
+        migrations.AlterUniqueTogether(
+            name='repaymentrun',
+            unique_together={('period', 'range_start', 'range_end')},
+        ),
+    ]
@@ -1,6 +1,6 @@
 from django.db import models
 
-from accounts.models import User
+from accounts.models import Card, User
 from credits.constants import CREDIT_STATUS, STATUS
 
 
@@ -28,5 +28,37 @@ class Credit(models.Model):
     monthly_payment = models.DecimalField(max_digits=10, decimal_places=2)
     remaining_amount = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.CharField(max_length=20, choices=STATUS)
+    card = models.ForeignKey(
+        Card,
+        related_name='card_credits',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    # First day of the month the credit was last charged for
+    last_charged_period = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+
+class RepaymentRun(models.Model):
+    """
+    Progress of one month's repayment run over a credit id range, committed
+    together with each batch.
+    """
+    UNBOUNDED = 2 ** 63 - 1
+
+    period = models.DateField()
+    range_start = models.BigIntegerField(default=0)
+    range_end = models.BigIntegerField(default=UNBOUNDED)
+    last_credit_id = models.BigIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    credits_per_second = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('period', 'range_start', 'range_end')
+
+    def __str__(self):
+        return f"{self.period:%Y-%m} - {self.processed} credits"
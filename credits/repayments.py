@@ -0,0 +1,119 @@
+import logging
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from accounts import ledger
+from accounts.constants import CREDITS_ACCOUNT
+from accounts.models import Card
+from .models import Credit, RepaymentRun
+
+logger = logging.getLogger(__name__)
+
+
+def repayable_credits(period):
+    # Credits already charged for the period are skipped, even by an overlapping run
+    return Credit.objects.filter(status='APPROVED', card__isnull=False).filter(
+        Q(last_charged_period__isnull=True) | Q(last_charged_period__lt=period)
+    )
+
+
+def process_batch(run, batch_size):
+    """
+    Charge the next ``batch_size`` credits after the run's checkpoint.
+
+    Cards and credits are each updated by one statement and the checkpoint
+    moves in the same transaction, so a crash never applies a batch twice.
+    Returns the number of credits charged.
+    """
+    with transaction.atomic():
+        credits = list(
+            repayable_credits(run.period).select_for_update()
+            .filter(id__gt=run.last_credit_id, id__lte=run.range_end)
+            .order_by('id')[:batch_size]
+        )
+        if not credits:
+            return 0
+
+        cards = Card.objects.select_for_update().filter(
+            id__in={credit.card_id for credit in credits}
+        ).order_by('id')
+        cards = {card.id: card for card in cards}
+
+        now = timezone.now()
+        charged = defaultdict(Decimal)
+        for credit in credits:
+            # The last instalment only covers what is left
+            payment = min(credit.monthly_payment, credit.remaining_amount)
+            charged[credit.card_id] += payment
+
+            credit.remaining_amount -= payment
+            credit.term_months = max(credit.term_months - 1, 0)
+            if credit.remaining_amount <= 0:
+                credit.status = 'PAID'
+                credit.term_months = 0
+            credit.last_charged_period = run.period
+            credit.updated_at = now
+
+        legs = [ledger.card_leg(cards[card_id], -amount) for card_id, amount in charged.items()]
+        per_currency = defaultdict(Decimal)
+        for card_id, amount in charged.items():
+            per_currency[cards[card_id].currency] += amount
+        legs += [ledger.system_leg(CREDITS_ACCOUNT, amount, currency) for currency, amount in per_currency.items()]
+        ledger.post(legs)
+
+        Credit.objects.bulk_update(
+            credits, ['remaining_amount', 'term_months', 'status', 'last_charged_period', 'updated_at']
+        )
+
+        run.last_credit_id = credits[-1].id
+        run.processed += len(credits)
+        run.save(update_fields=['last_credit_id', 'processed'])
+
+    return len(credits)
+
+
+def run_monthly_repayments(period=None, batch_size=None, lo=None, hi=None):
+    """
+    Charge every active credit with an id in ``lo``..``hi`` once for ``period``
+    (the current month by default).
+
+    Progress is stored in a ``RepaymentRun``, so calling this again after a
+    failure resumes after the last committed batch.
+    """
+    period = (period or timezone.localdate()).replace(day=1)
+    batch_size = batch_size or settings.BANK_REPAYMENT_BATCH_SIZE
+    lo = lo or 0
+    hi = RepaymentRun.UNBOUNDED if hi is None else hi
+
+    run, _ = RepaymentRun.objects.get_or_create(
+        period=period, range_start=lo, range_end=hi,
+        defaults={'last_credit_id': max(lo - 1, 0)},
+    )
+    if run.finished_at is not None:
+        return run
+
+    started = time.monotonic()
+    processed = 0
+    while True:
+        charged = process_batch(run, batch_size)
+        if not charged:
+            break
+        processed += charged
+
+    elapsed = time.monotonic() - started
+    run.finished_at = timezone.now()
+    run.credits_per_second = processed / elapsed if elapsed else None
+    run.save(update_fields=['finished_at', 'credits_per_second'])
+
+    skipped = Credit.objects.filter(status='APPROVED', card__isnull=True).count()
+    logger.info(
+        f"Repayments for {period:%Y-%m}: {processed} credits in {elapsed:.2f}s "
+        f"({run.credits_per_second or 0:.0f} credits/s), {skipped} without a card skipped"
+    )
+    return run
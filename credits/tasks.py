@@ -1,34 +1,24 @@
-from datetime import datetime
+from datetime import date
 
 from celery import shared_task
+from django.utils import timezone
 
-from accounts.models import Card
+from core import sharding
 from .models import Credit
-from .views import calculate_monthly_payment
+from .repayments import run_monthly_repayments
 
 
-@shared_task
-def process_monthly_payment():
-    # Получить все активные кредиты, для которых не был проведен ежемесячный платеж
-    credits = Credit.objects.filter(status='APPROVED', updated_at__month=datetime.now().month)
-
-    for credit in credits:
-        # Получить карту, привязанную к кредиту
-        card = Card.objects.get(user=credit.user, card_name=f"{credit.purpose} Credit")
+def approved_credits_with_card():
+    return Credit.objects.filter(status='APPROVED', card__isnull=False)
 
-        # Вычесть ежемесячный платеж из баланса карты
-        card.balance -= credit.monthly_payment
-        card.save()
 
-        # Обновить оставшуюся сумму по кредиту
-        credit.remaining_amount -= credit.monthly_payment
+@sharding.sharded_job('credits.monthly_repayments', queryset=approved_credits_with_card)
+def repay_credit_range(lo, hi, period):
+    return run_monthly_repayments(date.fromisoformat(period), lo=lo, hi=hi).processed
 
-        # Уменьшить количество оставшихся месяцев
-        credit.term_months -= 1
-        credit.save()
 
-        # Если кредит выплачен, обновить статус
-        if credit.remaining_amount <= 0:
-            credit.status = 'PAID'
-            credit.term_months = 0  # Убедитесь, что месяцы равны нулю, если кредит выплачен
-            credit.save()
+@shared_task
+def process_monthly_payment():
+    # Списать ежемесячный платеж по всем активным кредитам, диапазоны id делятся между воркерами
+    period = timezone.localdate().replace(day=1)
+    return {'sharded_job_run': sharding.dispatch('credits.monthly_repayments', period=period.isoformat())}
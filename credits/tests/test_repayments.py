@@ -0,0 +1,80 @@
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+
+from accounts.models import Card, User
+from credits.models import Credit, RepaymentRun
+from credits.repayments import process_batch, run_monthly_repayments
+
+
+class MonthlyRepaymentTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='testuser@gmail.com', password='testpass')
+        self.cards = [
+            Card.objects.create(user=self.user, card_type='C', currency='B', balance=1000)
+            for _ in range(3)
+        ]
+        self.credits = [
+            Credit.objects.create(user=self.user, card=self.cards[i % 3], amount=1000, interest_rate=5,
+                                  term_months=12, monthly_payment=Decimal('100'),
+                                  remaining_amount=Decimal('1000'), status='APPROVED')
+            for i in range(7)
+        ]
+        self.period = date(2026, 10, 1)
+
+    def test_charges_every_credit_once(self):
+        run = run_monthly_repayments(self.period, batch_size=3)
+
+        self.assertEqual(run.processed, 7)
+        self.assertIsNotNone(run.finished_at)
+        self.assertEqual(
+            [card.balance for card in Card.objects.filter(id__in=[c.id for c in self.cards]).order_by('id')],
+            [Decimal('700'), Decimal('800'), Decimal('800')],
+        )
+        self.assertTrue(all(credit.remaining_amount == Decimal('900') and credit.term_months == 11
+                            for credit in Credit.objects.all()))
+
+        # A second run for the same month is a no-op
+        run_monthly_repayments(self.period, batch_size=3)
+        self.assertEqual(Card.objects.get(id=self.cards[0].id).balance, Decimal('700'))
+
+    def test_last_instalment_closes_credit(self):
+        Credit.objects.filter(id=self.credits[0].id).update(remaining_amount=Decimal('40'))
+
+        run_monthly_repayments(self.period)
+
+        credit = Credit.objects.get(id=self.credits[0].id)
+        self.assertEqual(credit.status, 'PAID')
+        self.assertEqual(credit.remaining_amount, 0)
+        self.assertEqual(credit.term_months, 0)
+
+    def test_resumes_after_failed_batch(self):
+        original = process_batch
+        calls = []
+
+        def failing_second_batch(run, batch_size):
+            calls.append(batch_size)
+            if len(calls) == 2:
+                raise RuntimeError("worker died")
+            return original(run, batch_size)
+
+        with mock.patch('credits.repayments.process_batch', side_effect=failing_second_batch):
+            with self.assertRaises(RuntimeError):
+                run_monthly_repayments(self.period, batch_size=3)
+
+        run = RepaymentRun.objects.get(period=self.period)
+        self.assertEqual(run.processed, 3)
+        self.assertIsNone(run.finished_at)
+
+        run = run_monthly_repayments(self.period, batch_size=3)
+        self.assertEqual(run.processed, 7)
+        self.assertEqual(Credit.objects.filter(remaining_amount=Decimal('900')).count(), 7)
+
+    def test_batch_query_count_does_not_grow_with_batch(self):
+        run = RepaymentRun.objects.create(period=self.period)
+
+        # Lock credits, lock cards, journal insert, cards update, credits update, checkpoint, savepoint
+        with self.assertNumQueries(8):
+            process_batch(run, batch_size=7)
@@ -3,20 +3,28 @@ from decimal import Decimal
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.admin.views.decorators import staff_member_required
 
+from accounts import ledger, summary
+from accounts.constants import CREDITS_ACCOUNT
 from accounts.models import Card
+from core.querybudget import query_budget
+from core.routers import replica_reads
 from credits.forms import CreditApprovalForm, CreditApplicationForm
 from credits.models import CreditApplication, Credit
 
 
+@query_budget(3)
+@replica_reads
 @staff_member_required
 def credit_list(request):
     credit_applications = CreditApplication.objects.all()
     return render(request, 'credits/credit_list.html', {'credit_applications': credit_applications})
 
 
+@query_budget(3)
 @login_required
 def apply_credit(request):
     if request.method == 'POST':
@@ -36,6 +44,7 @@ def apply_credit(request):
     return render(request, 'credits/credit_application_form.html', {'form': form})
 
 
+@query_budget(19)
 @staff_member_required
 def approve_credit(request, credit_app_id):
     credit_application = get_object_or_404(CreditApplication, id=credit_app_id)
@@ -47,7 +56,7 @@ def approve_credit(request, credit_app_id):
 
             if approved:
                 # Process the approved credits application
-                Credit.objects.create(
+                credit = Credit.objects.create(
                     user=credit_application.user,
                     amount=credit_application.amount,
                     interest_rate=5.0,
@@ -59,14 +68,20 @@ def approve_credit(request, credit_app_id):
                 if Card.objects.filter(user=credit_application.user, card_name=f"Credit: {credit_application.purpose}").exists():
                     raise ValidationError("Card already exists for this Credit")
 
-                # Create associated card
-                Card.objects.create(
-                    card_name=f"{credit_application.purpose} Credit",
-                    user=credit_application.user,
-                    card_type="C",
-                    balance=credit_application.amount,
-                    currency="B"
-                )
+                # Create associated card and pay the credit out onto it
+                with transaction.atomic():
+                    card = Card.objects.create(
+                        card_name=f"{credit_application.purpose} Credit",
+                        user=credit_application.user,
+                        card_type="C",
+                        currency="B"
+                    )
+                    ledger.post([
+                        ledger.card_leg(card, credit_application.amount),
+                        ledger.system_leg(CREDITS_ACCOUNT, -credit_application.amount, card.currency),
+                    ])
+                    credit.card = card
+                    credit.save(update_fields=['card'])
 
                 messages.success(request, "Credit and card created. Review and confirm to proceed.")
 
@@ -101,7 +116,9 @@ def calculate_monthly_payment(loan_amount):
     return round(monthly_payment, 2)
 
 
+@query_budget(2)
+@replica_reads
 @login_required
 def active_credits(request):
-    user_credits = Credit.objects.filter(user=request.user, status='APPROVED')
+    user_credits = summary.get_summary(request.user)['credits']
     return render(request, 'credits/active_credits.html', {'user_credits': user_credits})
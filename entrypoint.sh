@@ -1,16 +1,9 @@
 #!/bin/bash
+set -e
 
-# Проверка наличия миграций
-if [[ $(python manage.py showmigrations) ]]; then
-    # Выполнение миграций, если они есть
-    python manage.py migrate
-fi
+# Миграции и суперпользователь (ничего не делает, если всё уже есть)
+python manage.py bootstrap
 
-# Создание суперпользователя (если не существует)
-echo "from accounts.models import User; \
-           from django.contrib.auth import get_user_model; \
-           User = get_user_model(); \
-           User.objects.create_superuser('${DJANGO_SUPERUSER_EMAIL}', \
-                                      '${DJANGO_SUPERUSER_PASSWORD}')" | python manage.py shell
-
-python manage.py runserver 0.0.0.0:8000
\ No newline at end of file
+# Pre-loaded gunicorn workers, see gunicorn.conf.py. SIGHUP reloads the workers
+# gracefully; with preload_app code changes need a restart (or USR2 + TERM of the old master)
+exec gunicorn banking_system.wsgi:application -c gunicorn.conf.py
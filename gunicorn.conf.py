@@ -0,0 +1,55 @@
+# gunicorn settings shared by the WSGI (web) and ASGI (web-asgi) services.
+# Every value can be overridden from the environment.
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+# sync for banking_system.wsgi, uvicorn.workers.UvicornWorker for banking_system.asgi
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'sync')
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 1))
+
+# Django is imported once in the master and shared copy-on-write by the workers,
+# so a new worker starts serving immediately
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+
+# Workers are recycled after a jittered number of requests to cap slow memory growth
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+# Time a worker gets to finish its requests on reload (HUP) or shutdown (TERM)
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+# Workers share their prometheus samples through files in this directory
+prometheus_dir = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+
+
+def on_starting(server):
+    # Samples of a previous master would be added to the new ones
+    if prometheus_dir:
+        os.makedirs(prometheus_dir, exist_ok=True)
+        for name in os.listdir(prometheus_dir):
+            os.remove(os.path.join(prometheus_dir, name))
+
+
+def child_exit(server, worker):
+    if prometheus_dir:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def post_fork(server, worker):
+    # Connections opened while the master preloaded the app must not be shared
+    from django.core.cache import caches
+    from django.db import connections
+
+    connections.close_all()
+    caches.close_all()
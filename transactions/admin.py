@@ -1,5 +1,9 @@
 from django.contrib import admin
 
+from accounts.admin import CardChoicesAdmin
 from transactions.models import Transaction
 
-admin.site.register(Transaction)
+
+@admin.register(Transaction)
+class TransactionAdmin(CardChoicesAdmin):
+    list_select_related = ('sender_card__user', 'receiver_card__user')
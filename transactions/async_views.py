@@ -0,0 +1,80 @@
+"""``async def`` versions of the transfer views (see ``banking_system.urls_async``)."""
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.shortcuts import redirect
+
+from accounts.models import Card
+from accounts.views import get_usd_exchange_rate
+from core.asyncviews import aget_object_or_404, alogin_required, arender
+from core.idempotency import idempotent
+from core.querybudget import query_budget
+from .forms import FundTransferForm, FundTransferByCardForm
+from .services import TransferError, transfer_funds
+
+
+@query_budget(13)
+@alogin_required
+@idempotent
+async def fund_transfer(request, card_id=None):
+    card = await aget_object_or_404(Card.objects, id=card_id) if card_id else 1
+
+    if request.method == 'POST':
+        form = FundTransferForm(request.user, request.POST)
+        if await sync_to_async(form.is_valid)():
+            receiver_account_number = form.cleaned_data['receiver_account_number']
+            amount = form.cleaned_data['amount']
+            selected_card = form.cleaned_data['card']
+
+            receiver_id = await Card.objects.filter(
+                account_no=receiver_account_number
+            ).values_list('id', flat=True).afirst()
+            if receiver_id is None:
+                messages.error(request, "Error: Card matching query does not exist.")
+                return redirect('transactions:fund_transfer')
+
+            try:
+                rate = await sync_to_async(get_usd_exchange_rate)()
+                await sync_to_async(transfer_funds)(selected_card.id, receiver_id, amount, rate)
+            except TransferError as e:
+                messages.error(request, str(e))
+                return redirect('transactions:fund_transfer')
+            except Exception as e:
+                messages.error(request, f"Error: {e}")
+                return redirect('transactions:fund_transfer')
+
+            return redirect('accounts:card_list')
+    else:
+        form = FundTransferForm(request.user)
+
+    return await arender(request, 'transactions/fund_transfer.html', {'form': form, 'card': card})
+
+
+@query_budget(13)
+@alogin_required
+@idempotent
+async def fund_transfer_card_by_card(request, card_id=None):
+    card = await aget_object_or_404(Card.objects, id=card_id) if card_id else 1
+
+    if request.method == 'POST':
+        form = FundTransferByCardForm(request.user, request.POST)
+        if await sync_to_async(form.is_valid)():
+            card_one = form.cleaned_data['card_one']
+            card_two = form.cleaned_data['card_two']
+            amount = form.cleaned_data['amount']
+
+            try:
+                rate = await sync_to_async(get_usd_exchange_rate)()
+                await sync_to_async(transfer_funds)(card_one.id, card_two.id, amount, rate)
+            except TransferError as e:
+                messages.error(request, str(e))
+                return redirect('transactions:fund_transfer_card_by_card')
+            except Exception as e:
+                messages.error(request, f"Error: {e}")
+                return redirect('transactions:fund_transfer_card_by_card')
+
+            return redirect('accounts:card_list')
+
+    else:
+        form = FundTransferByCardForm(request.user)
+
+    return await arender(request, 'transactions/fund_transfer_card_by_card.html', {'form': form, 'card': card})
@@ -11,7 +11,7 @@ class FundTransferForm(forms.Form):
     def __init__(self, user, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        user_cards = Card.objects.filter(user=user)
+        user_cards = Card.objects.filter(user=user).select_related('user')
         self.fields['card'].queryset = user_cards
 
 
@@ -25,6 +25,6 @@ class FundTransferByCardForm(forms.Form):
     def __init__(self, user, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        user_cards = Card.objects.filter(user=user)
+        user_cards = Card.objects.filter(user=user).select_related('user')
         self.fields['card_one'].queryset = user_cards
         self.fields['card_two'].queryset = user_cards
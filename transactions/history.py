@@ -0,0 +1,90 @@
+"""
+Transfer history of a card: sent and received transfers merged, newest first.
+
+Both sides come from one UNION ALL query. Each branch is a range scan of
+its (card, timestamp, id) index, and on databases that allow it
+(PostgreSQL) each branch stops after a page of rows, so a page costs the
+same however long the history is.
+
+Card statements (``accounts.statements``) read the same query bounded to
+the statement range.
+"""
+from collections import namedtuple
+
+from django.db import connections, router
+from django.db.models import DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from accounts.statements import PAGE_SIZE, TRANSFER, decode_cursor, encode_cursor, keyset
+from .models import Transaction
+
+FIELDS = ('id', 'timestamp', 'direction', 'card_amount', 'counterparty')
+
+Transfer = namedtuple('Transfer', FIELDS)
+
+# Transfers recorded before converted_amount existed were in one currency
+RECEIVED_AMOUNT = Coalesce('converted_amount', 'amount', output_field=DecimalField())
+
+
+def side(card, direction, position=None, limit=None, start=None, end=None):
+    if direction == 'sent':
+        transfers = Transaction.objects.filter(sender_card=card).annotate(
+            card_amount=-F('amount'),
+            counterparty=F('receiver_card__account_no'),
+        )
+    else:
+        transfers = Transaction.objects.filter(receiver_card=card).annotate(
+            card_amount=RECEIVED_AMOUNT,
+            counterparty=F('sender_card__account_no'),
+        )
+    transfers = transfers.annotate(direction=Value(direction))
+
+    if start is not None:
+        transfers = transfers.filter(timestamp__gte=start, timestamp__lt=end)
+
+    transfers = keyset(transfers, position, TRANSFER).values_list(*FIELDS)
+    if limit is None:
+        return transfers
+    if connections[router.db_for_read(Transaction)].features.supports_slicing_ordering_in_compound:
+        transfers = transfers.order_by('-timestamp', '-id')[:limit]
+    return transfers
+
+
+def history_queryset(card, cursor=None, page_size=PAGE_SIZE, start=None, end=None):
+    position = decode_cursor(cursor)
+    # One extra row tells whether there is a following page
+    limit = page_size + 1
+    sent = side(card, 'sent', position, limit, start, end)
+    received = side(card, 'received', position, limit, start, end)
+    return sent.union(received, all=True).order_by('-timestamp', '-id')[:limit]
+
+
+def range_queryset(card, start, end):
+    """Every transfer of the card in [start, end), oldest first, for exports."""
+    sent = side(card, 'sent', start=start, end=end)
+    received = side(card, 'received', start=start, end=end)
+    return sent.union(received, all=True).order_by('timestamp', 'id')
+
+
+def totals_queryset(card, start, end):
+    return Transaction.objects.filter(Q(sender_card=card) | Q(receiver_card=card),
+                                      timestamp__gte=start, timestamp__lt=end)
+
+
+def totals(card):
+    """Aggregates of ``totals_queryset``: sent transfers are spent, received ones deposited."""
+    return {
+        'total_spent': Sum('amount', filter=Q(sender_card=card)),
+        'total_deposited': Sum(RECEIVED_AMOUNT, filter=Q(receiver_card=card)),
+    }
+
+
+def transfer_page(card, cursor=None, page_size=PAGE_SIZE):
+    """
+    One page of the card's transfers, newest first, continuing after ``cursor``.
+
+    Returns the rows and the cursor of the following page (``None`` on the last page).
+    """
+    rows = [Transfer(*row) for row in history_queryset(card, cursor, page_size)]
+    next_cursor = encode_cursor(rows[page_size - 1], TRANSFER) if len(rows) > page_size else None
+    return rows[:page_size], next_cursor
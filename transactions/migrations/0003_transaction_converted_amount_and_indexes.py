@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 21:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_payment_deposit_pending'),
+        ('transactions', '0002_alter_transaction_options_remove_transaction_account_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='converted_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='receiver_card',
+            field=models.ForeignKey(db_index=False, default=None, on_delete=django.db.models.deletion.CASCADE, related_name='received_transactions', to='accounts.card'),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='sender_card',
+            field=models.ForeignKey(db_index=False, default=None, on_delete=django.db.models.deletion.CASCADE, related_name='sent_transactions', to='accounts.card'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['sender_card', 'timestamp', 'id'], name='transaction_sender_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['receiver_card', 'timestamp', 'id'], name='transaction_receiver_ts_idx'),
+        ),
+    ]
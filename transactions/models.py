@@ -4,12 +4,24 @@ from accounts.models import Card
 
 
 class Transaction(models.Model):
+    """One transfer between two cards, in the history of both."""
+    # The (card, timestamp, id) indexes below also serve the foreign keys
     sender_card = models.ForeignKey(Card, on_delete=models.CASCADE, related_name='sent_transactions',
-                                    default=None)
+                                    default=None, db_index=False)
     receiver_card = models.ForeignKey(Card, on_delete=models.CASCADE, related_name='received_transactions',
-                                      default=None)
+                                      default=None, db_index=False)
+    # In the sender's currency
     amount = models.DecimalField(max_digits=12, decimal_places=2)
+    # What the receiver got, in the receiver's currency
+    converted_amount = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Transfer history reads each side by time and pages by (timestamp, id)
+            models.Index(fields=['sender_card', 'timestamp', 'id'], name='transaction_sender_ts_idx'),
+            models.Index(fields=['receiver_card', 'timestamp', 'id'], name='transaction_receiver_ts_idx'),
+        ]
+
     def __str__(self):
         return f"{self.sender_card} -> {self.receiver_card}: {self.amount} BYN"
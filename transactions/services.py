@@ -0,0 +1,55 @@
+from django.db import transaction
+
+from accounts import ledger
+from accounts.constants import FX_ACCOUNT
+from accounts.models import Card
+from accounts.money import Money, convert
+from .models import Transaction
+
+
+class TransferError(Exception):
+    pass
+
+
+def transfer_funds(sender_id, receiver_id, amount, rate):
+    """
+    Move ``amount`` from the sender card to the receiver card.
+
+    Both cards are locked in id order, so two transfers running in opposite
+    directions cannot deadlock, and the balances are changed by a single
+    journal posting. The transfer is recorded once, as a ``Transaction``.
+    """
+    if sender_id == receiver_id:
+        raise TransferError("Cannot transfer funds from and to the same card.")
+
+    with transaction.atomic():
+        cards = Card.objects.select_for_update().filter(id__in=[sender_id, receiver_id]).order_by('id')
+        cards = {card.id: card for card in cards}
+        if len(cards) != 2:
+            raise TransferError("Card matching query does not exist.")
+        sender, receiver = cards[sender_id], cards[receiver_id]
+
+        amount = Money.of(amount, sender.currency)
+        # Credit cards are allowed to go below zero
+        if sender.card_type != 'C' and amount > Money.of(sender.balance, sender.currency):
+            raise TransferError("Insufficient funds to transfer.")
+
+        converted_amount = convert(amount, receiver.currency, rate)
+
+        legs = [ledger.card_leg(sender, -amount), ledger.card_leg(receiver, converted_amount)]
+        if sender.currency != receiver.currency:
+            # Both sides of the exchange go through the FX account so each currency balances
+            legs += [
+                ledger.system_leg(FX_ACCOUNT, amount, sender.currency),
+                ledger.system_leg(FX_ACCOUNT, -converted_amount, receiver.currency),
+            ]
+        ledger.post(legs)
+
+        # The rows are locked, so the new balances can be derived without a re-read
+        sender.balance -= amount.amount
+        receiver.balance += converted_amount.amount
+
+        Transaction.objects.create(sender_card=sender, receiver_card=receiver, amount=amount.amount,
+                                   converted_amount=converted_amount.amount)
+
+    return sender, receiver, converted_amount.amount
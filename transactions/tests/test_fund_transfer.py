@@ -7,6 +7,7 @@ from django.contrib.messages import get_messages
 from accounts.models import Card, Payment
 from accounts.views import get_usd_exchange_rate
 from transactions.forms import FundTransferByCardForm, FundTransferForm
+from transactions.models import Transaction
 from django.test import Client
 
 User = get_user_model()
@@ -89,8 +90,11 @@ class FundTransferViewTest(TestCase):
         usd_in_rate = get_usd_exchange_rate()
         self.assertAlmostEqual(float(self.receiver_card.balance), float(50 + Decimal('30') * Decimal(usd_in_rate)), places=2)
 
-        self.assertEqual(Payment.objects.filter(card=self.sender_card, amount=70).count(), 1)
-        self.assertEqual(Payment.objects.filter(card=self.receiver_card, amount=50 + Decimal('30') * Decimal(usd_in_rate)).count(), 1)
+        transfer = Transaction.objects.get()
+        self.assertEqual((transfer.sender_card_id, transfer.receiver_card_id), (self.sender_card.id, self.receiver_card.id))
+        self.assertEqual(transfer.amount, 30)
+        self.assertAlmostEqual(float(transfer.converted_amount), float(Decimal('30') * Decimal(usd_in_rate)), places=2)
+        self.assertFalse(Payment.objects.exists())
 
     def test_fund_transfer_view_post_insufficient_funds(self):
         data = {
@@ -102,4 +106,4 @@ class FundTransferViewTest(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertRedirects(response, reverse('accounts:card_list'))
 
-        self.assertEqual(Payment.objects.count(), 2)
+        self.assertEqual(Transaction.objects.count(), 1)
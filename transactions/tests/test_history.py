@@ -0,0 +1,72 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Card
+from transactions.history import transfer_page
+from transactions.models import Transaction
+from transactions.services import transfer_funds
+
+User = get_user_model()
+
+
+class TransferHistoryTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='test@example.com', password='testpass')
+        self.card = Card.objects.create(user=self.user, card_type='D', currency='B', balance=1000)
+        self.other = Card.objects.create(user=self.user, card_type='D', currency='B', balance=1000)
+        self.usd = Card.objects.create(user=self.user, card_type='D', currency='U', balance=1000)
+
+    def test_sent_and_received_are_merged_newest_first(self):
+        transfer_funds(self.card.id, self.other.id, Decimal('10'), Decimal('3.2'))
+        transfer_funds(self.usd.id, self.card.id, Decimal('5'), Decimal('3.2'))
+        transfer_funds(self.other.id, self.usd.id, Decimal('1'), Decimal('3.2'))
+
+        with self.assertNumQueries(1):
+            transfers, next_cursor = transfer_page(self.card)
+
+        self.assertIsNone(next_cursor)
+        self.assertEqual([(t.direction, t.card_amount, t.counterparty) for t in transfers], [
+            ('received', Decimal('16.00'), self.usd.account_no),
+            ('sent', Decimal('-10.00'), self.other.account_no),
+        ])
+
+    def test_pages_follow_each_other(self):
+        for i in range(4):
+            transfer_funds(self.card.id, self.other.id, Decimal('1'), Decimal('3.2'))
+            transfer_funds(self.other.id, self.card.id, Decimal('2'), Decimal('3.2'))
+        # Ties on the timestamp are broken by id
+        Transaction.objects.update(timestamp=timezone.now() - timedelta(days=1))
+
+        seen, cursor = [], None
+        while True:
+            transfers, cursor = transfer_page(self.card, cursor, page_size=3)
+            seen += [transfer.id for transfer in transfers]
+            if cursor is None:
+                break
+
+        self.assertEqual(seen, sorted(Transaction.objects.values_list('id', flat=True), reverse=True))
+
+    def test_view(self):
+        transfer_funds(self.card.id, self.other.id, Decimal('10'), Decimal('3.2'))
+        self.client.login(email='test@example.com', password='testpass')
+
+        response = self.client.get(reverse('transactions:transfer_history', args=[self.card.id]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'transactions/transfer_history.html')
+        self.assertContains(response, self.other.account_no)
+        self.assertIsNone(response.context['next_page_url'])
+
+    def test_cards_of_other_users_are_hidden(self):
+        stranger = User.objects.create_user(email='other@example.com', password='testpass')
+        card = Card.objects.create(user=stranger, card_type='D', currency='B', balance=0)
+        self.client.login(email='test@example.com', password='testpass')
+
+        response = self.client.get(reverse('transactions:transfer_history', args=[card.id]))
+
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,101 @@
+import threading
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+
+from accounts.models import Card, Payment
+from transactions.models import Transaction
+from transactions.services import TransferError, transfer_funds
+
+User = get_user_model()
+
+
+class TransferServiceTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='test@example.com', password='testpass')
+        self.debit = Card.objects.create(user=self.user, card_type='D', currency='B', balance=100)
+        self.other = Card.objects.create(user=self.user, card_type='D', currency='B', balance=10)
+        self.usd = Card.objects.create(user=self.user, card_type='D', currency='U', balance=0)
+
+    def test_transfer_moves_balance(self):
+        transfer_funds(self.debit.id, self.other.id, Decimal('40'), Decimal('3.2'))
+
+        self.debit.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(self.debit.balance, Decimal('60'))
+        self.assertEqual(self.other.balance, Decimal('50'))
+        transfer = Transaction.objects.get()
+        self.assertEqual((transfer.sender_card_id, transfer.receiver_card_id), (self.debit.id, self.other.id))
+        self.assertEqual((transfer.amount, transfer.converted_amount), (Decimal('40'), Decimal('40')))
+        self.assertFalse(Payment.objects.exists())
+
+    def test_transfer_converts_currency(self):
+        transfer_funds(self.debit.id, self.usd.id, Decimal('32'), Decimal('3.2'))
+
+        self.usd.refresh_from_db()
+        self.assertEqual(self.usd.balance, Decimal('10.00'))
+        self.assertEqual(Transaction.objects.get().converted_amount, Decimal('10.00'))
+
+    def test_insufficient_funds(self):
+        with self.assertRaisesMessage(TransferError, "Insufficient funds"):
+            transfer_funds(self.other.id, self.debit.id, Decimal('11'), Decimal('3.2'))
+
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.balance, Decimal('10'))
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_same_card(self):
+        with self.assertRaises(TransferError):
+            transfer_funds(self.debit.id, self.debit.id, Decimal('1'), Decimal('3.2'))
+
+    def test_query_count(self):
+        # Lock, journal INSERT, one UPDATE for both cards, transaction INSERT, plus the savepoint
+        with self.assertNumQueries(6):
+            transfer_funds(self.debit.id, self.other.id, Decimal('1'), Decimal('3.2'))
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class TransferConcurrencyTest(TransactionTestCase):
+    threads = 8
+    transfers_per_thread = 25
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='test@example.com', password='testpass')
+        self.cards = [
+            Card.objects.create(user=self.user, card_type='D', currency='B', balance=1000)
+            for _ in range(3)
+        ]
+
+    def test_parallel_transfers_do_not_drift(self):
+        errors = []
+
+        def worker(offset):
+            try:
+                for i in range(self.transfers_per_thread):
+                    # Mix directions so the same hot rows are locked from both sides
+                    sender = self.cards[(offset + i) % 3]
+                    receiver = self.cards[(offset + i + 1) % 3]
+                    transfer_funds(sender.id, receiver.id, Decimal('1.00'), Decimal('3.2'))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=(n,)) for n in range(self.threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        balances = Card.objects.filter(id__in=[card.id for card in self.cards]).values_list('balance', flat=True)
+        self.assertEqual(sum(balances), Decimal('3000'))
+        self.assertEqual(Transaction.objects.count(), self.threads * self.transfers_per_thread)
+
+        # Every card's balance must match the transfers recorded against it
+        for card in self.cards:
+            moved = (sum(Transaction.objects.filter(receiver_card=card).values_list('converted_amount', flat=True))
+                     - sum(Transaction.objects.filter(sender_card=card).values_list('amount', flat=True)))
+            self.assertEqual(Card.objects.get(id=card.id).balance, Decimal('1000') + moved)
@@ -1,7 +1,7 @@
 from django.urls import path
 
 from accounts.views import AccountLoginView
-from .views import fund_transfer, fund_transfer_card_by_card, TransactionMenu
+from .views import fund_transfer, fund_transfer_card_by_card, transfer_history, TransactionMenu
 
 app_name = 'transactions'
 
@@ -13,4 +13,5 @@ urlpatterns = [
     path('fund_transfer/', fund_transfer, name='fund_transfer'),
     path('fund_transfer_card_by_card/', fund_transfer_card_by_card, name='fund_transfer_card_by_card'),
     path('transaction_menu/', TransactionMenu.as_view(), name='transaction_menu'),
+    path('transfer_history/<int:card_id>', transfer_history, name='transfer_history'),
 ]
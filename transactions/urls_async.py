@@ -0,0 +1,8 @@
+from core.asyncviews import swap_views
+from . import async_views
+from .urls import app_name, urlpatterns as sync_urlpatterns  # noqa: F401
+
+urlpatterns = swap_views(sync_urlpatterns, {
+    'fund_transfer': async_views.fund_transfer,
+    'fund_transfer_card_by_card': async_views.fund_transfer_card_by_card,
+})
@@ -1,21 +1,26 @@
-from decimal import Decimal
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db import transaction
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.generic import TemplateView
 
 from accounts.views import get_usd_exchange_rate
-from .models import Transaction
+from core.idempotency import idempotent
+from core.querybudget import query_budget
+from core.routers import replica_reads
 from .forms import FundTransferForm, FundTransferByCardForm
-from accounts.models import Card, Payment
+from .history import transfer_page
+from .services import TransferError, transfer_funds
+from accounts.models import Card
 
 
+@query_budget(2)
 class TransactionMenu(TemplateView):
     template_name = 'transactions/transaction_menu.html'
 
 
+@query_budget(13)
 @login_required
+@idempotent
 def fund_transfer(request, card_id=None):
     card = get_object_or_404(Card, id=card_id) if card_id else 1
 
@@ -25,58 +30,19 @@ def fund_transfer(request, card_id=None):
             receiver_account_number = form.cleaned_data['receiver_account_number']
             amount = form.cleaned_data['amount']
             selected_card = form.cleaned_data['card']
-            sender_card = Card.objects.get(id=selected_card.id)
 
-            try:
-                receiver_card = Card.objects.get(account_no=receiver_account_number)
-            except Exception as e:
-                messages.error(request, f"Error: {e}")
-                return redirect('transactions:fund_transfer')
-
-            # Проверка баланса
-            if selected_card.card_type != 'C' and amount > sender_card.balance:
-                messages.error(request, "Insufficient funds to transfer.")
-                return redirect('transactions:fund_transfer')
-
-            if sender_card == receiver_card:
-                messages.error(request, "Cannot transfer funds from and to the same card.")
+            receiver_id = Card.objects.filter(
+                account_no=receiver_account_number
+            ).values_list('id', flat=True).first()
+            if receiver_id is None:
+                messages.error(request, "Error: Card matching query does not exist.")
                 return redirect('transactions:fund_transfer')
-            usd_in_rate = 3.19
-
-            if usd_in_rate is None:
-                usd_in_rate = 3.116  # default, if api not working
-            print(usd_in_rate)
-            if sender_card.currency == 'U' and sender_card.currency != receiver_card.currency:
-                # from belarusbank api
-                converted_amount = Decimal(str(amount)) * Decimal(str(usd_in_rate))
-            elif sender_card.currency == 'B' and sender_card.currency != receiver_card.currency:
-                # from belarusbank api
-                converted_amount = Decimal(str(amount)) / Decimal(str(usd_in_rate))
-            else:
-                converted_amount = amount
 
             try:
-                with transaction.atomic():
-                    sender_card.balance -= amount
-                    sender_card.save()
-
-                    receiver_card.balance += converted_amount
-                    receiver_card.save()
-
-                    Payment.objects.create(
-                        card=receiver_card,
-                        amount=receiver_card.balance,
-                        currency=receiver_card.currency,
-                        card_type=receiver_card.card_type,
-                        deposit_pending=True
-                    )
-                    Payment.objects.create(
-                        card=sender_card,
-                        amount=sender_card.balance,
-                        currency=sender_card.currency,
-                        card_type=sender_card.card_type,
-                    )
-
+                transfer_funds(selected_card.id, receiver_id, amount, get_usd_exchange_rate())
+            except TransferError as e:
+                messages.error(request, str(e))
+                return redirect('transactions:fund_transfer')
             except Exception as e:
                 messages.error(request, f"Error: {e}")
                 return redirect('transactions:fund_transfer')
@@ -88,7 +54,9 @@ def fund_transfer(request, card_id=None):
     return render(request, 'transactions/fund_transfer.html', {'form': form, 'card': card})
 
 
+@query_budget(13)
 @login_required
+@idempotent
 def fund_transfer_card_by_card(request, card_id=None):
     card = get_object_or_404(Card, id=card_id) if card_id else 1
 
@@ -99,58 +67,11 @@ def fund_transfer_card_by_card(request, card_id=None):
             card_two = form.cleaned_data['card_two']
             amount = form.cleaned_data['amount']
 
-            sender_card = Card.objects.get(id=card_one.id)
-            receiver_card = Card.objects.get(id=card_two.id)
-            usd_in_rate = 3.19
-
-            if usd_in_rate is None:
-                usd_in_rate = 3.116  # default, if api not working
-            print(usd_in_rate)
             try:
-                with transaction.atomic():
-                    # Check balance
-                    if card_one.card_type != 'C' and amount > sender_card.balance:
-                        messages.error(request, "Insufficient funds to transfer.")
-                        return redirect('transactions:fund_transfer_card_by_card')
-
-                    # Check if sender and receiver cards are the same
-                    if sender_card == receiver_card:
-                        messages.error(request, "Cannot transfer funds from and to the same card.")
-                        return redirect('transactions:fund_transfer_card_by_card')
-
-                    conversion_rate = Decimal(usd_in_rate)
-
-                    if sender_card.currency != receiver_card.currency:
-                        if sender_card.currency == 'U':
-                            converted_amount = amount * conversion_rate
-                        elif sender_card.currency == 'B':
-                            converted_amount = amount / conversion_rate
-                    else:
-                        converted_amount = amount
-
-                    # Deduct amount from sender's balance
-                    sender_card.balance -= amount
-                    sender_card.save()
-
-                    # Increase amount to receiver's balance
-                    receiver_card.balance += converted_amount
-                    receiver_card.save()
-
-                    # Record the transaction
-                    Payment.objects.create(
-                        card=sender_card,
-                        amount=-amount,
-                        currency=sender_card.currency,
-                        card_type=sender_card.card_type,
-                    )
-                    Payment.objects.create(
-                        card=receiver_card,
-                        amount=converted_amount,
-                        currency=receiver_card.currency,
-                        card_type=receiver_card.card_type,
-                        deposit_pending=True
-                    )
-
+                transfer_funds(card_one.id, card_two.id, amount, get_usd_exchange_rate())
+            except TransferError as e:
+                messages.error(request, str(e))
+                return redirect('transactions:fund_transfer_card_by_card')
             except Exception as e:
                 messages.error(request, f"Error: {e}")
                 return redirect('transactions:fund_transfer_card_by_card')
@@ -161,3 +82,23 @@ def fund_transfer_card_by_card(request, card_id=None):
         form = FundTransferByCardForm(request.user)
 
     return render(request, 'transactions/fund_transfer_card_by_card.html', {'form': form, 'card': card})
+
+
+@query_budget(4)
+@replica_reads
+@login_required
+def transfer_history(request, card_id):
+    card = get_object_or_404(Card, id=card_id, user=request.user)
+    transfers, next_cursor = transfer_page(card, request.GET.get('cursor'))
+
+    next_page_url = None
+    if next_cursor:
+        query = request.GET.copy()
+        query['cursor'] = next_cursor
+        next_page_url = f"?{query.urlencode()}"
+
+    return render(request, 'transactions/transfer_history.html', {
+        'card': card,
+        'transfers': transfers,
+        'next_page_url': next_page_url,
+    })